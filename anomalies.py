@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from forecast import Forecast
+from kernels import safe_ratio
+from schema import MONTH_ORDER
+from timeseries import MonthlyPanel
+
+# Robust z-score beyond which a month counts as unusual (Iglewicz & Hoaglin)
+THRESHOLD = 3.5
+
+# Median absolute deviation of a normal distribution, in standard deviations
+MAD_SCALE = 0.6745
+
+# Outlying months per package set aside before the expectation is refitted
+CLEANING_ROUNDS = 3
+
+ANOMALY_COLUMNS = ['Metric', 'Subscription Package', 'Period', 'Year', 'Month',
+                   'Value', 'Expected', 'Score']
+
+
+def robust_scores(residuals: np.ndarray) -> np.ndarray:
+    """Robust z-scores of every cell against the rest of its row
+
+    Uses the row median and median absolute deviation, so a few extreme
+    months do not hide themselves by inflating the spread. Rows with no
+    spread score NaN.
+    """
+    deviation = residuals - np.median(residuals, axis=-1, keepdims=True)
+    mad = np.median(np.abs(deviation), axis=-1, keepdims=True)
+    return MAD_SCALE * safe_ratio(deviation, mad)
+
+
+def score_panel(values: np.ndarray, hat: np.ndarray, threshold: float = THRESHOLD):
+    """Expected values and robust scores of every package's months at once
+
+    `hat` projects a series onto its trend and month effects (see
+    forecast.Forecast). Each round replaces every package's most extreme
+    month, if it is beyond the threshold, with its prediction from the
+    other months, so one spike does not drag the expectation of the same
+    month in other years. Residuals are scaled to leave-one-out residuals,
+    so a collapse in the latest month is not absorbed by the trend it
+    pulls down.
+    """
+    values = values.astype(np.float64)
+    # 1 / (1 - leverage); NaN where a month alone determines the fit
+    loo = safe_ratio(1, 1 - np.diag(hat).round(9))
+    rows = np.arange(len(values))
+    cleaned = values.copy()
+    for _ in range(CLEANING_ROUNDS):
+        held_out = (cleaned - cleaned @ hat.T) * loo
+        scores = np.abs(np.nan_to_num(robust_scores(held_out)))
+        worst = scores.argmax(axis=-1)
+        outlier = scores[rows, worst] >= threshold
+        cleaned[rows[outlier], worst[outlier]] -= held_out[rows[outlier], worst[outlier]]
+    expected = cleaned @ hat.T
+    return expected, robust_scores((values - expected) * loo)
+
+
+def find_anomalies(panel: MonthlyPanel, forecast: Forecast,
+                   threshold: float = THRESHOLD) -> pd.DataFrame:
+    """Every (package, month) far from its seasonal expectation, most unusual first
+
+    Scores all packages and months in one vectorized pass per metric.
+    Months before a package's first sale are skipped.
+    """
+    frames = []
+    for metric, values in panel.values.items():
+        expected, scores = score_panel(values, forecast.hat, threshold)
+        launched = np.maximum.accumulate(values != 0, axis=-1)
+        rows, columns = np.nonzero(launched & (np.abs(np.nan_to_num(scores)) >= threshold))
+        periods = panel.periods[columns]
+        frames.append(pd.DataFrame({
+            'Metric': metric,
+            'Subscription Package': panel.packages[rows],
+            'Period': periods,
+            'Year': (periods // 12).astype(np.int32),
+            'Month': pd.Categorical.from_codes(periods % 12, categories=MONTH_ORDER, ordered=True),
+            'Value': values[rows, columns],
+            'Expected': expected[rows, columns],
+            'Score': scores[rows, columns]
+        }, columns=ANOMALY_COLUMNS))
+
+    anomalies = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=ANOMALY_COLUMNS)
+    order = np.argsort(-np.abs(anomalies['Score'].to_numpy(dtype=np.float64)), kind='stable')
+    return anomalies.take(order).reset_index(drop=True)
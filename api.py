@@ -0,0 +1,296 @@
+"""Serve the dashboard KPIs, monthly trends and package breakdowns as read-only JSON
+
+Runs next to the Streamlit app on the same dataset store, so other tools
+read the numbers the dashboards show instead of scraping them. Run from the
+repository root:
+
+    python api.py --port 8502
+
+Endpoints (GET only; amounts in cedis):
+
+    /api/<solo|firm>/datasets   stored versions, newest first
+    /api/<solo|firm>/kpis       headline figures against a baseline year
+    /api/<solo|firm>/trends     monthly totals
+    /api/<solo|firm>/packages   per-package totals against a baseline year
+
+Query parameters: `dataset` (a 16-character hex dataset id, else a 400;
+default: the newest stored dataset), `year`
+(repeat on /trends; default: the latest year), `baseline_year` (default:
+the year before), `month` and `package` (repeatable filters). Every
+response carries an ETag; a request whose If-None-Match matches it gets an
+empty 304 without the data being touched.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from engines import ENGINE, create_engine
+from export import DASHBOARDS, ExportFilters, compared_months, dashboard_kpis
+from kernels import safe_ratio
+from money import in_major, to_major
+from schema import MONTH_ORDER
+from store import DatasetStore
+from timeseries import build_year_pivot
+
+# Serialized responses kept per process, keyed by ETag
+CACHE_ENTRIES = 512
+
+# Dataset ids are the 16 hex digits of DatasetStore.dataset_id
+DATASET_ID = re.compile(r'[0-9a-f]{16}')
+
+# Headers of every JSON response
+JSON_HEADERS = {'Content-Type': 'application/json; charset=utf-8', 'Cache-Control': 'no-cache'}
+
+
+class ApiError(ValueError):
+    """Request the API cannot answer, with the HTTP status to reply with"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _number(value):
+    """JSON-safe Python number: numpy scalars unwrapped, NaN as null"""
+    value = value.item() if isinstance(value, np.generic) else value
+    return None if isinstance(value, float) and value != value else value
+
+
+def _records(frame: pd.DataFrame, money: Optional[List[str]] = None) -> List[Dict]:
+    """Rows of a frame as JSON-safe dicts, amounts (`money` columns) in cedis"""
+    frame = in_major(frame, money)
+    columns = {col: (frame[col].astype(str) if isinstance(frame[col].dtype, pd.CategoricalDtype) else frame[col])
+               for col in frame.columns}
+    return [dict(zip(columns, map(_number, row))) for row in zip(*(col.tolist() for col in columns.values()))]
+
+
+class DashboardApi:
+    """Answers API paths from the dataset store; independent of any socket
+
+    Datasets are immutable and addressed by content hash, so a response is
+    fully determined by the endpoint, the resolved dataset id and the
+    filters. Its ETag is a hash of those, known before any aggregation, and
+    a matching If-None-Match costs one hash.
+    """
+
+    def __init__(self, store: Optional[DatasetStore] = None, engine_name: str = ENGINE):
+        self.store = store or DatasetStore()
+        # Memory-mapped datasets shared by every request of this process
+        self.engine = create_engine(engine_name, self.store, lru_cache(maxsize=16)(self.store.read), MONTH_ORDER)
+        self.endpoints = {'kpis': self.kpis, 'trends': self.trends, 'packages': self.packages}
+        self._responses: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._newest: Dict[str, Tuple[int, Optional[str]]] = {}
+        self._latest_years: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def newest(self, data_type: str) -> Optional[str]:
+        """Newest stored dataset id, re-listed only when the directory changes"""
+        directory = os.path.join(self.store.root, data_type)
+        stamp = os.stat(directory).st_mtime_ns if os.path.isdir(directory) else 0
+        cached = self._newest.get(data_type)
+        if cached is None or cached[0] != stamp:
+            stored = self.store.list(data_type)
+            cached = (stamp, stored[0]['dataset_id'] if stored else None)
+            self._newest[data_type] = cached
+        return cached[1]
+
+    def latest_year(self, data_type: str, dataset_id: str) -> int:
+        key = (data_type, dataset_id)
+        if key not in self._latest_years:
+            years = self.engine.aggregate(data_type, dataset_id, by=['Year'])['Year']
+            self._latest_years[key] = int(years.max())
+        return self._latest_years[key]
+
+    def get(self, path: str, if_none_match: Optional[str] = None) -> Tuple[int, Dict[str, str], bytes]:
+        """Status, headers and body of a GET request"""
+        try:
+            url = urlsplit(path)
+            parts = [part for part in url.path.split('/') if part]
+            if len(parts) != 3 or parts[0] != 'api' or parts[1] not in DASHBOARDS:
+                raise ApiError(404, f"Unknown path {url.path}")
+            data_type, endpoint = parts[1], parts[2]
+            query = parse_qs(url.query)
+
+            if endpoint == 'datasets':
+                body = self._dump([{key: manifest[key] for key in ('version', 'dataset_id', 'name', 'rows', 'created')}
+                                   for manifest in self.store.versions(data_type)[::-1]])
+                return self._reply(hashlib.sha1(body).hexdigest()[:20], body, if_none_match)
+            if endpoint not in self.endpoints:
+                raise ApiError(404, f"Unknown endpoint {endpoint}")
+
+            dataset_id = query.get('dataset', [None])[0]
+            if dataset_id and not DATASET_ID.fullmatch(dataset_id):
+                raise ApiError(400, "dataset must be a 16-character hex dataset id")
+            dataset_id = dataset_id or self.newest(data_type)
+            if dataset_id is None or not self.store.exists(data_type, dataset_id):
+                raise ApiError(404, f"No stored {data_type} dataset {dataset_id or ''}".strip())
+            canonical = json.dumps([endpoint, data_type, dataset_id,
+                                    sorted((key, sorted(values)) for key, values in query.items() if key != 'dataset')])
+            etag = hashlib.sha1(canonical.encode()).hexdigest()[:20]
+            if self._matches(etag, if_none_match):
+                return 304, {'ETag': f'"{etag}"'}, b''
+
+            with self._lock:
+                body = self._responses.get(etag)
+                if body is not None:
+                    self._responses.move_to_end(etag)
+            if body is None:
+                body = self._dump({'dataset': dataset_id,
+                                   **self.endpoints[endpoint](data_type, dataset_id, query)})
+                with self._lock:
+                    self._responses[etag] = body
+                    while len(self._responses) > CACHE_ENTRIES:
+                        self._responses.popitem(last=False)
+            return self._reply(etag, body, if_none_match)
+
+        except ApiError as e:
+            return e.status, JSON_HEADERS, self._dump({'error': str(e)})
+        except Exception as e:
+            return 500, JSON_HEADERS, self._dump({'error': f"Error computing the response: {str(e)}"})
+
+    @staticmethod
+    def _matches(etag: str, if_none_match: Optional[str]) -> bool:
+        if not if_none_match:
+            return False
+        tags = [tag.strip().removeprefix('W/').strip('"') for tag in if_none_match.split(',')]
+        return '*' in tags or etag in tags
+
+    def _reply(self, etag: str, body: bytes, if_none_match: Optional[str]):
+        if self._matches(etag, if_none_match):
+            return 304, {'ETag': f'"{etag}"'}, b''
+        return 200, {**JSON_HEADERS, 'ETag': f'"{etag}"'}, body
+
+    @staticmethod
+    def _dump(payload) -> bytes:
+        return json.dumps(payload, separators=(',', ':'), allow_nan=False).encode()
+
+    def _filters(self, data_type: str, dataset_id: str, query: Dict[str, List[str]]) -> ExportFilters:
+        """Year, baseline and filters of a request, checked against the calendar"""
+        try:
+            year = int(query['year'][0]) if 'year' in query else self.latest_year(data_type, dataset_id)
+            baseline = int(query['baseline_year'][0]) if 'baseline_year' in query else None
+        except ValueError:
+            raise ApiError(400, "year and baseline_year must be integers")
+        months = query.get('month')
+        unknown = sorted(set(months or []) - set(MONTH_ORDER))
+        if unknown:
+            raise ApiError(400, f"Unknown month {', '.join(unknown)}")
+        return ExportFilters(year, baseline, months, query.get('package'))
+
+    def kpis(self, data_type: str, dataset_id: str, query: Dict[str, List[str]]) -> Dict:
+        """The KPI cards of the dashboards and HTML exports"""
+        filters = self._filters(data_type, dataset_id, query)
+        metrics = ['Amount (GHS)'] + list(DASHBOARDS[data_type]['volumes'])
+        years = sorted({filters.year, filters.baseline})
+        months = compared_months(self.engine, data_type, dataset_id, filters)
+        comparison = build_year_pivot(self.engine.aggregate(
+            data_type, dataset_id, by=['Year', 'Month'], metrics=metrics, years=years, packages=filters.packages
+        ), metrics, years)
+        kpis = dashboard_kpis(data_type, comparison.totals(months), filters.year, filters.baseline)
+        for kpi in kpis:
+            if kpi['metric'] in ('Amount (GHS)', 'Average Value'):
+                kpi['value'], kpi['baseline'] = to_major(kpi['value']), to_major(kpi['baseline'])
+            kpi.update({key: _number(kpi[key]) for key in ('value', 'baseline', 'change')})
+        return {'year': filters.year, 'baseline_year': filters.baseline, 'months': months,
+                'packages': filters.packages, 'kpis': kpis}
+
+    def trends(self, data_type: str, dataset_id: str, query: Dict[str, List[str]]) -> Dict:
+        """Monthly totals of every metric over the requested years (all by default)"""
+        try:
+            years = [int(year) for year in query['year']] if 'year' in query else None
+        except ValueError:
+            raise ApiError(400, "year must be an integer")
+        metrics = ['Amount (GHS)'] + list(DASHBOARDS[data_type]['volumes'])
+        monthly = self.engine.aggregate(data_type, dataset_id, by=['Year', 'Month'], metrics=metrics,
+                                        years=years, months=query.get('month'), packages=query.get('package'))
+        return {'years': years, 'months': query.get('month'), 'packages': query.get('package'),
+                'rows': _records(monthly)}
+
+    def packages(self, data_type: str, dataset_id: str, query: Dict[str, List[str]]) -> Dict:
+        """Per-package totals in the year and the baseline, with changes and revenue share"""
+        filters = self._filters(data_type, dataset_id, query)
+        metrics = ['Amount (GHS)'] + list(DASHBOARDS[data_type]['volumes'])
+        months = compared_months(self.engine, data_type, dataset_id, filters)
+        totals = self.engine.aggregate(
+            data_type, dataset_id, by=['Year', 'Subscription Package'], metrics=metrics,
+            years=sorted({filters.year, filters.baseline}), months=months, packages=filters.packages
+        )
+        current = totals[totals['Year'] == filters.year].drop(columns='Year')
+        previous = totals[totals['Year'] == filters.baseline].drop(columns='Year')
+        breakdown = current.merge(previous, on='Subscription Package', how='outer', suffixes=('', ' Baseline'))
+        breakdown = breakdown.fillna(0).astype({col: np.int64 for col in breakdown.columns[1:]})
+        for metric in metrics:
+            change = safe_ratio(breakdown[metric] - breakdown[f'{metric} Baseline'], breakdown[f'{metric} Baseline'])
+            breakdown[f'{metric} Change %'] = np.nan_to_num(change * 100)
+        breakdown['Revenue Share %'] = np.nan_to_num(safe_ratio(breakdown['Amount (GHS)'],
+                                                                breakdown['Amount (GHS)'].sum()) * 100)
+        breakdown = breakdown.sort_values('Amount (GHS)', ascending=False, ignore_index=True)
+        return {'year': filters.year, 'baseline_year': filters.baseline, 'months': months,
+                'packages': filters.packages,
+                'rows': _records(breakdown, ['Amount (GHS)', 'Amount (GHS) Baseline'])}
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """Keep-alive HTTP/1.1 front end of a DashboardApi"""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body leave in one buffered write, without Nagle delays
+    wbufsize = -1
+    disable_nagle_algorithm = True
+    api: DashboardApi = None
+    quiet = True
+
+    def do_GET(self):
+        status, headers, body = self.api.get(self.path, self.headers.get('If-None-Match'))
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.send_error(405)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(host: str = '127.0.0.1', port: int = 8502, api: Optional[DashboardApi] = None,
+                quiet: bool = True) -> ThreadingHTTPServer:
+    """Threaded server bound to host:port (port 0 picks a free one)"""
+    handler = type('Handler', (ApiHandler,), {'api': api or DashboardApi(), 'quiet': quiet})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1', help='interface to bind (default: localhost only)')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, quiet=not args.verbose)
+    print(f"Serving {DatasetStore().root} on http://{args.host}:{server.server_address[1]}/api/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
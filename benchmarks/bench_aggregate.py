@@ -0,0 +1,97 @@
+"""Benchmark the bincount aggregation kernel against pandas groupby
+
+Run from the repository root:
+
+    python benchmarks/bench_aggregate.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kernels import group_sums  # noqa: E402
+from utils import MONTH_ORDER  # noqa: E402
+
+METRICS = ['Amount (GHS)', 'Number of Subscriptions']
+KEYS = ['Year', 'Month', 'Subscription Package']
+
+
+def make_frame(rows, packages, seed=0):
+    """Synthetic upload with the object-dtype keys pd.read_csv produces"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Year': rng.integers(2015, 2025, rows),
+        'Month': np.array(MONTH_ORDER, dtype=object)[rng.integers(0, 12, rows)],
+        'Subscription Package': np.array([f'Package {i}' for i in range(packages)],
+                                         dtype=object)[rng.integers(0, packages, rows)],
+        'Number of Subscriptions': rng.integers(1, 200, rows),
+        'Amount (GHS)': rng.uniform(10, 5000, rows).round(2)
+    })
+
+
+def groupby_sums(df):
+    """What the pages did before: generic groupby on object keys"""
+    return df.groupby(KEYS, as_index=False)[METRICS].sum()
+
+
+def kernel_sums(df, codes):
+    year_codes, month_codes, package_codes, sizes = codes
+    return group_sums(
+        [year_codes, month_codes, package_codes], sizes,
+        {col: df[col].to_numpy() for col in METRICS}
+    )
+
+
+def encode(df):
+    """One-off coding done at ingestion (normalized categoricals)"""
+    year = df['Year'].to_numpy()
+    month = pd.Categorical(df['Month'], categories=MONTH_ORDER)
+    package = pd.Categorical(df['Subscription Package'])
+    first_year = year.min()
+    sizes = [int(year.max() - first_year + 1), len(MONTH_ORDER), len(package.categories)]
+    return year - first_year, month.codes, package.codes, sizes
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--packages', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows, args.packages)
+    codes = encode(df)
+
+    groupby_time, expected = best_of(lambda: groupby_sums(df), args.repeat)
+    kernel_time, (_, sums) = best_of(lambda: kernel_sums(df, codes), args.repeat)
+
+    # Both paths must agree before the timings mean anything; kernel groups
+    # come back in (Year, month ordinal, package) order
+    expected['Month'] = pd.Categorical(expected['Month'], categories=MONTH_ORDER)
+    expected = expected.sort_values(KEYS)
+    np.testing.assert_allclose(sums['Amount (GHS)'], expected['Amount (GHS)'].to_numpy())
+    np.testing.assert_array_equal(sums['Number of Subscriptions'],
+                                  expected['Number of Subscriptions'].to_numpy())
+
+    print(f"rows={args.rows:,} packages={args.packages} groups={len(expected):,}")
+    print(f"pandas groupby (object keys): {groupby_time * 1000:8.1f} ms")
+    print(f"bincount kernel:              {kernel_time * 1000:8.1f} ms "
+          f"({groupby_time / kernel_time:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""Check and load-test the JSON API with a stand-in for its client tools
+
+Ingests a synthetic Solo upload into a temporary store, starts `api.py` on
+it in a separate process (one core) and plays the part of the CRM and the
+digest script: every endpoint's figures are checked against the engine,
+revalidation must come back as an empty 304, and cold, cached and
+revalidated request rates are measured. Run from the repository root:
+
+    python benchmarks/bench_api.py --rows 200000 --requests 2000
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_aggregate import make_frame  # noqa: E402
+from engines import create_engine  # noqa: E402
+from export import ExportFilters, compared_months, dashboard_kpis  # noqa: E402
+from ingest import read_upload  # noqa: E402
+from money import to_major  # noqa: E402
+from store import DatasetStore  # noqa: E402
+from timeseries import build_year_pivot  # noqa: E402
+from utils import MONTH_ORDER  # noqa: E402
+
+
+class StandInClient:
+    """Keep-alive JSON client that revalidates what it has already fetched
+
+    Like a well-behaved integration, it remembers the ETag and body of each
+    path and sends If-None-Match, so unchanged figures come back as 304s.
+    """
+
+    def __init__(self, host: str, port: int):
+        self.connection = http.client.HTTPConnection(host, port)
+        self.cache = {}
+        self.statuses = []
+
+    def get(self, path: str, revalidate: bool = True):
+        headers = {}
+        if revalidate and path in self.cache:
+            headers['If-None-Match'] = self.cache[path][0]
+        self.connection.request('GET', path, headers=headers)
+        response = self.connection.getresponse()
+        body = response.read()
+        self.statuses.append(response.status)
+        if response.status == 304:
+            assert not body, "304 responses carry no body"
+            return self.cache[path][1]
+        assert response.status == 200, f"{path}: {response.status} {body[:200]!r}"
+        payload = json.loads(body)
+        self.cache[path] = (response.getheader('ETag'), payload)
+        return payload
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def check(client: StandInClient, store: DatasetStore, dataset_id: str):
+    """Compare every endpoint with figures computed straight from the engine"""
+    engine = create_engine('pandas', store, store.read, MONTH_ORDER)
+    metrics = ['Amount (GHS)', 'Number of Subscriptions']
+
+    versions = client.get('/api/solo/datasets')
+    assert versions[0]['dataset_id'] == dataset_id
+
+    filters = ExportFilters(2023, 2021, ['January', 'February', 'March'], ['Package 1', 'Package 3'])
+    query = 'year=2023&baseline_year=2021&month=January&month=February&month=March&package=Package+1&package=Package+3'
+    kpis = client.get(f'/api/solo/kpis?{query}')
+    comparison = build_year_pivot(engine.aggregate('solo', dataset_id, by=['Year', 'Month'], metrics=metrics,
+                                                   years=[2021, 2023], packages=filters.packages), metrics, [2021, 2023])
+    expected = dashboard_kpis('solo', comparison.totals(compared_months(engine, 'solo', dataset_id, filters)),
+                              2023, 2021)
+    for served, computed in zip(kpis['kpis'], expected):
+        value = to_major(computed['value']) if computed['metric'] != 'Number of Subscriptions' else computed['value']
+        assert served['label'] == computed['label'] and np.isclose(served['value'], value), (served, computed)
+
+    trends = client.get('/api/solo/trends?year=2023&package=Package+1&package=Package+3')
+    revenue = sum(row['Amount (GHS)'] for row in trends['rows'] if row['Month'] in filters.months)
+    assert np.isclose(revenue, kpis['kpis'][0]['value']), (revenue, kpis['kpis'][0])
+
+    packages = client.get(f'/api/solo/packages?{query}')
+    assert [row['Subscription Package'] for row in packages['rows']] == ['Package 1', 'Package 3'] or \
+        [row['Subscription Package'] for row in packages['rows']] == ['Package 3', 'Package 1']
+    assert np.isclose(sum(row['Amount (GHS)'] for row in packages['rows']), kpis['kpis'][0]['value'])
+
+    # Same request again: an empty 304 and the remembered figures
+    before = len(client.statuses)
+    assert client.get(f'/api/solo/kpis?{query}') == kpis and client.statuses[before:] == [304]
+
+
+def rate(client: StandInClient, paths, revalidate: bool):
+    start = time.perf_counter()
+    for path in paths:
+        client.get(path, revalidate=revalidate)
+    return len(paths) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--packages', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        store = DatasetStore(root)
+        raw = make_frame(args.rows, args.packages).to_csv(index=False).encode()
+        dataset_id = DatasetStore.dataset_id(raw)
+        result = read_upload(raw, 'synthetic.csv', 'solo')
+        store.write(result.table, 'solo', dataset_id, name='synthetic.csv')
+
+        port = free_port()
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'api.py'), '--port', str(port)],
+                                  env={**os.environ, 'DENNISLAW_DATA_DIR': root, 'DENNISLAW_ENGINE': 'pandas'},
+                                  stdout=subprocess.PIPE, text=True)
+        try:
+            server.stdout.readline()  # "Serving ..." once the socket is bound
+            client = StandInClient('127.0.0.1', port)
+            check(client, store, dataset_id)
+            print(f"rows={args.rows:,} packages={args.packages}: all endpoints match the engine")
+
+            # Distinct filter sets so every first request is computed
+            paths = [f'/api/solo/{endpoint}?year={year}&month={month}'
+                     for endpoint in ('kpis', 'packages', 'trends')
+                     for year in range(2016, 2025) for month in MONTH_ORDER]
+            cold = rate(client, paths, revalidate=False)
+            repeated = (paths * (args.requests // len(paths) + 1))[:args.requests]
+            cached = rate(client, repeated, revalidate=False)
+            revalidated = rate(client, repeated, revalidate=True)
+            print(f"computed:    {cold:8,.0f} req/s ({len(paths)} distinct requests)")
+            print(f"cached 200:  {cached:8,.0f} req/s")
+            print(f"304:         {revalidated:8,.0f} req/s")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
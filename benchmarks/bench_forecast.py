@@ -0,0 +1,58 @@
+"""Benchmark the batched per-package forecast fit
+
+Run from the repository root:
+
+    python benchmarks/bench_forecast.py --packages 200 --years 10
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forecast import fit_panel  # noqa: E402
+from timeseries import MonthlyPanel  # noqa: E402
+
+
+def make_panel(packages, years, seed=0):
+    """Seasonal, trending monthly revenue (in pesewas) for every package"""
+    rng = np.random.default_rng(seed)
+    months = np.arange(years * 12)
+    shape = 1000 + 5 * months + 300 * np.sin(months * 2 * np.pi / 12)
+    scale = rng.uniform(0.5, 2.0, (packages, 1))
+    noise = rng.normal(0, 50, (packages, len(months)))
+    revenue = np.rint((shape * scale + noise) * 100).astype(np.int64)
+    subscriptions = rng.integers(1, 200, (packages, len(months)))
+    return MonthlyPanel(
+        periods=np.arange(2015 * 12, 2015 * 12 + len(months)),
+        packages=np.array([f'Package {i}' for i in range(packages)]),
+        values={'Amount (GHS)': revenue, 'Number of Subscriptions': subscriptions}
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--packages', type=int, default=200)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    panel = make_panel(args.packages, args.years)
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        forecast = fit_panel(panel)
+        timings.append(time.perf_counter() - start)
+
+    mean, lower, upper = forecast.select('Amount (GHS)')
+    print(f"packages={args.packages} months={len(panel.periods)} metrics={len(panel.values)}")
+    print(f"batched fit: {min(timings) * 1000:8.1f} ms")
+    print(f"next quarter (all packages): {mean.sum() / 100:,.0f} GHS "
+          f"[{lower.sum() / 100:,.0f} – {upper.sum() / 100:,.0f}]")
+
+
+if __name__ == '__main__':
+    main()
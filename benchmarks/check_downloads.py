@@ -0,0 +1,48 @@
+"""Check that every download format goes through Streamlit's download path
+
+Calls each `lazy_export` callable the way st.download_button does when the
+button is clicked (Streamlit's own data conversion), reads the file back
+and compares it with the exported frame. Run from the repository root:
+
+    python benchmarks/check_downloads.py --rows 100000
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_aggregate import make_frame  # noqa: E402
+from downloads import FORMATS, lazy_export  # noqa: E402
+
+READERS = {
+    'CSV': lambda data: pd.read_csv(io.BytesIO(data)),
+    'Parquet': lambda data: pd.read_parquet(io.BytesIO(data)),
+    'Excel': lambda data: pd.read_excel(io.BytesIO(data)),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    args = parser.parse_args()
+
+    frame = make_frame(args.rows, 20)
+    for fmt in FORMATS:
+        start = time.perf_counter()
+        data, _ = convert_data_to_bytes_and_infer_mime(
+            lazy_export(lambda: frame, fmt)(), unsupported_error=TypeError(f"{fmt}: unsupported download type")
+        )
+        seconds = time.perf_counter() - start
+        assert_frame_equal(READERS[fmt](data), frame, check_dtype=False)
+        print(f"{fmt:8} {len(data) / 1e6:8.1f} MB  {seconds:.2f}s  matches the frame")
+
+
+if __name__ == '__main__':
+    main()
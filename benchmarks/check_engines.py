@@ -0,0 +1,97 @@
+"""Check that every query engine returns the same aggregates
+
+Ingests synthetic Solo and Firm uploads into a temporary store and compares
+each installed engine's `aggregate` with the pandas engine's over a grid of
+`by` columns and year/month/package filters, with `assert_frame_equal`.
+Engines whose optional package is not installed are skipped. Run from the
+repository root:
+
+    python benchmarks/check_engines.py --rows 50000
+"""
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+
+import numpy as np
+from pandas.testing import assert_frame_equal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_aggregate import make_frame  # noqa: E402
+from engines import create_engine, duckdb, pl  # noqa: E402
+from ingest import read_upload  # noqa: E402
+from schema import MONTH_ORDER  # noqa: E402
+from store import DatasetStore  # noqa: E402
+
+# Metrics of each data type, as the pages aggregate them
+METRICS = {
+    'solo': ['Amount (GHS)', 'Number of Subscriptions'],
+    'firm': ['Amount (GHS)', 'Number of Firms', 'Number of Users']
+}
+
+BY = [[], ['Year'], ['Month'], ['Subscription Package'], ['Year', 'Month'],
+      ['Year', 'Subscription Package'], ['Year', 'Month', 'Subscription Package']]
+
+
+def make_upload(data_type: str, rows: int, packages: int) -> bytes:
+    df = make_frame(rows, packages)
+    if data_type == 'firm':
+        rng = np.random.default_rng(1)
+        firms = df.pop('Number of Subscriptions')
+        df['Number of Firms'] = firms
+        df['Number of Users'] = firms * rng.integers(1, 20, rows)
+    return df.to_csv(index=False).encode()
+
+
+def filter_grid(packages: int):
+    """Year, month and package filters: none, one value, several and a value that matches nothing"""
+    years = [None, [2020], [2016, 2019, 2024], [1999]]
+    months = [None, ['March'], ['January', 'June', 'December']]
+    package_names = [None, ['Package 0'], [f'Package {i}' for i in range(0, packages, 3)], ['No Such Package']]
+    return list(itertools.product(years, months, package_names))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--packages', type=int, default=12)
+    args = parser.parse_args()
+
+    installed = {'polars': pl is not None, 'duckdb': duckdb is not None}
+    others = [name for name, available in installed.items() if available]
+    for name, available in installed.items():
+        if not available:
+            print(f"{name}: not installed, skipped")
+    if not others:
+        return
+
+    with tempfile.TemporaryDirectory() as root:
+        store = DatasetStore(root)
+        engines = {name: create_engine(name, store, store.read, MONTH_ORDER) for name in ['pandas'] + others}
+        checked = 0
+        for data_type, metrics in METRICS.items():
+            raw = make_upload(data_type, args.rows, args.packages)
+            dataset_id = DatasetStore.dataset_id(raw)
+            store.write(read_upload(raw, f'{data_type}.csv', data_type).table, data_type, dataset_id,
+                        name=f'{data_type}.csv')
+            for engine in engines.values():
+                engine.ingest(data_type, dataset_id)
+
+            for by, (years, months, packages) in itertools.product(BY, filter_grid(args.packages)):
+                call = dict(by=by, metrics=metrics, years=years, months=months, packages=packages)
+                expected = engines['pandas'].aggregate(data_type, dataset_id, **call)
+                for name in others:
+                    result = engines[name].aggregate(data_type, dataset_id, **call)
+                    try:
+                        assert_frame_equal(result, expected)
+                    except AssertionError as e:
+                        raise AssertionError(f"{name} differs from pandas for {data_type} {call}") from e
+                    checked += 1
+
+    print(f"{', '.join(others)}: {checked} aggregates identical to the pandas engine")
+
+
+if __name__ == '__main__':
+    main()
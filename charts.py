@@ -0,0 +1,193 @@
+from typing import Optional
+
+import altair as alt
+import pandas as pd
+
+# Colours shared with the page charts
+MUTED = '#94a3b8'
+ACCENT = '#22c55e'
+DARK_ACCENT = '#15803d'
+
+# Colours for compared years other than the selected and baseline years
+YEAR_PALETTE = ['#3b82f6', '#f59e0b', '#a855f7', '#ef4444', '#14b8a6', '#ec4899', '#64748b']
+
+
+def year_scale(years, selected_year: int, baseline_year: int, accent: str = ACCENT) -> alt.Scale:
+    """Colour per compared year: selected year in the accent, baseline grey"""
+    palette = [colour for colour in YEAR_PALETTE if colour != accent]
+    others = iter(palette * (len(years) // len(palette) + 1))
+    colours = [accent if year == selected_year else MUTED if year == baseline_year else next(others)
+               for year in years]
+    return alt.Scale(domain=[str(year) for year in years], range=colours)
+
+
+def multi_year_trend(frame: pd.DataFrame, title: str, window: int,
+                     value_format: str = ',.0f', forecast: Optional[pd.DataFrame] = None) -> alt.Chart:
+    """Monthly values over every year with a trailing rolling sum
+
+    `frame` is a timeseries.series_frame; the rolling sum has its own axis
+    since it runs `window` times higher than a single month. A
+    forecast.Forecast frame adds the projected months as a dashed line in
+    a shaded band on the monthly axis.
+    """
+    rolling = f'Rolling {window}M'
+    base = alt.Chart(frame).encode(
+        x=alt.X('Date:T', title=None, axis=alt.Axis(format='%b %Y', labelAngle=-45))
+    )
+    tooltip = [
+        alt.Tooltip('Date:T', format='%B %Y', title='Month'),
+        alt.Tooltip('Value:Q', format=value_format, title=title),
+        alt.Tooltip(f'{rolling}:Q', format=value_format, title=f'{window}-month total'),
+        alt.Tooltip('MoM %:Q', format='+.1f', title='MoM (%)'),
+        alt.Tooltip('YoY %:Q', format='+.1f', title='YoY (%)'),
+        alt.Tooltip('YTD:Q', format=value_format, title='Year to date')
+    ]
+
+    monthly = base.mark_bar(opacity=0.5, color=MUTED).encode(
+        y=alt.Y('Value:Q', title=title, axis=alt.Axis(format=value_format)),
+        tooltip=tooltip
+    )
+    trailing = base.mark_line(color=ACCENT, strokeWidth=3).encode(
+        y=alt.Y(f'{rolling}:Q', title=f'{window}-month total', axis=alt.Axis(format=value_format)),
+        tooltip=tooltip
+    )
+
+    if forecast is not None and not forecast.empty:
+        projected = alt.Chart(forecast).encode(x=alt.X('Date:T'))
+        forecast_tooltip = [
+            alt.Tooltip('Date:T', format='%B %Y', title='Month'),
+            alt.Tooltip('Forecast:Q', format=value_format, title=f'Forecast {title}'),
+            alt.Tooltip('Lower:Q', format=value_format, title='Low'),
+            alt.Tooltip('Upper:Q', format=value_format, title='High')
+        ]
+        band = projected.mark_area(opacity=0.25, color=DARK_ACCENT).encode(
+            y='Lower:Q', y2='Upper:Q', tooltip=forecast_tooltip
+        )
+        line = projected.mark_line(color=DARK_ACCENT, strokeDash=[6, 4], point=True).encode(
+            y='Forecast:Q', tooltip=forecast_tooltip
+        )
+        # The band shares the monthly axis; only the rolling total is independent
+        monthly = alt.layer(monthly, band, line)
+
+    return alt.layer(monthly, trailing).resolve_scale(y='independent').properties(height=300)
+
+
+def growth_trend(frame: pd.DataFrame) -> alt.Chart:
+    """Month-over-month and year-over-year growth of a series_frame"""
+    return alt.Chart(frame).transform_fold(
+        ['MoM %', 'YoY %'], as_=['Measure', 'Growth']
+    ).mark_line(point=True).encode(
+        x=alt.X('Date:T', title=None, axis=alt.Axis(format='%b %Y', labelAngle=-45)),
+        y=alt.Y('Growth:Q', title='Growth (%)', axis=alt.Axis(format='+.0f')),
+        color=alt.Color('Measure:N', scale=alt.Scale(domain=['MoM %', 'YoY %'], range=[MUTED, DARK_ACCENT]),
+                        legend=alt.Legend(title=None, orient='top')),
+        tooltip=[
+            alt.Tooltip('Date:T', format='%B %Y', title='Month'),
+            alt.Tooltip('Measure:N'),
+            alt.Tooltip('Growth:Q', format='+.1f', title='Growth (%)')
+        ]
+    ).properties(height=220)
+
+
+def seasonality_heatmap(frame: pd.DataFrame) -> alt.Chart:
+    """Package × Month heatmap of timeseries.seasonal_shares, one panel per metric
+
+    Metric values are used as panel titles, so label them before charting.
+    """
+    packages = list(dict.fromkeys(frame['Subscription Package']))
+    metrics = list(dict.fromkeys(frame['Metric']))
+    chart = alt.Chart(frame).mark_rect().encode(
+        x=alt.X('Month:O', sort=list(frame['Month'].cat.categories), title=None,
+                axis=alt.Axis(labelAngle=-45, labelExpr='slice(datum.label, 0, 3)')),
+        y=alt.Y('Subscription Package:N', sort=packages, title=None),
+        color=alt.Color('Share:Q', scale=alt.Scale(scheme='greens'),
+                        legend=alt.Legend(format='.0%', title='Share of year')),
+        tooltip=[
+            alt.Tooltip('Subscription Package:N', title='Package'),
+            alt.Tooltip('Month:O'),
+            alt.Tooltip('Share:Q', format='.1%', title='Average share of year')
+        ]
+    ).properties(height=max(120, 24 * len(packages)))
+    if len(metrics) > 1:
+        return chart.facet(column=alt.Column('Metric:N', title=None, sort=metrics))
+    return chart
+
+
+def waterfall(steps: pd.DataFrame, value_format: str = ',.0f', title: str = 'Revenue') -> alt.Chart:
+    """Bridge from a starting total through signed steps to an ending total
+
+    `steps` holds (Step, Amount) rows: the first and last are totals, the
+    rows between are changes stacked from the first total.
+    """
+    amounts = steps['Amount'].to_numpy(dtype=float)
+    ends = amounts.cumsum()
+    ends[-1] = amounts[-1]
+    starts = ends - amounts
+    starts[-1] = 0
+    bars = steps.assign(
+        Start=starts,
+        End=ends,
+        Kind=['Total'] + ['Increase' if a >= 0 else 'Decrease' for a in amounts[1:-1]] + ['Total']
+    )
+    return alt.Chart(bars).mark_bar(size=36).encode(
+        x=alt.X('Step:N', sort=list(steps['Step']), title=None, axis=alt.Axis(labelAngle=0, labelLimit=120)),
+        y=alt.Y('Start:Q', title=title, axis=alt.Axis(format=value_format)),
+        y2='End:Q',
+        color=alt.Color('Kind:N', scale=alt.Scale(domain=['Total', 'Increase', 'Decrease'],
+                                                  range=[MUTED, ACCENT, '#ef4444']), legend=None),
+        tooltip=[
+            alt.Tooltip('Step:N'),
+            alt.Tooltip('Amount:Q', format=value_format, title=title),
+            alt.Tooltip('End:Q', format=value_format, title='Running total')
+        ]
+    ).properties(height=320)
+
+
+def cross_filter(frame: pd.DataFrame, value: str, value_title: str, count: str, count_title: str,
+                 value_format: str = ',.0f') -> alt.VConcatChart:
+    """Linked monthly trends and package totals that filter each other in the browser
+
+    `frame` holds one row per (Date, Subscription Package) with the `value`
+    and `count` sums; it is embedded once and every view aggregates it
+    client-side. Brushing months on the revenue trend filters the package
+    bars, and clicking packages (shift-click for several) filters both
+    trends, with no rerun of the script.
+    """
+    months = alt.selection_interval(encodings=['x'], name='months')
+    packages = alt.selection_point(fields=['Subscription Package'], name='packages')
+    base = alt.Chart(frame)
+    x = alt.X('Date:T', title=None, axis=alt.Axis(format='%b', tickCount='month'))
+
+    trend = base.transform_filter(packages).mark_area(
+        color=ACCENT, opacity=0.6, line={'color': DARK_ACCENT}, point={'color': DARK_ACCENT}
+    ).encode(
+        x=x,
+        y=alt.Y(f'sum({value}):Q', title=value_title, axis=alt.Axis(format=value_format)),
+        tooltip=[
+            alt.Tooltip('Date:T', format='%B %Y', title='Month'),
+            alt.Tooltip(f'sum({value}):Q', format=value_format, title=value_title)
+        ]
+    ).add_params(months).properties(width=420, height=220, title='Drag to select months')
+
+    counts = base.transform_filter(packages).mark_line(point=True, color=MUTED).encode(
+        x=x,
+        y=alt.Y(f'sum({count}):Q', title=count_title, axis=alt.Axis(format=',.0f')),
+        tooltip=[
+            alt.Tooltip('Date:T', format='%B %Y', title='Month'),
+            alt.Tooltip(f'sum({count}):Q', format=',.0f', title=count_title)
+        ]
+    ).properties(width=420, height=220)
+
+    by_package = base.transform_filter(months).mark_bar().encode(
+        y=alt.Y('Subscription Package:N', title=None, sort='-x'),
+        x=alt.X(f'sum({value}):Q', title=value_title, axis=alt.Axis(format=value_format)),
+        color=alt.condition(packages, alt.value(ACCENT), alt.value(MUTED)),
+        tooltip=[
+            alt.Tooltip('Subscription Package:N', title='Package'),
+            alt.Tooltip(f'sum({value}):Q', format=value_format, title=value_title),
+            alt.Tooltip(f'sum({count}):Q', format=',.0f', title=count_title)
+        ]
+    ).add_params(packages).properties(width=900, height=max(120, 28 * frame['Subscription Package'].nunique()),
+                                      title='Click packages (shift-click for several)')
+
+    return alt.vconcat(alt.hconcat(trend, counts), by_package).resolve_scale(color='independent')
@@ -0,0 +1,85 @@
+from dataclasses import dataclass
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from kernels import safe_ratio
+
+# Effects in the order they are stacked on the waterfall
+EFFECTS = ['Price', 'Volume', 'Mix', 'New Packages', 'Discontinued Packages']
+
+
+@dataclass
+class RevenueBridge:
+    """Revenue change between two years split into price, volume and mix
+
+    For packages sold (volume > 0) in both years, with average price P,
+    volume Q, total volume Q̄ and volume share s:
+
+    - price:  Q1ᵢ · (P1ᵢ − P0ᵢ)
+    - volume: (Q̄1 − Q̄0) · s0ᵢ · P0ᵢ
+    - mix:    Q̄1 · (s1ᵢ − s0ᵢ) · P0ᵢ
+
+    which add up to each package's change R1ᵢ − R0ᵢ. The whole change of a
+    package sold in only one of the years is a new or discontinued effect.
+    Every effect is a per-package array; their sums bridge the two totals.
+    """
+    packages: np.ndarray
+    previous: np.ndarray
+    current: np.ndarray
+    effects: Dict[str, np.ndarray]
+
+    def totals(self) -> pd.DataFrame:
+        """(Step, Amount) rows from the previous total through every effect to the current one"""
+        return pd.DataFrame({
+            'Step': ['Previous'] + EFFECTS + ['Current'],
+            'Amount': [self.previous.sum()] + [self.effects[e].sum() for e in EFFECTS] + [self.current.sum()]
+        })
+
+    def frame(self) -> pd.DataFrame:
+        """Per-package revenue in both years and its effects, largest change first"""
+        frame = pd.DataFrame({
+            'Subscription Package': self.packages,
+            'Previous': self.previous,
+            'Current': self.current,
+            'Change': self.current - self.previous,
+            **self.effects
+        })
+        return frame.iloc[np.argsort(-np.abs(frame['Change'].to_numpy()), kind='stable')].reset_index(drop=True)
+
+
+def revenue_bridge(package_totals: pd.DataFrame, previous_year: int, current_year: int,
+                   revenue: str, volume: str) -> RevenueBridge:
+    """Decompose the change between two years of a (Year, Package) aggregate
+
+    Both years are scattered into (2, n_packages) arrays so every effect is
+    one array expression over all packages.
+    """
+    packages, rows = np.unique(package_totals['Subscription Package'].to_numpy(dtype=str), return_inverse=True)
+    years = package_totals['Year'].to_numpy()
+
+    def scatter(metric):
+        # Each year fills its own row, so comparing a year with itself bridges to zero
+        grid = np.zeros((2, len(packages)), dtype=package_totals[metric].dtype)
+        values = package_totals[metric].to_numpy()
+        for row, year in enumerate((previous_year, current_year)):
+            in_year = years == year
+            grid[row, rows[in_year]] = values[in_year]
+        return grid
+
+    (r0, r1), (q0, q1) = scatter(revenue), scatter(volume)
+    both = (q0 > 0) & (q1 > 0)
+    p0, p1 = safe_ratio(r0, q0), safe_ratio(r1, q1)
+    total0, total1 = q0[both].sum(), q1[both].sum()
+    s0, s1 = safe_ratio(q0, total0), safe_ratio(q1, total1)
+
+    change = (r1 - r0).astype(np.float64)
+    effects = {
+        'Price': np.where(both, q1 * (p1 - p0), 0.0),
+        'Volume': np.where(both, (total1 - total0) * s0 * p0, 0.0),
+        'Mix': np.where(both, total1 * (s1 - s0) * p0, 0.0),
+        'New Packages': np.where(~both & (q0 == 0), change, 0.0),
+        'Discontinued Packages': np.where(~both & (q0 > 0), change, 0.0)
+    }
+    return RevenueBridge(packages, r0, r1, effects)
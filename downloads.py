@@ -0,0 +1,86 @@
+import importlib.util
+import tempfile
+from typing import Callable, Dict, IO, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+# Rows serialized per chunk; big exports never hold one whole-file string
+CHUNK_ROWS = 65_536
+
+# Exports up to this size stay in memory, larger ones spill to a temp file
+SPOOL_BYTES = 32 * 1024 * 1024
+
+# Excel sheets stop at 1,048,576 rows, one of which is the header
+EXCEL_MAX_ROWS = 1_048_575
+
+# Download format -> (file extension, MIME type). Excel needs openpyxl.
+FORMATS: Dict[str, tuple] = {
+    'CSV': ('csv', 'text/csv'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+if importlib.util.find_spec('openpyxl'):
+    FORMATS['Excel'] = ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+
+
+def _write_csv(table: pa.Table, sink: IO[bytes]):
+    with pacsv.CSVWriter(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=CHUNK_ROWS):
+            writer.write_batch(batch)
+
+
+def _write_parquet(table: pa.Table, sink: IO[bytes]):
+    with pq.ParquetWriter(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=CHUNK_ROWS):
+            writer.write_batch(batch)
+
+
+def _write_excel(table: pa.Table, sink: IO[bytes]):
+    from openpyxl import Workbook
+
+    if table.num_rows > EXCEL_MAX_ROWS:
+        raise ValueError(f"Excel sheets hold at most {EXCEL_MAX_ROWS:,} rows; "
+                         f"this export has {table.num_rows:,}. Use CSV or Parquet.")
+    # Write-only workbooks stream rows to disk instead of building cell objects
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Data')
+    sheet.append(table.column_names)
+    for batch in table.to_batches(max_chunksize=CHUNK_ROWS):
+        for row in zip(*(column.to_pylist() for column in batch.columns)):
+            sheet.append(row)
+    workbook.save(sink)
+
+
+WRITERS: Dict[str, Callable[[pa.Table, IO[bytes]], None]] = {
+    'CSV': _write_csv,
+    'Parquet': _write_parquet,
+    'Excel': _write_excel,
+}
+
+
+def export_file(frame: pd.DataFrame, fmt: str) -> bytes:
+    """Serialize a frame chunk by chunk through a spooled file into bytes
+
+    Streamlit takes the download as bytes; large exports spill to disk while
+    they are written, so the finished file is the only full copy in memory.
+    """
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    if fmt != 'Parquet':
+        # Text and spreadsheet formats show months by name, not dictionary codes
+        table = pa.table({name: (column.cast(column.type.value_type)
+                                 if pa.types.is_dictionary(column.type) else column)
+                          for name, column in zip(table.column_names, table.columns)})
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES) as sink:
+        WRITERS[fmt](table, sink)
+        sink.seek(0)
+        return sink.read()
+
+
+def lazy_export(frame: Union[pd.DataFrame, Callable[[], pd.DataFrame]], fmt: str) -> Callable[[], bytes]:
+    """Zero-argument callable for st.download_button: nothing is serialized until clicked
+
+    `frame` may itself be a callable, so selecting the rows is deferred too.
+    """
+    return lambda: export_file(frame() if callable(frame) else frame, fmt)
@@ -0,0 +1,265 @@
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from kernels import group_sums
+from store import DatasetStore
+
+try:
+    import duckdb
+except ImportError:  # optional backend
+    duckdb = None
+
+try:
+    import polars as pl
+except ImportError:  # optional backend
+    pl = None
+
+# Query engine used by the analysis pages ('pandas', 'polars' or 'duckdb')
+ENGINE = os.environ.get('DENNISLAW_ENGINE', 'pandas')
+
+
+def _finish(result: pd.DataFrame, by: List[str], metrics: List[str],
+            month_order: Sequence[str]) -> pd.DataFrame:
+    """Give every engine's result the same column types and row order"""
+    result = result[by + metrics].copy()
+    if 'Year' in result.columns:
+        result['Year'] = result['Year'].astype('int32')
+    if 'Month' in result.columns:
+        result['Month'] = pd.Categorical(result['Month'].astype(str),
+                                         categories=month_order, ordered=True)
+    if 'Subscription Package' in result.columns:
+        result['Subscription Package'] = result['Subscription Package'].astype(str)
+    if by:
+        result = result.sort_values(by, ignore_index=True)
+    return result.reset_index(drop=True)
+
+
+class Engine(ABC):
+    """Interface every query engine implements
+
+    Engines return identical frames for identical calls: the `by` columns
+    followed by the summed `metrics`, sorted by `by` (Month in calendar
+    order). With no `by` columns a single row of grand totals is returned.
+    """
+
+    name = None
+
+    def __init__(self, month_order: Sequence[str]):
+        self.month_order = month_order
+
+    def ingest(self, data_type: str, dataset_id: str):
+        """Prepare a stored dataset for querying (no-op by default)"""
+
+    @abstractmethod
+    def aggregate(self, data_type: str, dataset_id: str, by: List[str],
+                  metrics: Optional[List[str]] = None, years=None, months=None,
+                  packages=None) -> pd.DataFrame:
+        """Sum `metrics` by `by` over rows matching the year/month/package filters"""
+
+
+class PandasEngine(Engine):
+    """Eager NumPy aggregation over the memory-mapped frame
+
+    Year, month and package are turned into one dense integer key and every
+    metric is summed with a single weighted bincount (see kernels.py).
+    """
+
+    name = 'pandas'
+
+    def __init__(self, loader: Callable[[str, str], pd.DataFrame], month_order: Sequence[str]):
+        super().__init__(month_order)
+        self.loader = loader
+
+    @staticmethod
+    def _key_codes(df: pd.DataFrame):
+        """Dense integer codes and the labels they index for each key column"""
+        year = df['Year'].to_numpy()
+        first_year = int(year.min()) if len(year) else 0
+        last_year = int(year.max()) if len(year) else 0
+        month = df['Month'].cat
+        package = df['Subscription Package'].cat
+        return {
+            'Year': (year - first_year, np.arange(first_year, last_year + 1)),
+            'Month': (month.codes.to_numpy(), month.categories),
+            'Subscription Package': (package.codes.to_numpy(), package.categories)
+        }
+
+    def aggregate(self, data_type: str, dataset_id: str, by: List[str],
+                  metrics: Optional[List[str]] = None, years=None, months=None,
+                  packages=None) -> pd.DataFrame:
+        metrics = list(metrics or [])
+        df = self.loader(data_type, dataset_id)
+        keys = self._key_codes(df)
+
+        # Filters are membership tests on the small integer codes
+        mask = np.ones(len(df), dtype=bool)
+        for values, column in ((years, 'Year'), (months, 'Month'),
+                               (packages, 'Subscription Package')):
+            if values is not None:
+                codes, labels = keys[column]
+                allowed = np.flatnonzero(pd.Index(labels).isin(list(values)))
+                mask &= np.isin(codes, allowed)
+
+        weights = {col: df[col].to_numpy() for col in metrics}
+        if not by:
+            return pd.DataFrame({col: [values[mask].sum()] for col, values in weights.items()})
+
+        # One weighted bincount per metric over the combined integer key
+        group_codes, sums = group_sums(
+            [keys[col][0] for col in by],
+            [len(keys[col][1]) for col in by],
+            weights,
+            mask
+        )
+        columns = {col: np.asarray(keys[col][1])[codes] for col, codes in zip(by, group_codes)}
+        result = pd.DataFrame({**columns, **sums})
+        return _finish(result, by, metrics, self.month_order)
+
+
+class PolarsEngine(Engine):
+    """Lazy, multithreaded Polars engine
+
+    Scans the memory-mapped Arrow file and builds one lazy plan per call, so
+    Polars fuses the filter, group-by and sums (with predicate and projection
+    push-down into the scan) and runs it across all cores.
+    """
+
+    name = 'polars'
+
+    def __init__(self, store: DatasetStore, month_order: Sequence[str]):
+        if pl is None:
+            raise ImportError("The polars engine requires the 'polars' package")
+        super().__init__(month_order)
+        self.store = store
+
+    def aggregate(self, data_type: str, dataset_id: str, by: List[str],
+                  metrics: Optional[List[str]] = None, years=None, months=None,
+                  packages=None) -> pd.DataFrame:
+        metrics = list(metrics or [])
+        plan = pl.scan_ipc(self.store.path(data_type, dataset_id))
+
+        for values, column in ((years, 'Year'), (months, 'Month'),
+                               (packages, 'Subscription Package')):
+            if values is None:
+                continue
+            if column == 'Year':
+                plan = plan.filter(pl.col(column).is_in([int(v) for v in values]))
+            else:
+                plan = plan.filter(pl.col(column).cast(pl.String).is_in([str(v) for v in values]))
+
+        sums = [pl.col(col).sum() for col in metrics]
+        if not by:
+            return plan.select(sums).collect().to_pandas()
+        result = plan.group_by(by).agg(sums).collect().to_pandas()
+        return _finish(result, by, metrics, self.month_order)
+
+
+class DuckDBEngine(Engine):
+    """Embedded DuckDB backend; filters and sums run inside the database
+
+    Each dataset is ingested once into its own DuckDB file next to the Arrow
+    file. Workers open it read-only, so any number of processes can query it
+    at the same time and only the aggregated rows come back to Python.
+    """
+
+    name = 'duckdb'
+    table = 'sales'
+
+    def __init__(self, store: DatasetStore, month_order: Sequence[str]):
+        if duckdb is None:
+            raise ImportError("The duckdb engine requires the 'duckdb' package")
+        super().__init__(month_order)
+        self.store = store
+        self._connections = {}
+
+    def path(self, data_type: str, dataset_id: str) -> str:
+        return self.store.path(data_type, dataset_id)[:-len('.arrow')] + '.duckdb'
+
+    def ingest(self, data_type: str, dataset_id: str):
+        """Load a stored dataset into its DuckDB table (once per dataset)"""
+        path = self.path(data_type, dataset_id)
+        if os.path.exists(path):
+            return
+
+        table = self.store.read_table(data_type, dataset_id)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        os.close(fd)
+        os.unlink(tmp_path)
+        try:
+            con = duckdb.connect(tmp_path)
+            con.register('source', table)
+            con.execute(f'CREATE TABLE {self.table} AS SELECT * FROM source')
+            con.close()
+            os.replace(tmp_path, path)
+        finally:
+            for leftover in (tmp_path, tmp_path + '.wal'):
+                if os.path.exists(leftover):
+                    os.unlink(leftover)
+
+    def _connect(self, data_type: str, dataset_id: str):
+        key = (data_type, dataset_id)
+        if key not in self._connections:
+            self.ingest(data_type, dataset_id)
+            con = duckdb.connect(self.path(data_type, dataset_id), read_only=True)
+            types = dict(con.execute(f'SELECT column_name, data_type FROM '
+                                     f"information_schema.columns WHERE table_name = '{self.table}'").fetchall())
+            self._connections[key] = (con, types)
+        con, types = self._connections[key]
+        # Cursors share the database but are safe to use from any script thread
+        return con.cursor(), types
+
+    def aggregate(self, data_type: str, dataset_id: str, by: List[str],
+                  metrics: Optional[List[str]] = None, years=None, months=None,
+                  packages=None) -> pd.DataFrame:
+        # Filters and sums are pushed into the SQL query
+        metrics = list(metrics or [])
+        where, params = [], []
+        for values, column in ((years, 'Year'), (months, 'Month'),
+                               (packages, 'Subscription Package')):
+            if values is None:
+                continue
+            values = [v.item() if hasattr(v, 'item') else v for v in values]
+            if not values:
+                where.append('FALSE')
+                continue
+            if column != 'Year':
+                values = [str(v) for v in values]
+                where.append(f'CAST("{column}" AS VARCHAR) IN ({", ".join("?" * len(values))})')
+            else:
+                where.append(f'"{column}" IN ({", ".join("?" * len(values))})')
+            params.extend(values)
+
+        cursor, types = self._connect(data_type, dataset_id)
+
+        # SUM widens integers to HUGEINT; keep counts as BIGINT like pandas
+        select = [f'"{col}"' for col in by]
+        select += [f'CAST(COALESCE(SUM("{col}"), 0) AS '
+                   f'{"BIGINT" if "INT" in types[col] else "DOUBLE"}) AS "{col}"'
+                   for col in metrics]
+        query = f'SELECT {", ".join(select)} FROM {self.table}'
+        if where:
+            query += ' WHERE ' + ' AND '.join(where)
+        if by:
+            query += ' GROUP BY ' + ', '.join(f'"{col}"' for col in by)
+
+        result = cursor.execute(query, params).df()
+        if not by:
+            return result[metrics]
+        return _finish(result, by, metrics, self.month_order)
+
+
+def create_engine(name: str, store: DatasetStore, loader: Callable[[str, str], pd.DataFrame],
+                  month_order: Sequence[str]) -> Engine:
+    """Build the configured query engine"""
+    if name == 'duckdb':
+        return DuckDBEngine(store, month_order)
+    if name == 'polars':
+        return PolarsEngine(store, month_order)
+    if name == 'pandas':
+        return PandasEngine(loader, month_order)
+    raise ValueError(f"Unknown engine: {name}")
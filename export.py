@@ -0,0 +1,344 @@
+"""Render the Solo or Firm dashboard into one self-contained HTML file
+
+The file embeds the pre-aggregated data, the Vega-Lite specs and the KPI
+cards, so it opens in any browser with the charts still interactive and
+no Streamlit session behind it. The Vega scripts are inlined only when
+vl-convert-python is installed; otherwise they load from a CDN and the
+export warns that the file needs internet access. Run from the repository
+root:
+
+    python export.py solo --year 2024 --year 2023 --out-dir exports
+    python export.py firm --dataset firm.csv --filters filters.json --jobs 4
+
+`--dataset` is a stored dataset id or a file to ingest (default: the newest
+stored dataset). `--filters` is a JSON list of filter sets such as
+{"year": 2024, "baseline_year": 2022, "months": ["January"], "packages": ["Basic"]};
+every filter set is rendered in parallel.
+"""
+import argparse
+import html
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+import altair as alt
+import pandas as pd
+
+from charts import cross_filter, multi_year_trend, waterfall, year_scale
+from decomposition import revenue_bridge
+from engines import ENGINE, Engine, create_engine
+from forecast import fit_panel
+from ingest import store_upload
+from kernels import safe_ratio
+from money import format_money, in_major
+from schema import MONTH_ORDER
+from store import DatasetStore
+from timeseries import SUM_COLUMNS, build_panel, build_year_pivot, series_frame
+
+try:
+    import vl_convert as vlc
+except ImportError:  # listed in requirements.txt; without it the Vega scripts come from the CDN
+    vlc = None
+
+# Vega-Lite runtime inlined into exports: the version Altair generates specs for
+VL_VERSION = 'v' + '.'.join(alt.SCHEMA_VERSION.lstrip('v').split('.')[:2])
+
+# Shown wherever dashboards are exported while the Vega scripts come from the CDN
+OFFLINE_WARNING = None if vlc is not None else (
+    "vl-convert-python is not installed, so exported dashboards load their charts from "
+    "cdn.jsdelivr.net and show no charts offline or where that site is blocked. "
+    "Install the requirements (`pip install -r requirements.txt`) to inline the scripts."
+)
+
+# What each dashboard reports: its volume metrics (KPI label per column),
+# the volume average value is measured against and the volume shown next
+# to revenue on the linked charts
+DASHBOARDS = {
+    'solo': {
+        'title': 'Solo Analysis',
+        'volumes': {'Number of Subscriptions': 'Subscriptions'},
+        'per': 'Number of Subscriptions',
+        'per_label': 'Average Value'
+    },
+    'firm': {
+        'title': 'Firm Analysis',
+        'volumes': {'Number of Firms': 'Total Firms', 'Number of Users': 'Total Users'},
+        'per': 'Number of Users',
+        'per_label': 'Revenue/User'
+    }
+}
+
+CSS = """
+    body { font-family: system-ui, -apple-system, 'Segoe UI', sans-serif; color: #0f172a;
+           background: #f8fafc; margin: 0; padding: 2rem; }
+    h1 { margin-bottom: 0.25rem; }
+    h3 { color: #334155; margin-top: 2rem; }
+    .subtitle { color: #64748b; margin-bottom: 1.5rem; }
+    .cards { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 1rem; }
+    .metric-card { background: white; padding: 20px; border-radius: 8px;
+                   box-shadow: 0 2px 4px rgba(0,0,0,0.1); text-align: center; }
+    .metric-label { font-size: 1rem; color: #64748b; margin-bottom: 8px; }
+    .metric-value { font-size: 1.5rem; font-weight: 600; margin-bottom: 8px; }
+    .metric-delta { font-size: 0.875rem; font-weight: 500; padding: 2px 6px; border-radius: 4px; }
+    .metric-delta.positive { color: #166534; background: #dcfce7; }
+    .metric-delta.negative { color: #991b1b; background: #fee2e2; }
+    .chart { background: white; padding: 1rem; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+             overflow-x: auto; }
+"""
+
+
+@dataclass
+class ExportFilters:
+    """One rendering of a dashboard: the year, what it is compared with and the filters
+
+    The baseline defaults to the previous year. Without a month filter both
+    years are compared over the months the selected year has data for.
+    """
+    year: int
+    baseline_year: Optional[int] = None
+    months: Optional[List[str]] = None
+    packages: Optional[List[str]] = None
+
+    @property
+    def baseline(self) -> int:
+        return self.year - 1 if self.baseline_year is None else self.baseline_year
+
+    def slug(self) -> str:
+        """File-name-safe summary of the filters"""
+        parts = [str(self.year), f"vs{self.baseline}"]
+        if self.months:
+            parts.append('-'.join(month[:3] for month in self.months))
+        if self.packages:
+            parts.append('-'.join(self.packages))
+        return re.sub(r'[^A-Za-z0-9_.-]+', '_', '_'.join(parts))
+
+
+def _scripts() -> str:
+    """Vega, Vega-Lite and vega-embed: inlined when vl-convert is installed, else from the CDN"""
+    if vlc is not None:
+        return f'<script type="text/javascript">{vlc.javascript_bundle(vl_version=VL_VERSION)}</script>'
+    return '\n'.join(
+        f'<script src="https://cdn.jsdelivr.net/npm/{package}@{version}"></script>'
+        for package, version in [('vega', alt.VEGA_VERSION), ('vega-lite', alt.VEGALITE_VERSION),
+                                 ('vega-embed', alt.VEGAEMBED_VERSION)]
+    )
+
+
+def _card(label: str, value: str, change: Optional[float] = None) -> str:
+    delta = '' if change is None else (
+        f'<div class="metric-delta {"positive" if change > 0 else "negative"}">{change:+.1f}%</div>'
+    )
+    return (f'<div class="metric-card"><div class="metric-label">{html.escape(label)}</div>'
+            f'<div class="metric-value">{html.escape(value)}</div>{delta}</div>')
+
+
+def _growth(current, previous) -> float:
+    """Change (%) against the previous value, 0 when there is nothing to compare with"""
+    growth = float(safe_ratio(current - previous, previous) * 100)
+    return growth if growth == growth else 0
+
+
+def compared_months(engine: Engine, data_type: str, dataset_id: str, filters: ExportFilters) -> List[str]:
+    """Like-for-like months: the selected year's months unless a filter is given"""
+    return filters.months or list(engine.aggregate(
+        data_type, dataset_id, by=['Month'], years=[filters.year], packages=filters.packages
+    )['Month'].astype(str))
+
+
+def dashboard_kpis(data_type: str, totals: pd.DataFrame, year: int, baseline: int) -> List[Dict]:
+    """Headline figures of a dashboard from per-year totals (amounts in minor units)
+
+    Each entry has the KPI label, the column it measures ('Average Value'
+    for revenue per volume), its value in both years and the change (%).
+    """
+    dashboard = DASHBOARDS[data_type]
+    current, previous = totals.loc[year], totals.loc[baseline]
+    figures = [('Total Revenue', 'Amount (GHS)', current['Amount (GHS)'], previous['Amount (GHS)'])]
+    figures += [(label, metric, current[metric], previous[metric])
+                for metric, label in dashboard['volumes'].items()]
+    figures.append((dashboard['per_label'], 'Average Value',
+                    float(safe_ratio(current['Amount (GHS)'], current[dashboard['per']])),
+                    float(safe_ratio(previous['Amount (GHS)'], previous[dashboard['per']]))))
+    return [{'label': label, 'metric': metric, 'value': value, 'baseline': base, 'change': _growth(value, base)}
+            for label, metric, value, base in figures]
+
+
+def render_dashboard(engine: Engine, data_type: str, dataset_id: str, filters: ExportFilters,
+                     name: str = '') -> str:
+    """HTML page with the KPI cards and charts of one filter set"""
+    dashboard = DASHBOARDS[data_type]
+    volumes = list(dashboard['volumes'])
+    metrics = ['Amount (GHS)'] + volumes
+    year, baseline = filters.year, filters.baseline
+    years = sorted({year, baseline})
+    months = compared_months(engine, data_type, dataset_id, filters)
+
+    # KPI cards from one Year × Month pivot of both years
+    comparison = build_year_pivot(engine.aggregate(
+        data_type, dataset_id, by=['Year', 'Month'], metrics=metrics,
+        years=years, packages=filters.packages
+    ), metrics, years)
+    cards = [_card(kpi['label'],
+                   f"{kpi['value']:,}" if kpi['metric'] in volumes else format_money(kpi['value'], prefix='GH₵'),
+                   kpi['change'])
+             for kpi in dashboard_kpis(data_type, comparison.totals(months), year, baseline)]
+
+    charts = {}
+
+    # Linked views: one Month × Package aggregate, filtered in the browser
+    explorer = engine.aggregate(data_type, dataset_id, by=['Month', 'Subscription Package'],
+                                metrics=['Amount (GHS)', dashboard['per']], years=[year],
+                                months=months, packages=filters.packages)
+    explorer['Date'] = pd.to_datetime(pd.DataFrame({'year': year, 'month': explorer['Month'].cat.codes + 1,
+                                                    'day': 1}))
+    charts['Explore'] = cross_filter(in_major(explorer.drop(columns='Month')), 'Amount (GHS)', 'Revenue (GH₵)',
+                                     dashboard['per'], dashboard['volumes'][dashboard['per']])
+
+    # Monthly revenue of both years
+    monthly = in_major(comparison.frame())
+    monthly = monthly[monthly['Month'].isin(months)].assign(Year=lambda df: df['Year'].astype(str))
+    charts[f'Monthly Revenue: {year} vs {baseline}'] = alt.Chart(monthly).mark_line(point=True).encode(
+        x=alt.X('Month:N', sort=MONTH_ORDER, title=None),
+        y=alt.Y('Amount (GHS):Q', title='Revenue (GH₵)', axis=alt.Axis(format=',.0f')),
+        color=alt.Color('Year:N', scale=year_scale(years, year, baseline), legend=alt.Legend(orient='top')),
+        tooltip=[alt.Tooltip('Year:N'), alt.Tooltip('Month:N'),
+                 alt.Tooltip('Amount (GHS):Q', format=',.2f', title='Revenue (GH₵)')]
+    ).properties(width=900, height=300)
+
+    # Price, volume and mix effects of the change from the baseline year
+    bridge = revenue_bridge(engine.aggregate(
+        data_type, dataset_id, by=['Year', 'Subscription Package'], metrics=['Amount (GHS)', dashboard['per']],
+        years=years, months=months, packages=filters.packages
+    ), baseline, year, 'Amount (GHS)', dashboard['per'])
+    steps = bridge.totals().replace({'Step': {'Previous': str(baseline), 'Current': str(year)}})
+    charts['Revenue Change Drivers'] = waterfall(in_major(steps, ['Amount']), ',.0f', 'Revenue (GH₵)'
+                                                 ).properties(width=900)
+
+    # Whole timeline with the next-quarter forecast
+    panel = build_panel(engine.aggregate(data_type, dataset_id, by=['Year', 'Month', 'Subscription Package'],
+                                         metrics=['Amount (GHS)']), ['Amount (GHS)'])
+    series = in_major(series_frame(panel.periods, panel.select(filters.packages)['Amount (GHS)']), SUM_COLUMNS)
+    forecast = in_major(fit_panel(panel).frame('Amount (GHS)', filters.packages), ['Forecast', 'Lower', 'Upper'])
+    charts['Multi-Year Trend'] = multi_year_trend(series, 'Revenue (GH₵)', 12, forecast=forecast
+                                                  ).properties(width=900)
+
+    described = [f"{name or dataset_id}", f"compared with {baseline}"]
+    if filters.months:
+        described.append(', '.join(filters.months))
+    if filters.packages:
+        described.append(', '.join(filters.packages))
+    described.append(f"exported {datetime.now(timezone.utc):%Y-%m-%d %H:%M} UTC")
+
+    sections, embeds = [], []
+    for index, (title, chart) in enumerate(charts.items()):
+        sections.append(f'<h3>{html.escape(title)}</h3><div class="chart" id="chart{index}"></div>')
+        # Keep '</script>' inside the data from closing the script block
+        spec = json.dumps(chart.to_dict(), separators=(',', ':')).replace('</', '<\\/')
+        embeds.append(f'vegaEmbed("#chart{index}", {spec}, {{"actions": false}}).catch(console.error);')
+
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="UTF-8">
+<title>{html.escape(dashboard['title'])} ({year})</title>
+<style>{CSS}</style>
+{_scripts()}
+</head>
+<body>
+<h1>{html.escape(dashboard['title'])} ({year})</h1>
+<div class="subtitle">{html.escape(' · '.join(described))}</div>
+<div class="cards">{''.join(cards)}</div>
+{''.join(sections)}
+<script type="text/javascript">
+{chr(10).join(embeds)}
+</script>
+</body>
+</html>
+"""
+
+
+# One engine per worker process, built on first use
+_engine = None
+
+
+def _export_one(data_type: str, dataset_id: str, filters: ExportFilters, path: str, name: str) -> str:
+    global _engine
+    if _engine is None:
+        store = DatasetStore()
+        _engine = create_engine(ENGINE, store, store.read, MONTH_ORDER)
+    _engine.ingest(data_type, dataset_id)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(render_dashboard(_engine, data_type, dataset_id, filters, name))
+    return path
+
+
+def export_many(data_type: str, dataset_id: str, filter_sets: Sequence[ExportFilters],
+                out_dir: str, jobs: Optional[int] = None, name: str = '') -> List[str]:
+    """Render every filter set into `out_dir` in parallel worker processes"""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = [os.path.join(out_dir, f"{data_type}_{filters.slug()}.html") for filters in filter_sets]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(_export_one, [data_type] * len(paths), [dataset_id] * len(paths),
+                             filter_sets, paths, [name] * len(paths)))
+
+
+def resolve_dataset(store: DatasetStore, data_type: str, dataset: Optional[str]) -> Dict:
+    """Manifest of a stored dataset id, a file (ingested if new) or the newest dataset"""
+    if dataset and os.path.isfile(dataset):
+        with open(dataset, 'rb') as f:
+            raw = f.read()
+        return store.manifest(data_type, store_upload(store, raw, os.path.basename(dataset), data_type))
+    if dataset:
+        return store.manifest(data_type, dataset)
+    stored = store.list(data_type)
+    if not stored:
+        raise SystemExit(f"No stored {data_type} datasets; pass --dataset with a file to ingest")
+    return stored[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('data_type', choices=list(DASHBOARDS))
+    parser.add_argument('--dataset', help='stored dataset id or a file to ingest (default: newest stored)')
+    parser.add_argument('--year', type=int, action='append', default=[],
+                        help='year to export (repeat for several; default: the latest year)')
+    parser.add_argument('--baseline-year', type=int, help='year the deltas are measured from')
+    parser.add_argument('--month', action='append', dest='months', help='month filter (repeatable)')
+    parser.add_argument('--package', action='append', dest='packages', help='package filter (repeatable)')
+    parser.add_argument('--filters', help='JSON file with a list of filter sets')
+    parser.add_argument('--out-dir', default='exports')
+    parser.add_argument('--jobs', type=int, help='worker processes (default: one per CPU)')
+    args = parser.parse_args()
+
+    store = DatasetStore()
+    manifest = resolve_dataset(store, args.data_type, args.dataset)
+    dataset_id = manifest['dataset_id']
+
+    if args.filters:
+        with open(args.filters) as f:
+            filter_sets = [ExportFilters(**entry) for entry in json.load(f)]
+    else:
+        years = args.year
+        if not years:
+            engine = create_engine(ENGINE, store, store.read, MONTH_ORDER)
+            engine.ingest(args.data_type, dataset_id)
+            years = [int(engine.aggregate(args.data_type, dataset_id, by=['Year'])['Year'].max())]
+        filter_sets = [ExportFilters(year, args.baseline_year, args.months, args.packages) for year in years]
+
+    if OFFLINE_WARNING:
+        print(f"Warning: {OFFLINE_WARNING}", file=sys.stderr)
+    start = time.perf_counter()
+    paths = export_many(args.data_type, dataset_id, filter_sets, args.out_dir, args.jobs, manifest['name'])
+    for path, filters in zip(paths, filter_sets):
+        print(f"{path}  {json.dumps(asdict(filters))}")
+    print(f"{len(paths)} dashboard(s) in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from timeseries import MonthlyPanel
+
+# Months projected past the end of the data (one quarter)
+HORIZON = 3
+
+# Width of the forecast band in residual standard deviations (~95%)
+BAND_Z = 1.96
+
+# Months of history needed before month-of-year effects are fitted
+SEASONAL_MIN_PERIODS = 24
+
+
+def design_matrix(periods: np.ndarray, origin: int, seasonal: bool) -> np.ndarray:
+    """Intercept, linear trend from `origin` and (optionally) 11 month-of-year dummies"""
+    t = (periods - origin).astype(np.float64)
+    columns = [np.ones_like(t), t]
+    if seasonal:
+        month = periods % 12
+        columns += [(month == m).astype(np.float64) for m in range(1, 12)]
+    return np.column_stack(columns)
+
+
+@dataclass
+class Forecast:
+    """Linear trend plus month effects fitted to every package at once
+
+    Every package shares the same timeline and design matrix, so a single
+    least-squares solve fits them all. The model is linear in the data, so
+    the forecast and residuals of any sum of packages are the sums of
+    theirs. `hat` projects any series on the historical timeline onto the
+    fitted model, so refits of cleaned data are one matrix product.
+    """
+    packages: np.ndarray
+    periods: np.ndarray
+    mean: Dict[str, np.ndarray]
+    residuals: Dict[str, np.ndarray]
+    dof: int
+    hat: np.ndarray
+
+    def select(self, metric: str, packages: Optional[Sequence[str]] = None
+               ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Forecast and band edges for the sum of the chosen packages"""
+        rows = np.ones(len(self.packages), dtype=bool) if packages is None \
+            else np.isin(self.packages, list(packages))
+        mean = self.mean[metric][rows].sum(axis=0)
+        residuals = self.residuals[metric][rows].sum(axis=0)
+        sigma = np.sqrt((residuals ** 2).sum() / self.dof) if self.dof > 0 else 0.0
+        # Sales cannot go below zero, whatever the trend says
+        return np.maximum(mean, 0), np.maximum(mean - BAND_Z * sigma, 0), np.maximum(mean + BAND_Z * sigma, 0)
+
+    def frame(self, metric: str, packages: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Forecast months with their mean and band, ready for charting"""
+        mean, lower, upper = self.select(metric, packages)
+        return pd.DataFrame({
+            'Period': self.periods,
+            'Date': pd.to_datetime(pd.DataFrame({'year': self.periods // 12,
+                                                 'month': self.periods % 12 + 1, 'day': 1})),
+            'Forecast': mean,
+            'Lower': lower,
+            'Upper': upper
+        })
+
+
+def fit_panel(panel: MonthlyPanel, horizon: int = HORIZON) -> Forecast:
+    """Fit every package and metric of a panel in one batched solve per metric"""
+    n_periods = len(panel.periods)
+    future = (panel.periods[-1] + 1 + np.arange(horizon)) if n_periods else np.arange(horizon)
+
+    if n_periods < 2:
+        # Not enough history for a trend: carry the last month forward
+        mean = {metric: np.repeat(values[:, -1:] if n_periods else np.zeros((len(values), 1)),
+                                  horizon, axis=1).astype(np.float64)
+                for metric, values in panel.values.items()}
+        residuals = {metric: np.zeros(values.shape) for metric, values in panel.values.items()}
+        return Forecast(panel.packages, future, mean, residuals, 0, np.eye(n_periods))
+
+    seasonal = n_periods >= SEASONAL_MIN_PERIODS
+    history = design_matrix(panel.periods, panel.periods[0], seasonal)
+    ahead = design_matrix(future, panel.periods[0], seasonal)
+
+    mean, residuals = {}, {}
+    for metric, values in panel.values.items():
+        # One solve for every package: columns of Y are the packages' series
+        y = values.T.astype(np.float64)
+        coefficients, *_ = np.linalg.lstsq(history, y, rcond=None)
+        residuals[metric] = (y - history @ coefficients).T
+        mean[metric] = (ahead @ coefficients).T
+    hat = history @ np.linalg.pinv(history)
+    return Forecast(panel.packages, future, mean, residuals, n_periods - history.shape[1], hat)
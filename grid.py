@@ -0,0 +1,91 @@
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from schema import MONTH_ORDER
+
+# Rows per page offered by the raw-data grids
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+@dataclass
+class GridIndex:
+    """Sort orders and search vocabularies of one dataset, built once
+
+    `orders` holds a stable ascending argsort of every column. Categorical
+    and Year columns are searched through their distinct values only, so a
+    search term is matched against a handful of strings and then mapped to
+    rows through integer codes.
+    """
+    rows: int
+    orders: Dict[str, np.ndarray]
+    codes: Dict[str, np.ndarray]
+    labels: Dict[str, np.ndarray]
+
+    def search(self, term: str) -> Optional[np.ndarray]:
+        """Rows where any text column contains `term` (case-insensitive), None for no term"""
+        term = term.strip().lower()
+        if not term:
+            return None
+        mask = np.zeros(self.rows, dtype=bool)
+        for column, labels in self.labels.items():
+            hits = np.char.find(np.char.lower(labels), term) >= 0
+            if hits.any():
+                mask |= hits[self.codes[column]]
+        return mask
+
+
+def _sort_key(values: pd.Series) -> np.ndarray:
+    """Integer or numeric array whose order is the column's display order"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = values.cat.categories.astype(str)
+        if values.name == 'Month':
+            rank = np.array([MONTH_ORDER.index(c) if c in MONTH_ORDER else len(MONTH_ORDER)
+                             for c in categories])
+        else:
+            rank = np.argsort(np.argsort(categories.to_numpy(dtype=str), kind='stable'))
+        return np.append(rank, -1)[values.cat.codes.to_numpy()]
+    return values.to_numpy()
+
+
+def build_index(df: pd.DataFrame) -> GridIndex:
+    """Argsort every column and encode the searchable ones"""
+    orders = {column: np.argsort(_sort_key(df[column]), kind='stable') for column in df.columns}
+    codes, labels = {}, {}
+    for column in df.columns:
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Code -1 (missing) lands on a trailing empty label
+            labels[column] = np.append(values.cat.categories.to_numpy(dtype=str), '')
+            codes[column] = values.cat.codes.to_numpy()
+        elif column == 'Year':
+            uniques, inverse = np.unique(values.to_numpy(), return_inverse=True)
+            labels[column] = uniques.astype(str)
+            codes[column] = inverse
+    return GridIndex(len(df), orders, codes, labels)
+
+
+def page_rows(index: GridIndex, mask: Optional[np.ndarray], sort_by: str,
+              descending: bool = False) -> np.ndarray:
+    """Positions of the rows passing `mask`, in sort order
+
+    The cached argsort is filtered rather than re-sorted, so this is one
+    O(rows) gather however the grid is sorted.
+    """
+    order = index.orders[sort_by]
+    if descending:
+        order = order[::-1]
+    return order if mask is None else order[mask[order]]
+
+
+def combine_masks(masks: Sequence[Optional[np.ndarray]]) -> Optional[np.ndarray]:
+    """AND of the given row masks, skipping None (no filter)"""
+    masks = [mask for mask in masks if mask is not None]
+    if not masks:
+        return None
+    combined = masks[0].copy()
+    for mask in masks[1:]:
+        combined &= mask
+    return combined
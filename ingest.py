@@ -0,0 +1,251 @@
+import io
+import os
+import time
+import importlib.util
+import tarfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+from schema import MONTH_ORDER, REQUIRED_COLUMNS, COLUMN_TYPES
+from store import DatasetStore
+from quality import profile_dataset
+from validation import ValidationResult, validate
+
+# CSV parser for uploads: 'pyarrow' (multithreaded, explicit schema) or 'pandas'
+CSV_ENGINE = os.environ.get('DENNISLAW_CSV_ENGINE', 'pyarrow')
+
+# Bytes per parse block; each block is converted on its own thread
+CSV_BLOCK_SIZE = 4 * 1024 * 1024
+
+# Rust-backed calamine reader when installed, pandas' default otherwise
+EXCEL_ENGINE = 'calamine' if importlib.util.find_spec('python_calamine') else None
+
+# File types the uploaders accept: plain or compressed CSV, CSV archives, Excel
+UPLOAD_TYPES = ['csv', 'gz', 'zst', 'zstd', 'zip', 'tar', 'tgz', 'xlsx', 'xls']
+
+# Streaming decompression by file extension
+STREAM_CODECS = {'.gz': 'gzip', '.zst': 'zstd', '.zstd': 'zstd'}
+
+TAR_SUFFIXES = ('.tar', '.tar.gz', '.tar.zst', '.tar.zstd', '.tgz')
+
+# Fallback parse types: numeric columns as text for validation to coerce
+LENIENT_TYPES = {col: typ if pa.types.is_dictionary(typ) else pa.string()
+                 for col, typ in COLUMN_TYPES.items()}
+
+
+class UploadError(ValueError):
+    """Raised when an upload cannot be turned into a dataset"""
+
+
+def check_columns(columns: List[str], data_type: str):
+    """Fail fast when a required column is missing"""
+    missing = [col for col in REQUIRED_COLUMNS[data_type] if col not in columns]
+    if missing:
+        raise UploadError(f"Missing required columns: {', '.join(missing)}")
+
+
+def _index_type(size: int) -> pa.DataType:
+    return pa.int8() if size < 2 ** 7 else pa.int16() if size < 2 ** 15 else pa.int32()
+
+
+def normalize_table(table: pa.Table) -> pa.Table:
+    """Dictionary-encode a validated table into the schema shared by all pages
+
+    Month arrives as ordinals from validation and becomes an ordered
+    dictionary over MONTH_ORDER; packages get a dictionary of their sorted
+    distinct names.
+    """
+    month_column = pa.DictionaryArray.from_arrays(
+        table['Month'].combine_chunks(), pa.array(MONTH_ORDER), ordered=True
+    )
+
+    packages = table['Subscription Package'].combine_chunks().dictionary_encode()
+    order = pc.sort_indices(packages.dictionary)
+    package_names = pc.take(packages.dictionary, order)
+    ranks = pc.index_in(packages.dictionary, value_set=package_names)
+    package_column = pa.DictionaryArray.from_arrays(
+        pc.take(ranks, packages.indices).cast(_index_type(len(package_names))), package_names
+    )
+
+    table = table.set_column(table.schema.get_field_index('Month'), 'Month', month_column)
+    table = table.set_column(table.schema.get_field_index('Subscription Package'),
+                             'Subscription Package', package_column)
+    # pandas metadata from a pandas-parsed upload no longer describes the columns
+    return table.replace_schema_metadata(None)
+
+
+def _validated(table: pa.Table, data_type: str) -> ValidationResult:
+    """Validate, coerce and normalize a parsed upload"""
+    result = validate(table, data_type)
+    if result.table.num_rows == 0:
+        raise UploadError(f"No valid rows: all {result.rejected_rows:,} rows were rejected")
+    result.table = normalize_table(result.table)
+    return result
+
+
+def _parse_csv(open_source: Callable[[], object], engine: str = CSV_ENGINE) -> pa.Table:
+    """Parse one CSV into an Arrow table (not yet normalized)
+
+    `open_source` returns a fresh stream over the CSV each time it is called,
+    so the lenient retry re-reads it instead of keeping a copy around.
+    """
+    if engine == 'pandas':
+        return pa.Table.from_pandas(pd.read_csv(open_source()), preserve_index=False)
+
+    # Multithreaded columnar parse with the known columns typed up front,
+    # so no intermediate object-dtype frame is ever built
+    read_options = pacsv.ReadOptions(use_threads=True, block_size=CSV_BLOCK_SIZE)
+    try:
+        return pacsv.read_csv(open_source(), read_options=read_options,
+                              convert_options=pacsv.ConvertOptions(column_types=COLUMN_TYPES))
+    except pa.ArrowInvalid:
+        # Values like '1,234.50' fail the typed parse; read the numeric columns
+        # as text and let validation coerce them
+        return pacsv.read_csv(open_source(), read_options=read_options,
+                              convert_options=pacsv.ConvertOptions(column_types=LENIENT_TYPES))
+
+
+def _decompressed(stream, name: str):
+    """Wrap a stream in streaming decompression chosen by file extension"""
+    for suffix, codec in STREAM_CODECS.items():
+        if name.lower().endswith(suffix):
+            return pa.CompressedInputStream(stream, codec)
+    return stream
+
+
+def _buffer_opener(data: bytes, name: str) -> Callable[[], object]:
+    """Opens `data` as a new zero-copy (and decompressing) stream on every call"""
+    return lambda: _decompressed(pa.BufferReader(data), name)
+
+
+def _is_csv(name: str) -> bool:
+    base = name.lower()
+    for suffix in STREAM_CODECS:
+        if base.endswith(suffix):
+            base = base[:-len(suffix)]
+    return base.endswith('.csv') and not name.startswith('__MACOSX/')
+
+
+def _parse_members(raw: bytes, name: str, engine: str) -> List[pa.Table]:
+    """Parse every CSV in an upload, archive members in parallel"""
+    lower = name.lower()
+    workers = os.cpu_count() or 1
+
+    if lower.endswith('.zip'):
+        with zipfile.ZipFile(io.BytesIO(raw)) as archive:
+            members = [m for m in archive.namelist() if _is_csv(m)]
+            if not members:
+                raise UploadError("No CSV files found in the archive")
+            # Each member is decompressed as a stream by the thread parsing it
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(
+                    lambda m: _parse_csv(lambda: _decompressed(archive.open(m), m), engine), members
+                ))
+
+    if lower.endswith(TAR_SUFFIXES):
+        # Tar streams are sequential: decompress member by member and hand
+        # each one to the pool while the next is being read
+        stream = _decompressed(pa.BufferReader(raw), lower.replace('.tgz', '.tar.gz'))
+        futures = []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            with tarfile.open(fileobj=stream, mode='r|') as archive:
+                for member in archive:
+                    if member.isfile() and _is_csv(member.name):
+                        data = archive.extractfile(member).read()
+                        futures.append(pool.submit(_parse_csv, _buffer_opener(data, member.name), engine))
+            if not futures:
+                raise UploadError("No CSV files found in the archive")
+            return [future.result() for future in futures]
+
+    return [_parse_csv(_buffer_opener(raw, lower), engine)]
+
+
+def read_csv(raw: bytes, name: str, data_type: str, engine: str = CSV_ENGINE) -> ValidationResult:
+    """Parse a CSV, compressed CSV or CSV archive into one validated table"""
+    tables = _parse_members(raw, name, engine)
+    for table in tables:
+        check_columns(table.column_names, data_type)
+    if len({table.schema for table in tables}) > 1:
+        # Members that needed the lenient retry hold numbers as text; bring
+        # the others to the same types and let validation coerce them all
+        tables = [table.cast(pa.schema([pa.field(field.name, LENIENT_TYPES.get(field.name, field.type))
+                                         for field in table.schema])) for table in tables]
+    table = tables[0] if len(tables) == 1 else pa.concat_tables(tables, promote_options='permissive')
+    return _validated(table, data_type)
+
+
+def _read_sheets(raw: bytes, sheets: List[str]) -> Dict[str, pd.DataFrame]:
+    # BytesIO shares the upload's buffer, so each worker's handle adds no copy
+    with pd.ExcelFile(io.BytesIO(raw), engine=EXCEL_ENGINE) as workbook:
+        return pd.read_excel(workbook, sheet_name=sheets)
+
+
+def read_excel(raw: bytes, data_type: str) -> ValidationResult:
+    """Parse every data sheet of a workbook in parallel into one validated table
+
+    Workbook handles cannot be shared across threads, so the sheets are
+    split across workers and each worker opens its own handle over the same
+    bytes and reads its share. Single-sheet workbooks are read directly.
+    Sheets without the required columns (notes, summaries) are skipped.
+    """
+    with pd.ExcelFile(io.BytesIO(raw), engine=EXCEL_ENGINE) as workbook:
+        sheets = workbook.sheet_names
+        workers = min(os.cpu_count() or 1, len(sheets))
+        shares = [sheets[i::workers] for i in range(workers)]
+        with ThreadPoolExecutor(max_workers=max(workers - 1, 1)) as pool:
+            # The handle already open reads the first share meanwhile
+            pending = [pool.submit(_read_sheets, raw, share) for share in shares[1:]]
+            by_sheet = pd.read_excel(workbook, sheet_name=shares[0])
+            for future in pending:
+                by_sheet.update(future.result())
+    frames = [by_sheet[sheet] for sheet in sheets]
+
+    tables = []
+    for df in frames:
+        try:
+            check_columns(list(df.columns), data_type)
+        except UploadError:
+            continue
+        tables.append(pa.Table.from_pandas(df, preserve_index=False))
+    if not tables:
+        check_columns(list(frames[0].columns) if frames else [], data_type)
+
+    table = tables[0] if len(tables) == 1 else pa.concat_tables(tables, promote_options='permissive')
+    return _validated(table, data_type)
+
+
+def read_upload(raw: bytes, name: str, data_type: str) -> ValidationResult:
+    """Parse an uploaded file into a normalized Arrow table and bad-row report"""
+    if name.lower().endswith(('.xlsx', '.xls')):
+        return read_excel(raw, data_type)
+    return read_csv(raw, name, data_type)
+
+
+def store_upload(store: DatasetStore, raw: bytes, name: str, data_type: str, **metadata) -> str:
+    """Parse, profile and persist an upload unless its content is already stored
+
+    Returns the content-hash dataset id. The bad-row report and quality
+    profile land first: the dataset file marks the upload as done.
+    """
+    dataset_id = DatasetStore.dataset_id(raw)
+    if store.exists(data_type, dataset_id):
+        return dataset_id
+
+    start = time.perf_counter()
+    result = read_upload(raw, name, data_type)
+    parse_seconds = round(time.perf_counter() - start, 3)
+    store.write_report(result.report, data_type, dataset_id)
+    profile = profile_dataset(result.table.to_pandas(split_blocks=True), data_type)
+    store.write_profile(profile.to_dict(), data_type, dataset_id)
+    store.write(result.table, data_type, dataset_id, name=name,
+                parse_seconds=parse_seconds,
+                rejected_rows=result.rejected_rows,
+                flagged_rows=result.flagged_rows,
+                **metadata)
+    return dataset_id
@@ -0,0 +1,80 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def encode_keys(codes: List[np.ndarray], sizes: List[int]) -> np.ndarray:
+    """Pack per-column integer codes into one dense mixed-radix key
+
+    The first column is the most significant digit, so sorting keys sorts
+    rows by the columns in the given order.
+    """
+    key = np.zeros(len(codes[0]) if codes else 0, dtype=np.int64)
+    for column, size in zip(codes, sizes):
+        key *= size
+        key += column
+    return key
+
+
+def decode_keys(key: np.ndarray, sizes: List[int]) -> List[np.ndarray]:
+    """Inverse of encode_keys"""
+    codes = []
+    for size in reversed(sizes):
+        codes.append(key % size)
+        key = key // size
+    return codes[::-1]
+
+
+def _exact_in_float(values: np.ndarray) -> bool:
+    """Whether float64 accumulation of these integers cannot round
+
+    Every partial sum is bounded by len * max|value|; below 2**53 each one
+    is an exactly representable integer.
+    """
+    if not len(values):
+        return True
+    return int(np.abs(values).max()) * len(values) < 2 ** 53
+
+
+def group_sums(codes: List[np.ndarray], sizes: List[int], weights: Dict[str, np.ndarray],
+               mask: Optional[np.ndarray] = None) -> Tuple[List[np.ndarray], Dict[str, np.ndarray]]:
+    """Sum each weight column by the combined key with one bincount per metric
+
+    Returns the codes of the observed groups (in key order) and the summed
+    weights for those groups. Integer weights (counts, amounts in minor
+    units) come back as exact int64 sums.
+    """
+    if mask is not None:
+        codes = [column[mask] for column in codes]
+        weights = {name: values[mask] for name, values in weights.items()}
+
+    key = encode_keys(codes, sizes)
+    n_groups = int(np.prod(sizes, dtype=np.int64))
+
+    # Groups with at least one row, in ascending key order
+    observed = np.flatnonzero(np.bincount(key, minlength=n_groups))
+
+    sums = {}
+    for name, values in weights.items():
+        if np.issubdtype(values.dtype, np.integer) and not _exact_in_float(values):
+            totals = np.zeros(n_groups, dtype=np.int64)
+            np.add.at(totals, key, values)
+            sums[name] = totals[observed]
+            continue
+        totals = np.bincount(key, weights=values, minlength=n_groups)[observed]
+        if np.issubdtype(values.dtype, np.integer):
+            totals = np.rint(totals).astype(np.int64)
+        else:
+            # bincount returns int64 when there are no rows at all
+            totals = totals.astype(np.float64, copy=False)
+        sums[name] = totals
+
+    return decode_keys(observed, sizes), sums
+
+
+def safe_ratio(numerator, denominator):
+    """Element-wise ratio of summed arrays, NaN where the denominator is 0"""
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator != 0, numerator / denominator, np.nan)
@@ -0,0 +1,48 @@
+import os
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Amounts are stored and summed as int64 counts of the minor unit
+# (pesewas, 100 per cedi) and only turned into decimals when rendered
+MINOR_UNITS = int(os.environ.get('DENNISLAW_MINOR_UNITS', '100'))
+
+# Decimal places shown for one minor unit (2 for pesewas)
+DECIMALS = len(str(MINOR_UNITS)) - 1
+
+MONEY_COLUMNS = ['Amount (GHS)']
+
+
+def to_minor(values: np.ndarray) -> np.ndarray:
+    """Decimal amounts to int64 minor units, rounded to the nearest unit"""
+    return np.rint(np.asarray(values, dtype=np.float64) * MINOR_UNITS).astype(np.int64)
+
+
+def to_major(values):
+    """Minor units (or a ratio of them) to decimal amounts for charts"""
+    return values / MINOR_UNITS
+
+
+def format_money(minor, prefix: str = 'GHS ') -> str:
+    """Exact decimal rendering of an amount held in minor units
+
+    Ratios such as revenue per user arrive as fractional minor units and
+    are rounded to the nearest unit first.
+    """
+    if pd.isna(minor):
+        return 'NaN'
+    if isinstance(minor, (int, np.integer)):
+        units = int(minor)
+    else:
+        units = int(round(float(minor)))
+    sign = '-' if units < 0 else ''
+    whole, fraction = divmod(abs(units), MINOR_UNITS)
+    decimals = f".{fraction:0{DECIMALS}d}" if DECIMALS else ''
+    return f"{sign}{prefix}{whole:,}{decimals}"
+
+
+def in_major(df: pd.DataFrame, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Copy of a frame with its money columns in decimal units, for display"""
+    columns = [col for col in (columns or MONEY_COLUMNS) if col in df.columns]
+    return df.assign(**{col: to_major(df[col]) for col in columns})
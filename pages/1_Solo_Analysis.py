@@ -1,7 +1,27 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-from utils import StateManager, MONTH_ORDER
+from utils import StateManager, MONTH_ORDER, get_engine, get_calendar, get_panel, get_forecast, get_anomalies, get_seasonality, raw_data_grid, data_quality_panel
+from kernels import safe_ratio
+from money import format_money, in_major
+from periods import FISCAL_YEAR_START, comparison_windows, fiscal_label, join_calendar, window_growth
+from ingest import UPLOAD_TYPES
+from forecast import HORIZON
+from anomalies import THRESHOLD
+from export import OFFLINE_WARNING, ExportFilters, render_dashboard
+from downloads import FORMATS, lazy_export
+from timeseries import SUM_COLUMNS, WINDOWS, build_year_pivot, package_summary, series_frame
+from charts import cross_filter, growth_trend, multi_year_trend, seasonality_heatmap, waterfall, year_scale
+from decomposition import EFFECTS, revenue_bridge
+
+# Package table column holding the summed next-quarter forecast
+FORECAST_COLUMN = f'Next {HORIZON}M Forecast'
+
+# Metrics offered on the multi-year trend, with their axis titles
+TREND_METRICS = {'Amount (GHS)': 'Revenue (GH₵)', 'Number of Subscriptions': 'Subscriptions'}
+
+# Metrics shown on the seasonality heatmap, with their panel titles
+SEASONALITY_METRICS = {'Amount (GHS)': 'Revenue'}
 
 # Initialize session state
 StateManager.init_session_state()
@@ -71,26 +91,58 @@ st.markdown("""
 # Sidebar
 with st.sidebar:
     if not st.session_state.solo_data_loaded:
-        uploaded_file = st.file_uploader("Upload Solo Data", type=['csv'])
+        uploaded_file = st.file_uploader("Upload Solo Data", type=UPLOAD_TYPES,
+                                         help="CSV, gzip/zstd-compressed CSV, a zip/tar archive of CSVs, or an Excel workbook")
         if uploaded_file is not None:
-            try:
-                df = pd.read_csv(uploaded_file)
-                # Store in session state
-                st.session_state.solo_data = df
-                st.session_state.solo_data_loaded = True
-                
+            # Parsed once, then memory-mapped from the shared dataset store
+            if StateManager.load_data(uploaded_file, data_type='solo'):
                 # Initialize filters
                 st.session_state.month_filter = ['All']
                 st.session_state.package_filter = ['All']
                 
                 st.success("Data loaded successfully!")
                 st.rerun()
-            except Exception as e:
-                st.error(f"Error loading file: {str(e)}")
+        
+        # Datasets uploaded in any worker are available without re-parsing
+        stored = StateManager.stored_datasets('solo')
+        if stored:
+            st.markdown("---")
+            stored_choice = st.selectbox(
+                'Or open a stored dataset',
+                options=stored,
+                format_func=lambda m: f"{'📂 ' if m.get('source') == 'watch' else ''}{m['name']} ({m['rows']:,} rows)",
+                key='solo_stored_dataset'
+            )
+            if st.button('Open dataset', key='open_solo_dataset', use_container_width=True):
+                StateManager.open_dataset(stored_choice['dataset_id'], data_type='solo')
+                st.session_state.month_filter = ['All']
+                st.session_state.package_filter = ['All']
+                st.rerun()
     else:
+        # Loaded dataset and how long it took to parse
+        info = StateManager.dataset_info('solo')
+        if info:
+            parse_time = f" · parsed in {info['parse_seconds']:.2f}s" if 'parse_seconds' in info else ''
+            st.caption(f"📄 {info['name']} · {info['rows']:,} rows{parse_time}")
+
+            # Rows dropped or flagged by upload validation
+            if info.get('flagged_rows'):
+                st.warning(
+                    f"{info['rejected_rows']:,} rows rejected, "
+                    f"{info['flagged_rows'] - info['rejected_rows']:,} kept with warnings"
+                )
+                report = StateManager.validation_report('solo')
+                if report:
+                    st.download_button(
+                        "Download bad-row report",
+                        data=report,
+                        file_name=f"{info['dataset_id']}_issues.csv",
+                        mime='text/csv',
+                        key='solo_issues_download'
+                    )
+        
         if st.button("Clear Data", key='clear_solo_data'):
-            st.session_state.solo_data = None
-            st.session_state.solo_data_loaded = False
+            StateManager.clear_data('solo')
             st.session_state.month_filter = ['All']
             st.session_state.package_filter = ['All']
             st.rerun()
@@ -99,14 +151,32 @@ with st.sidebar:
         
         # Get the data
         df = st.session_state.solo_data
+        dataset_id = st.session_state.solo_dataset_id
+        engine = get_engine()
+        
+        # Distinct (Year, Month, Package) keys drive the filter options
+        keys = engine.aggregate('solo', dataset_id, by=['Year', 'Month', 'Subscription Package'])
         
         # Year filter
-        years = sorted(df['Year'].unique())
+        years = sorted(keys['Year'].unique())
         selected_year = st.selectbox('Select Year', years, index=len(years)-1, key='year_filter')
         
-        # Create filtered dataframes
-        current_year_df = df[df['Year'] == selected_year]
-        prev_year_df = df[df['Year'] == selected_year - 1]
+        # Years shown alongside the selected year, and the one deltas are measured from
+        compare_with = st.multiselect(
+            'Compare With',
+            options=years,
+            default=[selected_year-1] if selected_year-1 in years else [],
+            key='compare_years'
+        )
+        comparison_years = sorted(set(compare_with) | {selected_year})
+        baseline_year = st.selectbox(
+            'Baseline Year',
+            comparison_years,
+            index=comparison_years.index(selected_year-1) if selected_year-1 in comparison_years else 0,
+            key='baseline_year'
+        )
+        
+        current_year_keys = keys[keys['Year'] == selected_year]
         
         # Month filter section
         st.markdown("---")
@@ -116,7 +186,7 @@ with st.sidebar:
             st.session_state.month_filter = ['All']
         
         # Month filter
-        months = sorted(current_year_df['Month'].unique().tolist(), key=lambda x: MONTH_ORDER.index(x))
+        months = [m for m in MONTH_ORDER if m in set(current_year_keys['Month'])]
         month_options = ['All'] + months
         
         # Reset months button
@@ -154,7 +224,7 @@ with st.sidebar:
             st.session_state.prev_package_selection = ['All']
         
         # Package filter
-        packages = sorted(current_year_df['Subscription Package'].unique().tolist())
+        packages = sorted(current_year_keys['Subscription Package'].unique().tolist())
         package_options = ['All'] + packages
         
         # Reset packages button
@@ -183,12 +253,30 @@ with st.sidebar:
         # Convert 'All' selections to full lists for filtering
         months_for_filtering = months if 'All' in selected_months else selected_months
         packages_for_filtering = packages if 'All' in selected_packages else selected_packages
-        
-        # Filter data based on selections
-        filtered_df = current_year_df[
-            (current_year_df['Month'].isin(months_for_filtering)) &
-            (current_year_df['Subscription Package'].isin(packages_for_filtering))
-        ]
+        package_values = None if 'All' in selected_packages else selected_packages
+
+        # Static HTML copy of the current view for read-only viewers
+        st.markdown("---")
+        export_filters = ExportFilters(
+            selected_year, baseline_year,
+            months=None if 'All' in selected_months else selected_months,
+            packages=package_values
+        )
+        if OFFLINE_WARNING:
+            st.warning(OFFLINE_WARNING)
+        if st.button('Build HTML dashboard', key='solo_export_build', use_container_width=True):
+            st.session_state.solo_export = (export_filters, render_dashboard(
+                engine, 'solo', dataset_id, export_filters, StateManager.dataset_info('solo')['name']
+            ))
+        if st.session_state.get('solo_export', (None, None))[0] == export_filters:
+            st.download_button(
+                'Download HTML dashboard',
+                data=st.session_state.solo_export[1],
+                file_name=f"solo_{export_filters.slug()}.html",
+                mime='text/html',
+                key='solo_export_download',
+                use_container_width=True
+            )
 
 # Main content
 if st.session_state.solo_data_loaded and st.session_state.solo_data is not None:
@@ -196,35 +284,44 @@ if st.session_state.solo_data_loaded and st.session_state.solo_data is not None:
     st.title(f"Solo Analysis ({selected_year})")
     
     try:
-        # Calculate metrics using filtered data
-        curr_sales = filtered_df['Amount (GHS)'].sum()
-        prev_sales = prev_year_df[
-            (prev_year_df['Month'].isin(selected_months)) & 
-            (prev_year_df['Subscription Package'].isin(selected_packages))
-        ]['Amount (GHS)'].sum()
+        # Duplicates, gaps and suspicious rows found when the file was ingested
+        data_quality_panel('solo', dataset_id)
         
-        sales_growth = ((curr_sales - prev_sales) / prev_sales * 100) if prev_sales > 0 else 0
+        # One Year × Month pivot over every compared year; the KPI totals and
+        # all three trend charts are reductions of it
+        comparison = build_year_pivot(engine.aggregate(
+            'solo', dataset_id,
+            by=['Year', 'Month'],
+            metrics=['Amount (GHS)', 'Number of Subscriptions'],
+            years=comparison_years,
+            packages=package_values
+        ), ['Amount (GHS)', 'Number of Subscriptions'], comparison_years)
+        yearly_totals = comparison.totals(months_for_filtering)
+        yearly_deltas = comparison.deltas(baseline_year, months_for_filtering).fillna(0)
         
-        curr_subs = filtered_df['Number of Subscriptions'].sum()
-        prev_subs = prev_year_df[
-            (prev_year_df['Month'].isin(selected_months)) & 
-            (prev_year_df['Subscription Package'].isin(selected_packages))
-        ]['Number of Subscriptions'].sum()
+        # Calculate metrics using filtered data; amounts are exact integer pesewas
+        curr_sales = yearly_totals.loc[selected_year, 'Amount (GHS)']
+        base_sales = yearly_totals.loc[baseline_year, 'Amount (GHS)']
+        sales_growth = yearly_deltas.loc[selected_year, 'Amount (GHS)']
         
-        subs_growth = ((curr_subs - prev_subs) / prev_subs * 100) if prev_subs > 0 else 0
+        curr_subs = yearly_totals.loc[selected_year, 'Number of Subscriptions']
+        base_subs = yearly_totals.loc[baseline_year, 'Number of Subscriptions']
+        subs_growth = yearly_deltas.loc[selected_year, 'Number of Subscriptions']
         
         avg_value = curr_sales / curr_subs if curr_subs > 0 else 0
-        prev_avg = prev_sales / prev_subs if prev_subs > 0 else 0
-        avg_growth = ((avg_value - prev_avg) / prev_avg * 100) if prev_avg > 0 else 0
+        base_avg = base_sales / base_subs if base_subs > 0 else 0
+        avg_growth = ((avg_value - base_avg) / base_avg * 100) if base_avg > 0 else 0
+        
+        growth_label = "YoY Growth" if baseline_year == selected_year-1 else f"Growth vs {baseline_year}"
         
         # Display metrics
         m1, m2, m3, m4 = st.columns(4)
         
         metrics = [
-            (m1, "Total Revenue", f"GHS {curr_sales:,.2f}", sales_growth),
+            (m1, "Total Revenue", format_money(curr_sales), sales_growth),
             (m2, "Subscriptions", f"{curr_subs:,}", subs_growth),
-            (m3, "Average Value", f"GHS {avg_value:,.2f}", avg_growth),
-            (m4, "YoY Growth", f"{sales_growth:+.1f}%", None)
+            (m3, "Average Value", format_money(avg_value), avg_growth),
+            (m4, growth_label, f"{sales_growth:+.1f}%", None)
         ]
         
         for col, label, value, change in metrics:
@@ -244,15 +341,22 @@ if st.session_state.solo_data_loaded and st.session_state.solo_data is not None:
             # Monthly Revenue Trend
             st.markdown("### Monthly Revenue Trend")
             
-            # Prepare monthly data
-            monthly_data = df[df['Year'].isin([selected_year-1, selected_year])].copy()
-            monthly_data['Month'] = pd.Categorical(monthly_data['Month'], 
-                                                 categories=MONTH_ORDER, 
-                                                 ordered=True)
+            # Monthly totals joined to the calendar on the integer period key
+            # feed the growth insights; the year before last is only there
+            # for fiscal comparisons
+            timeline = join_calendar(engine.aggregate(
+                'solo', dataset_id,
+                by=['Year', 'Month'],
+                metrics=['Amount (GHS)', 'Number of Subscriptions'],
+                years=[selected_year-2, selected_year-1, selected_year]
+            ), get_calendar('solo', dataset_id))
+            
+            # The compared years' monthly totals feed all three trend charts
+            comparison_months = comparison.frame()
+            year_colors = year_scale(comparison_years, selected_year, baseline_year)
             
             # Aggregate monthly data
-            monthly_revenue = monthly_data.groupby(['Year', 'Month'], 
-                                                 as_index=False)['Amount (GHS)'].sum()
+            monthly_revenue = in_major(comparison_months[['Year', 'Month', 'Amount (GHS)']])
             
             # Convert Year to string for Altair
             monthly_revenue['Year'] = monthly_revenue['Year'].astype(str)
@@ -268,9 +372,7 @@ if st.session_state.solo_data_loaded and st.session_state.solo_data is not None:
                 y=alt.Y('Amount (GHS):Q',
                        title='Revenue (GH₵)',
                        axis=alt.Axis(format=',.0f')),
-                color=alt.Color('Year:N',
-                              scale=alt.Scale(domain=[str(selected_year-1), str(selected_year)],
-                                            range=['#94a3b8', '#22c55e'])),
+                color=alt.Color('Year:N', scale=year_colors),
                 tooltip=[
                     alt.Tooltip('Month:N'),
                     alt.Tooltip('Year:N'),
@@ -284,15 +386,8 @@ if st.session_state.solo_data_loaded and st.session_state.solo_data is not None:
             # Subscription Trends
             st.markdown("### Subscription Trends")
             
-            # Prepare subscription data
-            monthly_subs = df[df['Year'].isin([selected_year-1, selected_year])].copy()
-            monthly_subs['Month'] = pd.Categorical(monthly_subs['Month'], 
-                                                 categories=MONTH_ORDER, 
-                                                 ordered=True)
-            
             # Aggregate subscription data
-            monthly_subs = monthly_subs.groupby(['Year', 'Month'], 
-                                              as_index=False)['Number of Subscriptions'].sum()
+            monthly_subs = comparison_months[['Year', 'Month', 'Number of Subscriptions']].copy()
             
             # Convert Year to string for Altair
             monthly_subs['Year'] = monthly_subs['Year'].astype(str)
@@ -303,9 +398,7 @@ if st.session_state.solo_data_loaded and st.session_state.solo_data is not None:
                        sort=MONTH_ORDER,
                        axis=alt.Axis(labelAngle=-45)),
                 y=alt.Y('Number of Subscriptions:Q'),
-                color=alt.Color('Year:N',
-                              scale=alt.Scale(domain=[str(selected_year-1), str(selected_year)],
-                                            range=['#94a3b8', '#22c55e'])),
+                color=alt.Color('Year:N', scale=year_colors),
                 tooltip=['Month', 'Year', 'Number of Subscriptions']
             ).properties(height=300)
             
@@ -315,18 +408,10 @@ if st.session_state.solo_data_loaded and st.session_state.solo_data is not None:
             # Average Sale Value Trend
             st.markdown("### Average Sale Value Trend")
             
-            # Calculate average sale value per month
-            avg_value_data = df[df['Year'].isin([selected_year-1, selected_year])].copy()
-            avg_value_data['Month'] = pd.Categorical(avg_value_data['Month'], 
-                                                   categories=MONTH_ORDER, 
-                                                   ordered=True)
-            
             # Calculate average value
-            avg_value_data = avg_value_data.groupby(['Year', 'Month'], as_index=False).agg({
-                'Amount (GHS)': 'sum',
-                'Number of Subscriptions': 'sum'
-            })
-            avg_value_data['Average Value'] = avg_value_data['Amount (GHS)'] / avg_value_data['Number of Subscriptions']
+            avg_value_data = comparison_months.copy()
+            avg_value_data['Average Value'] = safe_ratio(avg_value_data['Amount (GHS)'], avg_value_data['Number of Subscriptions'])
+            avg_value_data = in_major(avg_value_data, ['Amount (GHS)', 'Average Value'])
             
             # Convert Year to string for Altair
             avg_value_data['Year'] = avg_value_data['Year'].astype(str)
@@ -340,9 +425,7 @@ if st.session_state.solo_data_loaded and st.session_state.solo_data is not None:
                 y=alt.Y('Average Value:Q',
                        title='Average Sale Value (GH₵)',
                        axis=alt.Axis(format=',.2f')),
-                color=alt.Color('Year:N',
-                              scale=alt.Scale(domain=[str(selected_year-1), str(selected_year)],
-                                            range=['#94a3b8', '#22c55e'])),
+                color=alt.Color('Year:N', scale=year_colors),
                 tooltip=[
                     alt.Tooltip('Month:N'),
                     alt.Tooltip('Year:N'),
@@ -359,17 +442,24 @@ if st.session_state.solo_data_loaded and st.session_state.solo_data is not None:
                 # Package Growth Analysis
                 st.markdown("### Package Growth Analysis")
                 
-                # Calculate package performance for current and previous year
-                def get_package_revenue(df):
-                    return df.groupby('Subscription Package')['Amount (GHS)'].sum().reset_index()
+                # Calculate package performance for the selected and baseline year
+                package_totals = engine.aggregate(
+                    'solo', dataset_id,
+                    by=['Year', 'Subscription Package'],
+                    metrics=['Amount (GHS)', 'Number of Subscriptions'],
+                    years=[baseline_year, selected_year]
+                )
+                
+                def get_package_totals(year):
+                    return package_totals[package_totals['Year'] == year].drop(columns='Year')
                 
                 # Get revenue for both years
-                current_package = get_package_revenue(current_year_df)
-                prev_package = get_package_revenue(prev_year_df)
+                current_package = get_package_totals(selected_year)
+                prev_package = get_package_totals(baseline_year)
                 
                 # Merge and calculate growth
-                package_growth = current_package.merge(
-                    prev_package, 
+                package_growth = current_package[['Subscription Package', 'Amount (GHS)']].merge(
+                    prev_package[['Subscription Package', 'Amount (GHS)']], 
                     on='Subscription Package', 
                     suffixes=('_current', '_prev')
                 )
@@ -383,7 +473,7 @@ if st.session_state.solo_data_loaded and st.session_state.solo_data is not None:
                 package_growth = package_growth.sort_values('Growth', ascending=True)
                 
                 # Create horizontal bar chart
-                growth_chart = alt.Chart(package_growth).mark_bar().encode(
+                growth_chart = alt.Chart(in_major(package_growth, ['Amount (GHS)_current', 'Amount (GHS)_prev'])).mark_bar().encode(
                     y=alt.Y('Subscription Package:N', 
                            title='Package',
                            sort=alt.EncodingSortField(field='Growth', order='ascending')),
@@ -410,16 +500,14 @@ if st.session_state.solo_data_loaded and st.session_state.solo_data is not None:
                 st.markdown("### Revenue Distribution")
                 
                 # Prepare data for pie chart
-                package_distribution = current_year_df.groupby('Subscription Package').agg({
-                    'Amount (GHS)': 'sum'
-                }).reset_index()
+                package_distribution = current_package[['Subscription Package', 'Amount (GHS)']].copy()
                 
                 # Calculate percentages
                 total_revenue = package_distribution['Amount (GHS)'].sum()
                 package_distribution['Percentage'] = (package_distribution['Amount (GHS)'] / total_revenue * 100)
                 
                 # Create pie chart
-                pie = alt.Chart(package_distribution).mark_arc(innerRadius=50).encode(
+                pie = alt.Chart(in_major(package_distribution)).mark_arc(innerRadius=50).encode(
                     theta=alt.Theta(field='Amount (GHS)', type='quantitative'),
                     color=alt.Color('Subscription Package:N', 
                                    scale=alt.Scale(scheme='greens')),
@@ -440,7 +528,7 @@ if st.session_state.solo_data_loaded and st.session_state.solo_data is not None:
                 package_distribution = package_distribution.sort_values('Amount (GHS)', ascending=True)
                 
                 # Create bar chart
-                revenue_dist_chart = alt.Chart(package_distribution).mark_bar().encode(
+                revenue_dist_chart = alt.Chart(in_major(package_distribution)).mark_bar().encode(
                     y=alt.Y('Subscription Package:N',
                            title='Package',
                            sort=alt.EncodingSortField(field='Amount (GHS)', order='ascending')),
@@ -459,6 +547,123 @@ if st.session_state.solo_data_loaded and st.session_state.solo_data is not None:
                 # Display the chart
                 st.altair_chart(revenue_dist_chart, use_container_width=True)
 
+        # Why revenue moved: price, volume and package-mix effects of the change
+        # from the baseline year, over the same months and packages as the KPIs
+        st.markdown("### Revenue Change Drivers")
+        bridge = revenue_bridge(engine.aggregate(
+            'solo', dataset_id,
+            by=['Year', 'Subscription Package'],
+            metrics=['Amount (GHS)', 'Number of Subscriptions'],
+            years=[baseline_year, selected_year],
+            months=months_for_filtering,
+            packages=package_values
+        ), baseline_year, selected_year, 'Amount (GHS)', 'Number of Subscriptions')
+        bridge_steps = bridge.totals().replace({'Step': {'Previous': str(baseline_year),
+                                                         'Current': str(selected_year)}})
+        
+        bridge_col1, bridge_col2 = st.columns([3, 2])
+        with bridge_col1:
+            st.altair_chart(waterfall(in_major(bridge_steps, ['Amount']), ',.0f', 'Revenue (GH₵)'),
+                            use_container_width=True)
+        with bridge_col2:
+            st.caption(
+                "**Price**: change in each package's average value at this year's volume · "
+                "**Volume**: change in total subscriptions at last year's prices and mix · "
+                "**Mix**: shift of subscriptions between cheaper and dearer packages · "
+                "**New / Discontinued**: packages sold in only one of the two years"
+            )
+            package_bridge = in_major(bridge.frame(), ['Previous', 'Current', 'Change'] + EFFECTS)
+            st.dataframe(
+                package_bridge.style.format({col: '{:,.0f}' for col in package_bridge.columns
+                                             if col != 'Subscription Package'}),
+                hide_index=True,
+                use_container_width=True,
+                height=280
+            )
+
+        # Linked views over one Month × Package aggregate of the selected year;
+        # brushing and clicking filter them in the browser without a rerun
+        st.markdown("### Explore")
+        explorer = engine.aggregate(
+            'solo', dataset_id,
+            by=['Month', 'Subscription Package'],
+            metrics=['Amount (GHS)', 'Number of Subscriptions'],
+            years=[selected_year],
+            months=None if 'All' in selected_months else selected_months,
+            packages=package_values
+        )
+        explorer['Date'] = pd.to_datetime(pd.DataFrame({'year': selected_year,
+                                                        'month': explorer['Month'].cat.codes + 1, 'day': 1}))
+        st.altair_chart(cross_filter(in_major(explorer.drop(columns='Month')), 'Amount (GHS)', 'Revenue (GH₵)',
+                                     'Number of Subscriptions', 'Subscriptions'))
+
+        # Multi-Year Trend across the whole timeline of the selected packages
+        st.markdown("### Multi-Year Trend")
+        
+        trend_col1, trend_col2 = st.columns(2)
+        with trend_col1:
+            trend_metric = st.selectbox(
+                'Metric',
+                options=TREND_METRICS,
+                format_func=TREND_METRICS.get,
+                key='solo_trend_metric'
+            )
+        with trend_col2:
+            trend_window = st.radio(
+                'Rolling window',
+                options=WINDOWS,
+                index=len(WINDOWS) - 1,
+                format_func=lambda w: f"{w} months",
+                horizontal=True,
+                key='solo_trend_window'
+            )
+        
+        # Windows and growth rates come from dense Package × month arrays;
+        # 'All' includes packages that were not sold in the selected year
+        trend_packages = None if 'All' in selected_packages else packages_for_filtering
+        panel = get_panel('solo', dataset_id, tuple(TREND_METRICS))
+        trend_series = series_frame(panel.periods, panel.select(trend_packages)[trend_metric])
+        package_trends = package_summary(panel, trend_metric)
+        
+        # Next-quarter projection for every package, fitted in one batch
+        forecast = get_forecast('solo', dataset_id, tuple(TREND_METRICS))
+        trend_forecast = forecast.frame(trend_metric, trend_packages)
+        package_trends[FORECAST_COLUMN] = forecast.mean[trend_metric].sum(axis=1)
+        if trend_packages is not None:
+            package_trends = package_trends[package_trends['Subscription Package'].isin(trend_packages)]
+        if trend_metric == 'Amount (GHS)':
+            trend_series = in_major(trend_series, SUM_COLUMNS)
+            trend_forecast = in_major(trend_forecast, ['Forecast', 'Lower', 'Upper'])
+            package_trends = in_major(package_trends, SUM_COLUMNS + [FORECAST_COLUMN])
+        
+        st.altair_chart(multi_year_trend(trend_series, TREND_METRICS[trend_metric], trend_window,
+                                         forecast=trend_forecast),
+                        use_container_width=True)
+        st.altair_chart(growth_trend(trend_series), use_container_width=True)
+        
+        with st.expander("Package trends (latest month)"):
+            st.dataframe(
+                package_trends.style.format({
+                    **{col: '{:,.0f}' for col in SUM_COLUMNS + [FORECAST_COLUMN] if col in package_trends.columns},
+                    'MoM %': '{:+.1f}',
+                    'YoY %': '{:+.1f}'
+                }, na_rep='–'),
+                hide_index=True,
+                use_container_width=True
+            )
+
+        # Seasonality: average share of each year's total by month, from the
+        # cached panel; the chart only carries Packages × 12 cells
+        st.markdown("### Seasonality")
+        seasonality = get_seasonality('solo', dataset_id, tuple(TREND_METRICS))
+        seasonality = seasonality[seasonality['Metric'].isin(SEASONALITY_METRICS)]
+        if trend_packages is not None:
+            seasonality = seasonality[seasonality['Subscription Package'].isin(['All Packages', *trend_packages])]
+        seasonality = seasonality.assign(Metric=seasonality['Metric'].map(SEASONALITY_METRICS))
+        st.altair_chart(seasonality_heatmap(seasonality), use_container_width=True)
+        st.caption("Each cell is the average share of a year's total that fell in that month, "
+                   "over every complete year in the data.")
+
         # Key Insights Section
         st.markdown("### Key Insights")
         insight_col1, insight_col2, insight_col3 = st.columns(3)
@@ -470,15 +675,8 @@ if st.session_state.solo_data_loaded and st.session_state.solo_data is not None:
             """, unsafe_allow_html=True)
             
             # Get top performing months
-            monthly_performance = current_year_df.groupby('Month').agg({
-                'Amount (GHS)': 'sum'
-            }).reset_index()
-            
-            monthly_performance['Month'] = pd.Categorical(
-                monthly_performance['Month'], 
-                categories=MONTH_ORDER, 
-                ordered=True
-            )
+            current_monthly = timeline[timeline['Year'] == selected_year]
+            monthly_performance = current_monthly[['Month', 'Amount (GHS)']]
             
             top_months = monthly_performance.nlargest(3, 'Amount (GHS)')
             
@@ -487,7 +685,7 @@ if st.session_state.solo_data_loaded and st.session_state.solo_data is not None:
                     <div style="margin: 10px 0; padding: 10px; background: #f8fafc; border-radius: 4px;">
                         <div style="color: #0f172a; font-weight: 500;">{month_data['Month']}</div>
                         <div style="color: #22c55e; font-size: 18px; font-weight: 600;">
-                            GHS {month_data['Amount (GHS)']:,.2f}
+                            {format_money(month_data['Amount (GHS)'])}
                         </div>
                     </div>
                 """, unsafe_allow_html=True)
@@ -500,12 +698,9 @@ if st.session_state.solo_data_loaded and st.session_state.solo_data is not None:
             """, unsafe_allow_html=True)
             
             # Calculate package metrics
-            package_metrics = current_year_df.groupby('Subscription Package').agg({
-                'Amount (GHS)': 'sum',
-                'Number of Subscriptions': 'sum'
-            }).reset_index()
+            package_metrics = current_package.copy()
             
-            package_metrics['Average Value'] = package_metrics['Amount (GHS)'] / package_metrics['Number of Subscriptions']
+            package_metrics['Average Value'] = safe_ratio(package_metrics['Amount (GHS)'], package_metrics['Number of Subscriptions'])
             top_package = package_metrics.nlargest(1, 'Amount (GHS)').iloc[0]
             best_value = package_metrics.nlargest(1, 'Average Value').iloc[0]
             
@@ -514,14 +709,14 @@ if st.session_state.solo_data_loaded and st.session_state.solo_data is not None:
                     <div style="color: #64748b;">Highest Revenue Package</div>
                     <div style="color: #0f172a; font-weight: 500;">{top_package['Subscription Package']}</div>
                     <div style="color: #22c55e; font-size: 18px; font-weight: 600;">
-                        GHS {top_package['Amount (GHS)']:,.2f}
+                        {format_money(top_package['Amount (GHS)'])}
                     </div>
                 </div>
                 <div style="margin: 10px 0; padding: 10px; background: #f8fafc; border-radius: 4px;">
                     <div style="color: #64748b;">Best Value Package</div>
                     <div style="color: #0f172a; font-weight: 500;">{best_value['Subscription Package']}</div>
                     <div style="color: #22c55e; font-size: 18px; font-weight: 600;">
-                        GHS {best_value['Average Value']:,.2f} / subscription
+                        {format_money(best_value['Average Value'])} / subscription
                     </div>
                 </div>
             """, unsafe_allow_html=True)
@@ -533,16 +728,13 @@ if st.session_state.solo_data_loaded and st.session_state.solo_data is not None:
                     <h4 style="color: #334155; margin-bottom: 1rem;">Growth Analysis</h4>
             """, unsafe_allow_html=True)
             
-            # Calculate growth metrics
-            current_quarter = (MONTH_ORDER.index(current_year_df['Month'].max()) // 3) + 1
-            quarter_months = MONTH_ORDER[(current_quarter-1)*3:current_quarter*3]
-            
-            current_quarter_data = current_year_df[current_year_df['Month'].isin(quarter_months)]
-            prev_quarter_data = prev_year_df[prev_year_df['Month'].isin(quarter_months)]
+            # Quarter and year-to-date windows are integer period ranges ending
+            # at the latest month of the selected year
+            last_period = int(current_monthly['Period'].max())
+            windows = comparison_windows(last_period)
+            current_quarter = last_period % 12 // 3 + 1
             
-            quarter_growth = ((current_quarter_data['Amount (GHS)'].sum() - 
-                             prev_quarter_data['Amount (GHS)'].sum()) / 
-                            prev_quarter_data['Amount (GHS)'].sum() * 100) if prev_quarter_data['Amount (GHS)'].sum() > 0 else 0
+            quarter_growth = window_growth(timeline, windows['quarter'], 'Amount (GHS)')
             
             st.markdown(f"""
                 <div style="margin: 10px 0; padding: 10px; background: #f8fafc; border-radius: 4px;">
@@ -556,10 +748,7 @@ if st.session_state.solo_data_loaded and st.session_state.solo_data is not None:
             """, unsafe_allow_html=True)
             
             # Add YTD comparison
-            ytd_months = current_year_df['Month'].unique()
-            current_ytd = current_year_df['Amount (GHS)'].sum()
-            prev_ytd = prev_year_df[prev_year_df['Month'].isin(ytd_months)]['Amount (GHS)'].sum()
-            ytd_growth = ((current_ytd - prev_ytd) / prev_ytd * 100) if prev_ytd > 0 else 0
+            ytd_growth = window_growth(timeline, windows['ytd'], 'Amount (GHS)')
             
             st.markdown(f"""
                 <div style="margin: 10px 0; padding: 10px; background: #f8fafc; border-radius: 4px;">
@@ -571,8 +760,54 @@ if st.session_state.solo_data_loaded and st.session_state.solo_data is not None:
                     </div>
                 </div>
             """, unsafe_allow_html=True)
+            
+            # Fiscal year-to-date, when the fiscal year is not the calendar year
+            if FISCAL_YEAR_START != 1:
+                fiscal_year = int(timeline.loc[timeline['Period'] == last_period, 'Fiscal Year'].iat[0])
+                fiscal_growth = window_growth(timeline, windows['fiscal_ytd'], 'Amount (GHS)')
+                st.markdown(f"""
+                    <div style="margin: 10px 0; padding: 10px; background: #f8fafc; border-radius: 4px;">
+                        <div style="color: #64748b;">Fiscal Year-to-Date</div>
+                        <div style="color: #0f172a; font-weight: 500;">{fiscal_label(fiscal_year)} Growth</div>
+                        <div class="metric-delta {'positive' if fiscal_growth > 0 else 'negative'}" 
+                             style="margin-top: 5px;">
+                            {fiscal_growth:+.1f}%
+                        </div>
+                    </div>
+                """, unsafe_allow_html=True)
             st.markdown("</div>", unsafe_allow_html=True)
 
+        # Months of the selected year far from each package's own seasonal
+        # expectation, scored for every package at once and cached per dataset
+        anomalies = get_anomalies('solo', dataset_id, tuple(TREND_METRICS))
+        anomalies = anomalies[(anomalies['Metric'] == 'Amount (GHS)') & (anomalies['Year'] == selected_year)]
+        if trend_packages is not None:
+            anomalies = anomalies[anomalies['Subscription Package'].isin(trend_packages)]
+        
+        spike_col, drop_col = st.columns(2)
+        for column, title, unusual in [
+            (spike_col, 'Unusual Spikes', anomalies[anomalies['Score'] > 0].head(3)),
+            (drop_col, 'Unusual Drops', anomalies[anomalies['Score'] < 0].head(3))
+        ]:
+            with column:
+                st.markdown(f"""
+                    <div class="metric-card" style="padding: 1rem;">
+                        <h4 style="color: #334155; margin-bottom: 1rem;">{title}</h4>
+                """, unsafe_allow_html=True)
+                if unusual.empty:
+                    st.caption(f"No package revenue in {selected_year} is more than {THRESHOLD} robust deviations from its usual level.")
+                for _, cell in unusual.iterrows():
+                    st.markdown(f"""
+                        <div style="margin: 10px 0; padding: 10px; background: #f8fafc; border-radius: 4px;">
+                            <div style="color: #64748b;">{cell['Month']} {cell['Year']}</div>
+                            <div style="color: #0f172a; font-weight: 500;">{cell['Subscription Package']}</div>
+                            <div class="metric-delta {'positive' if cell['Score'] > 0 else 'negative'}" style="margin-top: 5px;">
+                                {format_money(cell['Value'])} vs {format_money(cell['Expected'])} expected ({cell['Score']:+.1f})
+                            </div>
+                        </div>
+                    """, unsafe_allow_html=True)
+                st.markdown("</div>", unsafe_allow_html=True)
+
         # Expandable sections for Glossary and Raw Data
         st.markdown("---")
 
@@ -597,6 +832,7 @@ if st.session_state.solo_data_loaded and st.session_state.solo_data is not None:
                     **Growth Metrics:**
                     - **Quarter Growth**: Current quarter vs same quarter last year
                     - **YTD Growth**: Year-to-Date comparison with previous year
+                    - **Fiscal YTD Growth**: Fiscal-year-to-date comparison (when a fiscal year start is configured)
                     
                     **Charts:**
                     - **Monthly Trend**: Revenue pattern over months
@@ -633,55 +869,60 @@ if st.session_state.solo_data_loaded and st.session_state.solo_data is not None:
                         default=sorted(df['Subscription Package'].unique())
                     )
                     
-                    # Filter the dataframe
-                    filtered_raw_df = df[
-                        (df['Year'].isin(year_filter)) &
-                        (df['Month'].isin(month_filter)) &
-                        (df['Subscription Package'].isin(package_filter))
-                    ]
+                    # Rows matching the filters, as a mask over the cached index
+                    raw_mask = (
+                        df['Year'].isin(year_filter).to_numpy() &
+                        df['Month'].isin(month_filter).to_numpy() &
+                        df['Subscription Package'].isin(package_filter).to_numpy()
+                    )
                     
-                    # Show filtered data
+                    # Show one page of the filtered data with amounts in cedis
                     st.markdown("### Filtered Data")
-                    st.dataframe(
-                        filtered_raw_df.style.format({
-                            'Amount (GHS)': '{:,.2f}',
-                            'Number of Subscriptions': '{:,}'
-                        }),
-                        height=300
-                    )
+                    raw_rows = raw_data_grid(df, 'solo', dataset_id, raw_mask, column_config={
+                        'Year': st.column_config.NumberColumn(format='%d'),
+                        'Amount (GHS)': st.column_config.NumberColumn(format='GH₵%.2f'),
+                        'Number of Subscriptions': st.column_config.NumberColumn(format='localized')
+                    })
                     
-                    # Add download button
-                    csv = filtered_raw_df.to_csv(index=False).encode('utf-8')
+                    # Add download button; the file is only written when clicked
+                    export_format = st.radio("Format", options=list(FORMATS), horizontal=True,
+                                             key='solo_download_format')
+                    extension, mime = FORMATS[export_format]
                     st.download_button(
                         "Download Filtered Data",
-                        csv,
-                        "solo_sales_data.csv",
-                        "text/csv",
+                        lazy_export(lambda: in_major(df.iloc[raw_rows]), export_format),
+                        f"solo_sales_data.{extension}",
+                        mime,
                         key='download-csv'
                     )
                     
                     # Show summary statistics
                     st.markdown("### Summary Statistics")
                     
-                    # Calculate summary statistics
+                    # Calculate summary statistics from one monthly aggregate
+                    raw_monthly = engine.aggregate(
+                        'solo', dataset_id,
+                        by=['Year', 'Month'],
+                        metrics=['Amount (GHS)', 'Number of Subscriptions'],
+                        years=year_filter,
+                        months=month_filter,
+                        packages=package_filter
+                    )
+                    total_revenue = raw_monthly['Amount (GHS)'].sum()
+                    total_subs = raw_monthly['Number of Subscriptions'].sum()
                     summary = {
-                        'Total Revenue': filtered_raw_df['Amount (GHS)'].sum(),
-                        'Average Revenue per Month': filtered_raw_df.groupby(['Year', 'Month'])['Amount (GHS)'].sum().mean(),
-                        'Total Subscriptions': filtered_raw_df['Number of Subscriptions'].sum(),
-                        'Average Subscriptions per Month': filtered_raw_df.groupby(['Year', 'Month'])['Number of Subscriptions'].sum().mean(),
-                        'Highest Monthly Revenue': filtered_raw_df.groupby(['Year', 'Month'])['Amount (GHS)'].sum().max(),
-                        'Lowest Monthly Revenue': filtered_raw_df.groupby(['Year', 'Month'])['Amount (GHS)'].sum().min(),
-                        'Average Revenue per Subscription': filtered_raw_df['Amount (GHS)'].sum() / filtered_raw_df['Number of Subscriptions'].sum()
+                        'Total Revenue': format_money(total_revenue),
+                        'Average Revenue per Month': format_money(raw_monthly['Amount (GHS)'].mean()),
+                        'Total Subscriptions': f"{total_subs:,.0f}",
+                        'Average Subscriptions per Month': f"{raw_monthly['Number of Subscriptions'].mean():,.0f}",
+                        'Highest Monthly Revenue': format_money(raw_monthly['Amount (GHS)'].max()),
+                        'Lowest Monthly Revenue': format_money(raw_monthly['Amount (GHS)'].min()),
+                        'Average Revenue per Subscription': format_money(safe_ratio(total_revenue, total_subs))
                     }
                     
                     # Create a formatted dataframe
                     summary_df = pd.DataFrame.from_dict(summary, orient='index', columns=['Value'])
                     
-                    # Format the values
-                    summary_df['Value'] = summary_df['Value'].apply(lambda x: f"GHS {x:,.2f}" if 'Revenue' in summary_df.index[summary_df['Value'] == x][0] 
-                                                                  else f"{x:,.0f}" if 'Subscriptions' in summary_df.index[summary_df['Value'] == x][0]
-                                                                  else f"GHS {x:,.2f}")
-                    
                     # Display the summary
                     st.dataframe(summary_df, use_container_width=True)
                 else:
@@ -733,7 +974,7 @@ else:
     st.markdown("### 🎯 Quick Start Guide")
     
     st.info("""
-        1. Prepare your solo data file (CSV format)
+        1. Prepare your solo data file (CSV, compressed CSV, an archive of monthly CSVs or an Excel workbook)
         2. Use the sidebar uploader to import your data
         3. Apply filters to focus on specific months or packages
         4. Explore the interactive visualizations and insights
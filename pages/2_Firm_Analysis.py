@@ -1,7 +1,30 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import altair as alt
-from utils import StateManager, MONTH_ORDER
+from utils import StateManager, MONTH_ORDER, get_engine, get_calendar, get_panel, get_forecast, get_anomalies, get_seasonality, raw_data_grid, data_quality_panel
+from kernels import safe_ratio
+from money import format_money, in_major
+from periods import FISCAL_YEAR_START, comparison_windows, fiscal_label, join_calendar, window_growth
+from ingest import UPLOAD_TYPES
+from forecast import HORIZON
+from anomalies import THRESHOLD
+from export import OFFLINE_WARNING, ExportFilters, render_dashboard
+from downloads import FORMATS, lazy_export
+from timeseries import SUM_COLUMNS, WINDOWS, build_year_pivot, package_summary, series_frame
+from charts import cross_filter, growth_trend, multi_year_trend, seasonality_heatmap, year_scale
+
+# Package table column holding the summed next-quarter forecast
+FORECAST_COLUMN = f'Next {HORIZON}M Forecast'
+
+# Metrics offered on the multi-year trend, with their axis titles
+TREND_METRICS = {'Amount (GHS)': 'Revenue (GH₵)', 'Number of Firms': 'Firms', 'Number of Users': 'Users'}
+
+# Metrics shown on the seasonality heatmap, with their panel titles
+SEASONALITY_METRICS = {'Amount (GHS)': 'Revenue', 'Number of Users': 'Users'}
+
+# Metrics scanned for unusual months in Key Insights
+INSIGHT_METRICS = {'Amount (GHS)': 'Revenue', 'Number of Users': 'Users'}
 
 # Initialize session state first
 StateManager.init_session_state()
@@ -56,29 +79,62 @@ st.markdown("""
 # Sidebar
 with st.sidebar:
     if not st.session_state.firm_data_loaded:
-        uploaded_file = st.file_uploader("Upload Firm Data", type=['csv'])
+        uploaded_file = st.file_uploader("Upload Firm Data", type=UPLOAD_TYPES,
+                                         help="CSV, gzip/zstd-compressed CSV, a zip/tar archive of CSVs, or an Excel workbook")
         if uploaded_file is not None:
-            try:
-                df = pd.read_csv(uploaded_file)
-                
-                # Store in session state
-                st.session_state.firm_data = df
-                st.session_state.firm_data_loaded = True
-                
+            # Parsed once, then memory-mapped from the shared dataset store
+            if StateManager.load_data(uploaded_file, data_type='firm'):
                 # Initialize year filter with the latest year
-                years = sorted(df['Year'].unique())
+                years = sorted(st.session_state.firm_data['Year'].unique())
                 st.session_state.firm_year_filter = years[-1]  # Set to latest year
                 st.session_state.firm_month_filter = ['All']
                 st.session_state.firm_package_filter = ['All']
                 
                 st.success("Data loaded successfully!")
                 st.rerun()
-            except Exception as e:
-                st.error(f"Error loading file: {str(e)}")
+        
+        # Datasets uploaded in any worker are available without re-parsing
+        stored = StateManager.stored_datasets('firm')
+        if stored:
+            st.markdown("---")
+            stored_choice = st.selectbox(
+                'Or open a stored dataset',
+                options=stored,
+                format_func=lambda m: f"{'📂 ' if m.get('source') == 'watch' else ''}{m['name']} ({m['rows']:,} rows)",
+                key='firm_stored_dataset'
+            )
+            if st.button('Open dataset', key='open_firm_dataset', use_container_width=True):
+                StateManager.open_dataset(stored_choice['dataset_id'], data_type='firm')
+                years = sorted(st.session_state.firm_data['Year'].unique())
+                st.session_state.firm_year_filter = years[-1]
+                st.session_state.firm_month_filter = ['All']
+                st.session_state.firm_package_filter = ['All']
+                st.rerun()
     else:
+        # Loaded dataset and how long it took to parse
+        info = StateManager.dataset_info('firm')
+        if info:
+            parse_time = f" · parsed in {info['parse_seconds']:.2f}s" if 'parse_seconds' in info else ''
+            st.caption(f"📄 {info['name']} · {info['rows']:,} rows{parse_time}")
+
+            # Rows dropped or flagged by upload validation
+            if info.get('flagged_rows'):
+                st.warning(
+                    f"{info['rejected_rows']:,} rows rejected, "
+                    f"{info['flagged_rows'] - info['rejected_rows']:,} kept with warnings"
+                )
+                report = StateManager.validation_report('firm')
+                if report:
+                    st.download_button(
+                        "Download bad-row report",
+                        data=report,
+                        file_name=f"{info['dataset_id']}_issues.csv",
+                        mime='text/csv',
+                        key='firm_issues_download'
+                    )
+        
         if st.button("Clear Data", key='clear_firm_data'):
-            st.session_state.firm_data = None
-            st.session_state.firm_data_loaded = False
+            StateManager.clear_data('firm')
             st.session_state.firm_year_filter = None
             st.session_state.firm_month_filter = ['All']
             st.session_state.firm_package_filter = ['All']
@@ -89,18 +145,19 @@ if st.session_state.firm_data_loaded and st.session_state.firm_data is not None:
     try:
         # Get data from session state
         df = st.session_state.firm_data
+        dataset_id = st.session_state.firm_dataset_id
+        engine = get_engine()
+        metric_columns = ['Number of Firms', 'Number of Users', 'Amount (GHS)']
         
-        # Calculate derived metrics
-        df['Users per Firm'] = df['Number of Users'] / df['Number of Firms'].where(df['Number of Firms'] > 0, 1)
-        df['Revenue per User'] = df['Amount (GHS)'] / df['Number of Users'].where(df['Number of Users'] > 0, 1)
-        df['Revenue per Firm'] = df['Amount (GHS)'] / df['Number of Firms'].where(df['Number of Firms'] > 0, 1)
+        # Distinct (Year, Month, Package) keys drive the filter options
+        keys = engine.aggregate('firm', dataset_id, by=['Year', 'Month', 'Subscription Package'])
         
         # Filters in Sidebar
         with st.sidebar:
             st.subheader("Filters")
             
             # Year filter
-            years = sorted(df['Year'].unique())
+            years = sorted(keys['Year'].unique())
             if st.session_state.firm_year_filter is None:
                 st.session_state.firm_year_filter = years[-1]
             year_index = years.index(st.session_state.firm_year_filter)
@@ -108,11 +165,26 @@ if st.session_state.firm_data_loaded and st.session_state.firm_data is not None:
                                        index=year_index,
                                        key='firm_year_filter')
             
+            # Years shown alongside the selected year, and the one deltas are measured from
+            compare_with = st.multiselect(
+                'Compare With',
+                options=years,
+                default=[selected_year-1] if selected_year-1 in years else [],
+                key='firm_compare_years'
+            )
+            comparison_years = sorted(set(compare_with) | {selected_year})
+            baseline_year = st.selectbox(
+                'Baseline Year',
+                comparison_years,
+                index=comparison_years.index(selected_year-1) if selected_year-1 in comparison_years else 0,
+                key='firm_baseline_year'
+            )
+            
             st.markdown("---")
             
             # Month filter section
             # Sort months according to MONTH_ORDER
-            available_months = df['Month'].unique().tolist()
+            available_months = set(keys['Month'])
             all_months = [month for month in MONTH_ORDER if month in available_months]
             
             # Reset months button
@@ -145,7 +217,7 @@ if st.session_state.firm_data_loaded and st.session_state.firm_data is not None:
             st.markdown("---")
             
             # Package filter section
-            all_packages = sorted(df['Subscription Package'].unique())
+            all_packages = sorted(keys['Subscription Package'].unique())
             
             # Reset packages button
             if st.button('↺ Reset packages', key='reset_firm_packages', type='secondary', use_container_width=True):
@@ -174,40 +246,80 @@ if st.session_state.firm_data_loaded and st.session_state.firm_data is not None:
                 st.session_state.firm_package_filter = new_package_selection
                 st.rerun()
 
-        # Apply filters
-        filtered_df = df.copy()
-        if 'All' not in selected_months:
-            filtered_df = filtered_df[filtered_df['Month'].isin(selected_months)]
-        if 'All' not in selected_packages:
-            filtered_df = filtered_df[filtered_df['Subscription Package'].isin(selected_packages)]
-            
-        # Get current year data
-        current_year_df = filtered_df[filtered_df['Year'] == selected_year].copy()
+            # Static HTML copy of the current view for read-only viewers
+            st.markdown("---")
+            export_filters = ExportFilters(
+                selected_year, baseline_year,
+                months=None if 'All' in selected_months else selected_months,
+                packages=None if 'All' in selected_packages else selected_packages
+            )
+            if OFFLINE_WARNING:
+                st.warning(OFFLINE_WARNING)
+            if st.button('Build HTML dashboard', key='firm_export_build', use_container_width=True):
+                st.session_state.firm_export = (export_filters, render_dashboard(
+                    engine, 'firm', dataset_id, export_filters, StateManager.dataset_info('firm')['name']
+                ))
+            if st.session_state.get('firm_export', (None, None))[0] == export_filters:
+                st.download_button(
+                    'Download HTML dashboard',
+                    data=st.session_state.firm_export[1],
+                    file_name=f"firm_{export_filters.slug()}.html",
+                    mime='text/html',
+                    key='firm_export_download',
+                    use_container_width=True
+                )
+
+        # Apply filters ('All' means no filter is pushed down)
+        month_values = None if 'All' in selected_months else selected_months
+        package_values = None if 'All' in selected_packages else selected_packages
+        
+        # Monthly totals joined to the calendar on the integer period key;
+        # the year before last is only there for fiscal comparisons
+        timeline = join_calendar(engine.aggregate(
+            'firm', dataset_id,
+            by=['Year', 'Month'],
+            metrics=metric_columns,
+            years=[selected_year-2, selected_year-1, selected_year],
+            months=month_values,
+            packages=package_values
+        ), get_calendar('firm', dataset_id))
         
-        # Get previous year data safely
-        prev_year = selected_year - 1
-        prev_year_df = filtered_df[filtered_df['Year'] == prev_year] if prev_year in years else pd.DataFrame()
+        # One Year × Month pivot over every compared year; the KPI totals,
+        # growth figures and trend charts are all reductions of it
+        comparison = build_year_pivot(engine.aggregate(
+            'firm', dataset_id,
+            by=['Year', 'Month'],
+            metrics=metric_columns,
+            years=comparison_years,
+            months=month_values,
+            packages=package_values
+        ), metric_columns, comparison_years)
+        monthly_growth = comparison.frame()
+        yearly_totals = comparison.totals()
         
-        # Calculate metrics with safe handling of previous year
-        total_firms = current_year_df['Number of Firms'].sum()
-        prev_firms = prev_year_df['Number of Firms'].sum() if not prev_year_df.empty else 0
+        # Calculate metrics against the baseline year (zero when it has no data)
+        total_firms = yearly_totals.loc[selected_year, 'Number of Firms']
+        prev_firms = yearly_totals.loc[baseline_year, 'Number of Firms']
         firms_growth = ((total_firms - prev_firms) / prev_firms * 100) if prev_firms > 0 else 0
         
-        total_users = current_year_df['Number of Users'].sum()
-        prev_users = prev_year_df['Number of Users'].sum() if not prev_year_df.empty else 0
+        total_users = yearly_totals.loc[selected_year, 'Number of Users']
+        prev_users = yearly_totals.loc[baseline_year, 'Number of Users']
         users_growth = ((total_users - prev_users) / prev_users * 100) if prev_users > 0 else 0
         
         avg_users_per_firm = total_users / total_firms if total_firms > 0 else 0
         prev_avg = (prev_users / prev_firms) if prev_firms > 0 else 0
         avg_growth = ((avg_users_per_firm - prev_avg) / prev_avg * 100) if prev_avg > 0 else 0
         
-        total_revenue = current_year_df['Amount (GHS)'].sum()
-        prev_revenue = prev_year_df['Amount (GHS)'].sum() if not prev_year_df.empty else 0
+        total_revenue = yearly_totals.loc[selected_year, 'Amount (GHS)']
+        prev_revenue = yearly_totals.loc[baseline_year, 'Amount (GHS)']
         revenue_growth = ((total_revenue - prev_revenue) / prev_revenue * 100) if prev_revenue > 0 else 0
         
         # Dashboard Title
         st.title(f"Firm Analysis ({selected_year})")
         
+        # Duplicates, gaps and suspicious rows found when the file was ingested
+        data_quality_panel('firm', dataset_id)
+        
         # Main metrics
         col1, col2, col3, col4 = st.columns(4)
         
@@ -216,7 +328,7 @@ if st.session_state.firm_data_loaded and st.session_state.firm_data is not None:
             (col1, "Total Firms", f"{total_firms:,}", firms_growth),
             (col2, "Total Users", f"{total_users:,}", users_growth),
             (col3, "Avg Users/Firm", f"{avg_users_per_firm:.1f}", avg_growth),
-            (col4, "Total Revenue", f"GH₵{total_revenue:,.2f}", revenue_growth)
+            (col4, "Total Revenue", format_money(total_revenue, prefix='GH₵'), revenue_growth)
         ]
         
         for col, label, value, change in metrics:
@@ -236,16 +348,8 @@ if st.session_state.firm_data_loaded and st.session_state.firm_data is not None:
             # Monthly Firms Trend
             st.markdown("### Monthly Firms Trend")
             
-            # Prepare monthly firms trend data
-            monthly_firms = filtered_df[
-                df['Year'].isin([selected_year-1, selected_year])
-            ].groupby(['Year', 'Month'], as_index=False)['Number of Firms'].sum()
-            
-            # Ensure proper month ordering
-            monthly_firms['Month'] = pd.Categorical(monthly_firms['Month'], 
-                                                  categories=MONTH_ORDER, 
-                                                  ordered=True)
-            monthly_firms = monthly_firms.sort_values(['Year', 'Month'])
+            # Prepare monthly firms trend data (already in month order)
+            monthly_firms = monthly_growth[['Year', 'Month', 'Number of Firms']].copy()
             monthly_firms['Year'] = monthly_firms['Year'].astype(str)
             
             # Create firms trend chart
@@ -259,8 +363,7 @@ if st.session_state.firm_data_loaded and st.session_state.firm_data is not None:
                 y=alt.Y('Number of Firms:Q', 
                        title='Number of Firms'),
                 color=alt.Color('Year:N',
-                              scale=alt.Scale(domain=[str(selected_year-1), str(selected_year)],
-                                            range=['#94a3b8', '#22c55e']),
+                              scale=year_scale(comparison_years, selected_year, baseline_year),
                               legend=alt.Legend(title="Year", orient="top")),
                 tooltip=[
                     alt.Tooltip('Month:N'),
@@ -274,16 +377,8 @@ if st.session_state.firm_data_loaded and st.session_state.firm_data is not None:
             # Monthly Users Trend
             st.markdown("### Monthly Users Trend")
             
-            # Prepare monthly users trend data
-            monthly_users = filtered_df[
-                df['Year'].isin([selected_year-1, selected_year])
-            ].groupby(['Year', 'Month'], as_index=False)['Number of Users'].sum()
-            
-            # Ensure proper month ordering
-            monthly_users['Month'] = pd.Categorical(monthly_users['Month'], 
-                                                  categories=MONTH_ORDER, 
-                                                  ordered=True)
-            monthly_users = monthly_users.sort_values(['Year', 'Month'])
+            # Prepare monthly users trend data (already in month order)
+            monthly_users = monthly_growth[['Year', 'Month', 'Number of Users']].copy()
             monthly_users['Year'] = monthly_users['Year'].astype(str)
             
             # Create users trend chart
@@ -297,8 +392,7 @@ if st.session_state.firm_data_loaded and st.session_state.firm_data is not None:
                 y=alt.Y('Number of Users:Q', 
                        title='Number of Users'),
                 color=alt.Color('Year:N',
-                              scale=alt.Scale(domain=[str(selected_year-1), str(selected_year)],
-                                            range=['#94a3b8', '#3b82f6']),
+                              scale=year_scale(comparison_years, selected_year, baseline_year, accent='#3b82f6'),
                               legend=alt.Legend(title="Year", orient="top")),
                 tooltip=[
                     alt.Tooltip('Month:N'),
@@ -309,35 +403,21 @@ if st.session_state.firm_data_loaded and st.session_state.firm_data is not None:
             
             st.altair_chart(users_chart, use_container_width=True)
             
-            # Prepare monthly growth data
-            monthly_growth = filtered_df.groupby(['Year', 'Month']).agg({
-                'Number of Firms': 'sum',
-                'Number of Users': 'sum',
-                'Amount (GHS)': 'sum'
-            }).reset_index()
-            
-            # Ensure proper month ordering
-            monthly_growth['Month'] = pd.Categorical(monthly_growth['Month'], 
-                                                   categories=MONTH_ORDER, 
-                                                   ordered=True)
-            monthly_growth = monthly_growth.sort_values(['Year', 'Month'])
-            
-            # Calculate YoY growth rates
-            current_year_data = monthly_growth[monthly_growth['Year'] == selected_year]
-            prev_year_data = monthly_growth[monthly_growth['Year'] == selected_year - 1]
-            
-            if not current_year_data.empty and not prev_year_data.empty:
-                firms_growth = ((current_year_data['Number of Firms'].sum() - prev_year_data['Number of Firms'].sum()) / 
-                                prev_year_data['Number of Firms'].sum() * 100) if prev_year_data['Number of Firms'].sum() > 0 else float('nan')
-                users_growth = ((current_year_data['Number of Users'].sum() - prev_year_data['Number of Users'].sum()) / 
-                                prev_year_data['Number of Users'].sum() * 100) if prev_year_data['Number of Users'].sum() > 0 else float('nan')
-                revenue_growth = ((current_year_data['Amount (GHS)'].sum() - prev_year_data['Amount (GHS)'].sum()) / 
-                                prev_year_data['Amount (GHS)'].sum() * 100) if prev_year_data['Amount (GHS)'].sum() > 0 else float('nan')
+            # Growth against the baseline year (NaN without data to compare)
+            current_year_data = timeline[timeline['Year'] == selected_year]
+            if not current_year_data.empty:
+                baseline_growth = comparison.deltas(baseline_year).loc[selected_year]
+                firms_growth = baseline_growth['Number of Firms']
+                users_growth = baseline_growth['Number of Users']
+                revenue_growth = baseline_growth['Amount (GHS)']
             else:
                 firms_growth = float('nan')
                 users_growth = float('nan')
                 revenue_growth = float('nan')
             
+            growth_period = "YoY" if baseline_year == selected_year-1 else f"vs {baseline_year}"
+            growth_caption = "vs Previous Year" if baseline_year == selected_year-1 else f"vs {baseline_year}"
+            
             # Growth Analysis Section
             st.markdown("""
                 ### Growth Analysis
@@ -360,13 +440,13 @@ if st.session_state.firm_data_loaded and st.session_state.firm_data is not None:
                     <div class="metric-card" style="padding: 1rem; text-align: center;">
                         <div title="Year-over-Year growth in number of firms">
                             <div class="metric-label" style="font-size: 0.875rem; color: #6b7280; margin-bottom: 0.5rem;">
-                                Firms Growth (YoY)
+                                Firms Growth ({growth_period})
                             </div>
                             <div class="metric-value" style="font-size: 1.5rem; font-weight: 600; color: {get_growth_color(firms_growth)};">
                                 {f"{firms_growth:+.1f}%" if not pd.isna(firms_growth) else "NaN"}
                             </div>
                             <div class="metric-trend" style="font-size: 0.75rem; color: #6b7280; margin-top: 0.5rem;">
-                                vs Previous Year
+                                {growth_caption}
                             </div>
                         </div>
                     </div>
@@ -377,13 +457,13 @@ if st.session_state.firm_data_loaded and st.session_state.firm_data is not None:
                     <div class="metric-card" style="padding: 1rem; text-align: center;">
                         <div title="Year-over-Year growth in number of users">
                             <div class="metric-label" style="font-size: 0.875rem; color: #6b7280; margin-bottom: 0.5rem;">
-                                Users Growth (YoY)
+                                Users Growth ({growth_period})
                             </div>
                             <div class="metric-value" style="font-size: 1.5rem; font-weight: 600; color: {get_growth_color(users_growth)};">
                                 {f"{users_growth:+.1f}%" if not pd.isna(users_growth) else "NaN"}
                             </div>
                             <div class="metric-trend" style="font-size: 0.75rem; color: #6b7280; margin-top: 0.5rem;">
-                                vs Previous Year
+                                {growth_caption}
                             </div>
                         </div>
                     </div>
@@ -394,23 +474,55 @@ if st.session_state.firm_data_loaded and st.session_state.firm_data is not None:
                     <div class="metric-card" style="padding: 1rem; text-align: center;">
                         <div title="Year-over-Year growth in revenue">
                             <div class="metric-label" style="font-size: 0.875rem; color: #6b7280; margin-bottom: 0.5rem;">
-                                Revenue Growth (YoY)
+                                Revenue Growth ({growth_period})
                             </div>
                             <div class="metric-value" style="font-size: 1.5rem; font-weight: 600; color: {get_growth_color(revenue_growth)};">
                                 {f"{revenue_growth:+.1f}%" if not pd.isna(revenue_growth) else "NaN"}
                             </div>
                             <div class="metric-trend" style="font-size: 0.75rem; color: #6b7280; margin-top: 0.5rem;">
-                                vs Previous Year
+                                {growth_caption}
                             </div>
                         </div>
                     </div>
                 """, unsafe_allow_html=True)
             
+            # Revenue growth over quarter and year-to-date windows, as integer
+            # period ranges ending at the latest month of the selected year
+            if not current_year_data.empty:
+                last_period = int(current_year_data['Period'].max())
+                windows = comparison_windows(last_period)
+                period_cards = [
+                    (f"Q{last_period % 12 // 3 + 1} Revenue Growth", "Same quarter last year", windows['quarter']),
+                    ("YTD Revenue Growth", "Same months last year", windows['ytd'])
+                ]
+                if FISCAL_YEAR_START != 1:
+                    fiscal_year = int(timeline.loc[timeline['Period'] == last_period, 'Fiscal Year'].iat[0])
+                    period_cards.append((f"{fiscal_label(fiscal_year)} YTD Revenue Growth",
+                                         "Same fiscal months last year", windows['fiscal_ytd']))
+                
+                for column, (label, trend, window) in zip(st.columns(len(period_cards)), period_cards):
+                    growth = window_growth(timeline, window, 'Amount (GHS)')
+                    with column:
+                        st.markdown(f"""
+                            <div class="metric-card" style="padding: 1rem; text-align: center;">
+                                <div class="metric-label" style="font-size: 0.875rem; color: #6b7280; margin-bottom: 0.5rem;">
+                                    {label}
+                                </div>
+                                <div class="metric-value" style="font-size: 1.5rem; font-weight: 600; color: {get_growth_color(growth)};">
+                                    {growth:+.1f}%
+                                </div>
+                                <div class="metric-trend" style="font-size: 0.75rem; color: #6b7280; margin-top: 0.5rem;">
+                                    {trend}
+                                </div>
+                            </div>
+                        """, unsafe_allow_html=True)
+            
             # Monthly Revenue Trend
             st.markdown("### Monthly Revenue Trend")
             
             if not current_year_data.empty:
-                growth_chart = alt.Chart(current_year_data).mark_area(
+                revenue_data = in_major(current_year_data)
+                growth_chart = alt.Chart(revenue_data).mark_area(
                     opacity=0.4,
                     color='#22c55e'
                 ).encode(
@@ -427,7 +539,7 @@ if st.session_state.firm_data_loaded and st.session_state.firm_data is not None:
                 ).properties(height=300)
                 
                 # Add trend line
-                trend_line = alt.Chart(current_year_data).mark_line(
+                trend_line = alt.Chart(revenue_data).mark_line(
                     color='#15803d',
                     strokeWidth=3
                 ).encode(
@@ -452,11 +564,18 @@ if st.session_state.firm_data_loaded and st.session_state.firm_data is not None:
             st.markdown("### Package Metrics")
             
             # Get data for current year and respect filters
-            package_dist = filtered_df[filtered_df['Year'] == selected_year].groupby('Subscription Package').agg({
-                'Number of Firms': 'sum',
-                'Number of Users': 'sum',
-                'Amount (GHS)': 'sum'
-            }).reset_index()
+            package_dist = engine.aggregate(
+                'firm', dataset_id,
+                by=['Subscription Package'],
+                metrics=metric_columns,
+                years=[selected_year],
+                months=month_values,
+                packages=package_values
+            )
+            
+            # Per-package ratios from the summed columns
+            package_dist['Users per Firm'] = safe_ratio(package_dist['Number of Users'], package_dist['Number of Firms'])
+            package_dist['Revenue per User'] = safe_ratio(package_dist['Amount (GHS)'], package_dist['Number of Users'])
             
             # Calculate totals (use 0 if no data)
             total_firms = package_dist['Number of Firms'].sum() if not package_dist.empty else 0
@@ -464,12 +583,12 @@ if st.session_state.firm_data_loaded and st.session_state.firm_data is not None:
             total_revenue = package_dist['Amount (GHS)'].sum() if not package_dist.empty else 0
             
             # Calculate metrics (use NaN for undefined ratios)
-            users_per_firm = total_users / total_firms if total_firms > 0 else float('nan')
-            revenue_per_user = total_revenue / total_users if total_users > 0 else float('nan')
+            users_per_firm = float(safe_ratio(total_users, total_firms))
+            revenue_per_user = float(safe_ratio(total_revenue, total_users))
             
             # Format metrics with proper handling of NaN
             users_per_firm_display = f"{users_per_firm:.1f}" if not pd.isna(users_per_firm) else "NaN"
-            revenue_per_user_display = f"GH₵{revenue_per_user:,.2f}" if not pd.isna(revenue_per_user) else "NaN"
+            revenue_per_user_display = format_money(revenue_per_user, prefix='GH₵')
             
             # Create dynamic card title based on selected packages
             if not package_dist.empty and len(package_dist) == 1:
@@ -518,7 +637,8 @@ if st.session_state.firm_data_loaded and st.session_state.firm_data is not None:
             st.markdown("### Package Distribution")
             
             # Create donut chart with tooltips
-            donut = alt.Chart(package_dist).mark_arc(innerRadius=50).encode(
+            package_chart_data = in_major(package_dist, ['Amount (GHS)', 'Revenue per User'])
+            donut = alt.Chart(package_chart_data).mark_arc(innerRadius=50).encode(
                 theta=alt.Theta(field='Number of Firms', type='quantitative'),
                 color=alt.Color('Subscription Package:N', 
                               scale=alt.Scale(scheme='greens')),
@@ -536,7 +656,7 @@ if st.session_state.firm_data_loaded and st.session_state.firm_data is not None:
             # Revenue per User by Package
             st.markdown("### Revenue per User")
             
-            revenue_per_user_chart = alt.Chart(package_dist).mark_bar().encode(
+            revenue_per_user_chart = alt.Chart(package_chart_data).mark_bar().encode(
                 y=alt.Y('Subscription Package:N', 
                        sort='-x',
                        title=None),
@@ -556,6 +676,123 @@ if st.session_state.firm_data_loaded and st.session_state.firm_data is not None:
             
             st.altair_chart(revenue_per_user_chart, use_container_width=True)
 
+        # Linked views over one Month × Package aggregate of the selected year;
+        # brushing and clicking filter them in the browser without a rerun
+        st.markdown("### Explore")
+        explorer = engine.aggregate(
+            'firm', dataset_id,
+            by=['Month', 'Subscription Package'],
+            metrics=['Amount (GHS)', 'Number of Users'],
+            years=[selected_year],
+            months=month_values,
+            packages=package_values
+        )
+        explorer['Date'] = pd.to_datetime(pd.DataFrame({'year': selected_year,
+                                                        'month': explorer['Month'].cat.codes + 1, 'day': 1}))
+        st.altair_chart(cross_filter(in_major(explorer.drop(columns='Month')), 'Amount (GHS)', 'Revenue (GH₵)',
+                                     'Number of Users', 'Users'))
+
+        # Multi-Year Trend across the whole timeline of the selected packages
+        st.markdown("### Multi-Year Trend")
+        
+        trend_col1, trend_col2 = st.columns(2)
+        with trend_col1:
+            trend_metric = st.selectbox(
+                'Metric',
+                options=TREND_METRICS,
+                format_func=TREND_METRICS.get,
+                key='firm_trend_metric'
+            )
+        with trend_col2:
+            trend_window = st.radio(
+                'Rolling window',
+                options=WINDOWS,
+                index=len(WINDOWS) - 1,
+                format_func=lambda w: f"{w} months",
+                horizontal=True,
+                key='firm_trend_window'
+            )
+        
+        # Windows and growth rates come from dense Package × month arrays
+        panel = get_panel('firm', dataset_id, tuple(TREND_METRICS))
+        trend_series = series_frame(panel.periods, panel.select(package_values)[trend_metric])
+        package_trends = package_summary(panel, trend_metric)
+        
+        # Next-quarter projection for every package, fitted in one batch
+        forecast = get_forecast('firm', dataset_id, tuple(TREND_METRICS))
+        trend_forecast = forecast.frame(trend_metric, package_values)
+        package_trends[FORECAST_COLUMN] = forecast.mean[trend_metric].sum(axis=1)
+        if package_values is not None:
+            package_trends = package_trends[package_trends['Subscription Package'].isin(package_values)]
+        if trend_metric == 'Amount (GHS)':
+            trend_series = in_major(trend_series, SUM_COLUMNS)
+            trend_forecast = in_major(trend_forecast, ['Forecast', 'Lower', 'Upper'])
+            package_trends = in_major(package_trends, SUM_COLUMNS + [FORECAST_COLUMN])
+        
+        st.altair_chart(multi_year_trend(trend_series, TREND_METRICS[trend_metric], trend_window,
+                                         forecast=trend_forecast),
+                        use_container_width=True)
+        st.altair_chart(growth_trend(trend_series), use_container_width=True)
+        
+        with st.expander("Package trends (latest month)"):
+            st.dataframe(
+                package_trends.style.format({
+                    **{col: '{:,.0f}' for col in SUM_COLUMNS + [FORECAST_COLUMN] if col in package_trends.columns},
+                    'MoM %': '{:+.1f}',
+                    'YoY %': '{:+.1f}'
+                }, na_rep='–'),
+                hide_index=True,
+                use_container_width=True
+            )
+
+        # Seasonality: average share of each year's total by month, from the
+        # cached panel; the chart only carries Packages × 12 cells
+        st.markdown("### Seasonality")
+        seasonality = get_seasonality('firm', dataset_id, tuple(TREND_METRICS))
+        seasonality = seasonality[seasonality['Metric'].isin(SEASONALITY_METRICS)]
+        if package_values is not None:
+            seasonality = seasonality[seasonality['Subscription Package'].isin(['All Packages', *package_values])]
+        seasonality = seasonality.assign(Metric=seasonality['Metric'].map(SEASONALITY_METRICS))
+        st.altair_chart(seasonality_heatmap(seasonality), use_container_width=True)
+        st.caption("Each cell is the average share of a year's total that fell in that month, "
+                   "over every complete year in the data.")
+
+        # Key Insights: package months far from their own seasonal expectation,
+        # scored for every package at once and cached per dataset
+        st.markdown("### Key Insights")
+        anomalies = get_anomalies('firm', dataset_id, tuple(TREND_METRICS))
+        anomalies = anomalies[anomalies['Metric'].isin(INSIGHT_METRICS) & (anomalies['Year'] == selected_year)]
+        if package_values is not None:
+            anomalies = anomalies[anomalies['Subscription Package'].isin(package_values)]
+        
+        spike_col, drop_col = st.columns(2)
+        for column, title, unusual in [
+            (spike_col, 'Unusual Spikes', anomalies[anomalies['Score'] > 0].head(4)),
+            (drop_col, 'Unusual Drops', anomalies[anomalies['Score'] < 0].head(4))
+        ]:
+            with column:
+                st.markdown(f"""
+                    <div class="metric-card" style="padding: 1rem;">
+                        <h4 style="color: #334155; margin-bottom: 1rem;">{title}</h4>
+                """, unsafe_allow_html=True)
+                if unusual.empty:
+                    st.caption(f"No package in {selected_year} is more than {THRESHOLD} robust deviations from its usual level.")
+                for _, cell in unusual.iterrows():
+                    if cell['Metric'] == 'Amount (GHS)':
+                        value, expected = format_money(cell['Value'], prefix='GH₵'), format_money(cell['Expected'], prefix='GH₵')
+                    else:
+                        value, expected = f"{cell['Value']:,.0f}", f"{cell['Expected']:,.0f}"
+                    st.markdown(f"""
+                        <div style="margin: 10px 0; padding: 10px; background: #f8fafc; border-radius: 4px;">
+                            <div style="color: #64748b;">{cell['Month']} {cell['Year']} · {INSIGHT_METRICS[cell['Metric']]}</div>
+                            <div style="color: #0f172a; font-weight: 500;">{cell['Subscription Package']}</div>
+                            <div class="metric-delta {'positive' if cell['Score'] > 0 else 'negative'}" style="margin-top: 5px;">
+                                {value} vs {expected} expected ({cell['Score']:+.1f})
+                            </div>
+                        </div>
+                    """, unsafe_allow_html=True)
+                st.markdown("</div>", unsafe_allow_html=True)
+
         st.markdown("---")
         
         # Two columns for Glossary and Data View
@@ -588,6 +825,14 @@ if st.session_state.firm_data_loaded and st.session_state.firm_data is not None:
         
         with bottom_right:
             with st.expander("🔍 View Raw Data"):
+                # Apply the sidebar filters to the raw rows
+                raw_mask = np.ones(len(df), dtype=bool)
+                if month_values is not None:
+                    raw_mask &= df['Month'].isin(month_values).to_numpy()
+                if package_values is not None:
+                    raw_mask &= df['Subscription Package'].isin(package_values).to_numpy()
+                filtered_df = df[raw_mask]
+                
                 # Add data filters
                 col1, col2 = st.columns(2)
                 with col1:
@@ -601,30 +846,36 @@ if st.session_state.firm_data_loaded and st.session_state.firm_data is not None:
                                                 key='data_package')
                 
                 # Filter data based on selection
-                view_data = filtered_df[
-                    (filtered_df['Year'] == view_year) & 
-                    (filtered_df['Subscription Package'].isin(view_package))
-                ]
+                raw_mask &= (df['Year'] == view_year).to_numpy() & df['Subscription Package'].isin(view_package).to_numpy()
                 
-                # Show filtered data
-                st.dataframe(
-                    view_data,
-                    column_config={
-                        "Amount (GHS)": st.column_config.NumberColumn(
-                            "Amount (GHS)",
-                            format="GH₵%.2f"
-                        )
-                    },
-                    hide_index=True
-                )
+                # Derived metrics only for the rows on view, amounts in cedis
+                def with_ratios(view_data):
+                    return view_data.assign(**{
+                        'Users per Firm': view_data['Number of Users'] / view_data['Number of Firms'].where(view_data['Number of Firms'] > 0, 1),
+                        'Revenue per User': view_data['Amount (GHS)'] / view_data['Number of Users'].where(view_data['Number of Users'] > 0, 1),
+                        'Revenue per Firm': view_data['Amount (GHS)'] / view_data['Number of Firms'].where(view_data['Number of Firms'] > 0, 1)
+                    })
+                
+                # Show one page of the filtered data
+                raw_rows = raw_data_grid(df, 'firm', dataset_id, raw_mask, column_config={
+                    'Year': st.column_config.NumberColumn(format='%d'),
+                    'Amount (GHS)': st.column_config.NumberColumn("Amount (GHS)", format="GH₵%.2f"),
+                    'Number of Firms': st.column_config.NumberColumn(format='localized'),
+                    'Number of Users': st.column_config.NumberColumn(format='localized'),
+                    'Users per Firm': st.column_config.NumberColumn(format='%.2f'),
+                    'Revenue per User': st.column_config.NumberColumn(format='GH₵%.2f'),
+                    'Revenue per Firm': st.column_config.NumberColumn(format='GH₵%.2f')
+                }, derive=with_ratios)
                 
-                # Add download button
-                csv = view_data.to_csv(index=False).encode('utf-8')
+                # Add download button; the file is only written when clicked
+                export_format = st.radio("Format", options=list(FORMATS), horizontal=True,
+                                         key='firm_download_format')
+                extension, mime = FORMATS[export_format]
                 st.download_button(
                     "Download Data",
-                    csv,
-                    "firm_analysis.csv",
-                    "text/csv",
+                    lazy_export(lambda: with_ratios(in_major(df.iloc[raw_rows])), export_format),
+                    f"firm_analysis.{extension}",
+                    mime,
                     key='download-csv'
                 )
         st.markdown("---")
@@ -676,7 +927,7 @@ else:
     st.markdown("### 🎯 Quick Start Guide")
     
     st.info("""
-        1. Prepare your firm data file (CSV format)
+        1. Prepare your firm data file (CSV, compressed CSV, an archive of monthly CSVs or an Excel workbook)
         2. Use the sidebar uploader to import your data
         3. Apply filters to focus on specific time periods or packages
         4. Explore the interactive visualizations and insights
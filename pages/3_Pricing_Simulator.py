@@ -0,0 +1,227 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import altair as alt
+from utils import StateManager, get_panel
+from money import format_money, to_major
+from simulation import MAX_SCENARIOS, scenario_grid, scenario_kpis, simulate
+from charts import ACCENT, MUTED
+
+# Datasets the simulator can run on. `metrics` matches the analysis pages so
+# the cached panel is shared; volumes move with the elasticity and average
+# value is revenue per `per`.
+SOURCES = {
+    'solo': {
+        'label': 'Solo',
+        'metrics': ('Amount (GHS)', 'Number of Subscriptions'),
+        'volumes': {'Number of Subscriptions': 'Subscriptions'},
+        'per': 'Number of Subscriptions',
+        'per_label': 'subscription'
+    },
+    'firm': {
+        'label': 'Firm',
+        'metrics': ('Amount (GHS)', 'Number of Firms', 'Number of Users'),
+        'volumes': {'Number of Firms': 'Firms', 'Number of Users': 'Users'},
+        'per': 'Number of Users',
+        'per_label': 'user'
+    }
+}
+
+# Starting ranges for every package in the scenario table
+DEFAULT_RANGES = {'Price Low %': -10.0, 'Price High %': 10.0,
+                  'Elasticity Low': -1.0, 'Elasticity High': -0.2}
+
+# Initialize session state
+StateManager.init_session_state()
+
+# Page Configuration
+st.set_page_config(page_title="Pricing Simulator", page_icon="🧮", layout="wide")
+
+# Custom styling
+st.markdown("""
+    <style>
+    .metric-card {
+        background: white;
+        padding: 20px;
+        border-radius: 8px;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+        text-align: center;
+    }
+
+    .metric-label {
+        font-size: 1rem;
+        color: #64748b;
+        margin-bottom: 8px;
+    }
+
+    .metric-value {
+        font-size: 1.5rem;
+        font-weight: 600;
+        color: #0f172a;
+        margin-bottom: 8px;
+    }
+
+    .metric-delta {
+        font-size: 0.875rem;
+        font-weight: 500;
+        padding: 2px 6px;
+        border-radius: 4px;
+    }
+
+    .metric-delta.positive {
+        color: #166534;
+        background: #dcfce7;
+    }
+
+    .metric-delta.negative {
+        color: #991b1b;
+        background: #fee2e2;
+    }
+    </style>
+""", unsafe_allow_html=True)
+
+st.title("🧮 Pricing Simulator")
+
+loaded = [data_type for data_type in SOURCES if st.session_state[f'{data_type}_data_loaded']]
+
+if loaded:
+    try:
+        with st.sidebar:
+            st.subheader("Scenarios")
+            data_type = st.radio('Data', options=loaded, format_func=lambda t: SOURCES[t]['label'],
+                                 horizontal=True, key='sim_data_type')
+            source = SOURCES[data_type]
+            dataset_id = st.session_state[f'{data_type}_dataset_id']
+            panel = get_panel(data_type, dataset_id, source['metrics'])
+
+            years = sorted(set((panel.periods // 12).tolist()))
+            selected_year = st.selectbox('Base Year', years, index=len(years) - 1, key='sim_year')
+            steps = st.slider('Levels per range', min_value=2, max_value=21, value=5, key='sim_steps',
+                              help="Evenly spaced price and elasticity levels between each package's low and high")
+            count = st.slider('Scenarios', min_value=100, max_value=MAX_SCENARIOS, value=2000, step=100,
+                              key='sim_count',
+                              help="Sampled combinations of package levels (all of them when there are fewer)")
+
+        # Base year as (package × month) arrays, keeping packages sold that year
+        in_year = panel.periods // 12 == selected_year
+        base = {metric: values[:, in_year] for metric, values in panel.values.items()}
+        sold = base[source['per']].sum(axis=1) > 0
+        packages = panel.packages[sold]
+        base = {metric: values[sold] for metric, values in base.items()}
+        months = pd.to_datetime(pd.DataFrame({'year': selected_year,
+                                              'month': panel.periods[in_year] % 12 + 1, 'day': 1}))
+
+        st.markdown(f"""
+            Each package's price moves within its range and its volume follows the
+            elasticity: volume change = elasticity × price change, so an elasticity
+            of -0.5 loses 5% of {source['per_label']}s on a 10% price rise. Every
+            scenario is evaluated on {selected_year}'s monthly sales.
+        """)
+        ranges = st.data_editor(
+            pd.DataFrame({'Subscription Package': packages, **DEFAULT_RANGES}),
+            column_config={
+                'Subscription Package': st.column_config.TextColumn('Package', disabled=True),
+                'Price Low %': st.column_config.NumberColumn(format='%+.1f%%', step=0.5),
+                'Price High %': st.column_config.NumberColumn(format='%+.1f%%', step=0.5),
+                'Elasticity Low': st.column_config.NumberColumn(format='%.2f', step=0.05),
+                'Elasticity High': st.column_config.NumberColumn(format='%.2f', step=0.05)
+            },
+            hide_index=True,
+            use_container_width=True,
+            key=f'sim_ranges_{data_type}_{selected_year}'
+        ).fillna(0)
+
+        # Every scenario at once: one (scenario × package) @ (package × month) product per metric
+        scenarios = scenario_grid(
+            ranges[['Price Low %', 'Price High %']].to_numpy() / 100,
+            ranges[['Elasticity Low', 'Elasticity High']].to_numpy(),
+            steps, count
+        )
+        volumes = list(source['volumes'])
+        monthly = simulate(base, scenarios, 'Amount (GHS)', volumes)
+        kpis = scenario_kpis(monthly, 'Amount (GHS)', source['per'])
+        baseline = scenario_kpis({metric: base[metric].sum(axis=0)[None] for metric in monthly},
+                                 'Amount (GHS)', source['per']).iloc[0]
+        best = int(kpis['Amount (GHS)'].to_numpy().argmax())
+        worst = int(kpis['Amount (GHS)'].to_numpy().argmin())
+
+        st.caption(f"{len(kpis):,} scenarios × {len(packages)} packages × {len(months)} months")
+
+        # KPI cards: baseline, best and worst case by revenue
+        for column, (title, row) in zip(st.columns(3), [
+            ('Current prices', baseline), ('Best case', kpis.iloc[best]), ('Worst case', kpis.iloc[worst])
+        ]):
+            with column:
+                change = (row['Amount (GHS)'] - baseline['Amount (GHS)']) / baseline['Amount (GHS)'] * 100 \
+                    if baseline['Amount (GHS)'] else 0
+                volume_text = ' · '.join(f"{row[metric]:,.0f} {label.lower()}"
+                                         for metric, label in source['volumes'].items())
+                st.markdown(f"""
+                    <div class="metric-card">
+                        <div class="metric-label">{title}</div>
+                        <div class="metric-value">{format_money(row['Amount (GHS)'])}</div>
+                        <div class="metric-delta {'positive' if change >= 0 else 'negative'}">{change:+.1f}% revenue</div>
+                        <div style="color: #64748b; margin-top: 8px;">{volume_text}</div>
+                        <div style="color: #64748b;">{format_money(row['Average Value'])} / {source['per_label']}</div>
+                    </div>
+                """, unsafe_allow_html=True)
+
+        chart_col1, chart_col2 = st.columns(2)
+        with chart_col1:
+            st.markdown("### Monthly Revenue")
+            cases = pd.concat([
+                pd.DataFrame({'Date': months, 'Case': case, 'Revenue': to_major(values)})
+                for case, values in [('Current prices', base['Amount (GHS)'].sum(axis=0)),
+                                     ('Best case', monthly['Amount (GHS)'][best]),
+                                     ('Worst case', monthly['Amount (GHS)'][worst])]
+            ])
+            cases_chart = alt.Chart(cases).mark_line(point=True).encode(
+                x=alt.X('Date:T', title=None, axis=alt.Axis(format='%b')),
+                y=alt.Y('Revenue:Q', title='Revenue (GH₵)', axis=alt.Axis(format=',.0f')),
+                color=alt.Color('Case:N', scale=alt.Scale(domain=['Current prices', 'Best case', 'Worst case'],
+                                                          range=[MUTED, ACCENT, '#ef4444']),
+                                legend=alt.Legend(title=None, orient='top')),
+                tooltip=[
+                    alt.Tooltip('Date:T', format='%B %Y', title='Month'),
+                    alt.Tooltip('Case:N'),
+                    alt.Tooltip('Revenue:Q', format=',.2f', title='Revenue (GH₵)')
+                ]
+            ).properties(height=300)
+            st.altair_chart(cases_chart, use_container_width=True)
+
+        with chart_col2:
+            st.markdown("### Revenue Across Scenarios")
+            # Binned in NumPy so the chart carries bins, not every scenario
+            counts, edges = np.histogram(to_major(kpis['Amount (GHS)'].to_numpy()), bins=40)
+            bins = pd.DataFrame({'Low': edges[:-1], 'High': edges[1:], 'Scenarios': counts})
+            histogram = alt.Chart(bins).mark_bar(color=ACCENT, opacity=0.7).encode(
+                x=alt.X('Low:Q', title='Yearly revenue (GH₵)', axis=alt.Axis(format=',.0f')),
+                x2='High:Q',
+                y=alt.Y('Scenarios:Q', title='Scenarios'),
+                tooltip=[
+                    alt.Tooltip('Low:Q', format=',.0f', title='From'),
+                    alt.Tooltip('High:Q', format=',.0f', title='To'),
+                    alt.Tooltip('Scenarios:Q')
+                ]
+            )
+            current = alt.Chart(pd.DataFrame({'Revenue': [to_major(baseline['Amount (GHS)'])]})).mark_rule(
+                color=MUTED, strokeDash=[6, 4], strokeWidth=2
+            ).encode(x='Revenue:Q', tooltip=[alt.Tooltip('Revenue:Q', format=',.2f', title='Current prices')])
+            st.altair_chart((histogram + current).properties(height=300), use_container_width=True)
+
+        with st.expander("Best and worst scenario settings"):
+            settings = scenarios.frame(packages, best).merge(
+                scenarios.frame(packages, worst), on='Subscription Package', suffixes=(' (best)', ' (worst)')
+            )
+            st.dataframe(
+                settings.style.format({col: '{:+.1f}' if '%' in col else '{:.2f}'
+                                       for col in settings.columns if col != 'Subscription Package'}),
+                hide_index=True,
+                use_container_width=True
+            )
+
+    except Exception as e:
+        st.error(f"Error running the simulation: {str(e)}")
+
+else:
+    st.info("👆 Upload Solo or Firm data on its analysis page to simulate price changes.")
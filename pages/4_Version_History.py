@@ -0,0 +1,132 @@
+import streamlit as st
+import pandas as pd
+from utils import StateManager, get_version_diff
+from money import MONEY_COLUMNS, format_money, to_major
+from versions import STATUSES
+
+# Datasets with a version history; `metrics` are compared cell by cell
+SOURCES = {
+    'solo': {'label': 'Solo', 'metrics': ('Amount (GHS)', 'Number of Subscriptions')},
+    'firm': {'label': 'Firm', 'metrics': ('Amount (GHS)', 'Number of Firms', 'Number of Users')}
+}
+
+# Initialize session state
+StateManager.init_session_state()
+
+# Page Configuration
+st.set_page_config(page_title="Version History", page_icon="🕘", layout="wide")
+
+st.title("🕘 Version History")
+
+
+def format_metric(metric, value):
+    """Amounts in cedis, counts with thousands separators"""
+    return format_money(value) if metric in MONEY_COLUMNS else f"{value:,.0f}"
+
+
+def version_label(manifest):
+    return f"v{manifest['version']} · {manifest['name']} ({manifest['created'][:10]})"
+
+
+histories = {data_type: StateManager.dataset_versions(data_type) for data_type in SOURCES}
+available = [data_type for data_type, history in histories.items() if history]
+
+if available:
+    try:
+        with st.sidebar:
+            st.subheader("Compare Versions")
+            data_type = st.radio('Data', options=available, format_func=lambda t: SOURCES[t]['label'],
+                                 horizontal=True, key='versions_data_type')
+            history = histories[data_type]
+            newest_first = history[::-1]
+            after = st.selectbox('Version', newest_first, format_func=version_label,
+                                 key=f'versions_after_{data_type}')
+            older = [m for m in newest_first if m['version'] < after['version']]
+            before = st.selectbox('Compared with', older, format_func=version_label,
+                                  key=f'versions_before_{data_type}') if older else None
+
+        # Every upload of this data type, newest first
+        current_id = st.session_state[f'{data_type}_dataset_id']
+        st.markdown("### Versions")
+        st.dataframe(
+            pd.DataFrame({
+                'Version': [m['version'] for m in newest_first],
+                'File': [m['name'] for m in newest_first],
+                'Rows': [m['rows'] for m in newest_first],
+                'Uploaded': [m['created'].replace('T', ' ')[:16] for m in newest_first],
+                'Dataset': [m['dataset_id'] for m in newest_first],
+                'Open': ['●' if m['dataset_id'] == current_id else '' for m in newest_first]
+            }),
+            column_config={'Rows': st.column_config.NumberColumn(format='localized')},
+            hide_index=True,
+            use_container_width=True
+        )
+
+        if before is None:
+            st.info(f"Only one {SOURCES[data_type]['label']} version is stored; upload a corrected "
+                    f"export on the analysis page to compare versions.")
+        else:
+            metrics = SOURCES[data_type]['metrics']
+            diff = get_version_diff(data_type, before['dataset_id'], after['dataset_id'], metrics)
+            st.markdown(f"### v{before['version']} → v{after['version']}")
+
+            for column, status in zip(st.columns(4), STATUSES + ['Unchanged']):
+                column.metric(f"{status} cells", f"{diff.counts[status]:,}")
+
+            # KPI deltas over the whole dataset and per year
+            kpis = diff.kpis()
+            for column, row in zip(st.columns(len(metrics)), kpis.to_dict('records')):
+                change = format_metric(row['Metric'], row['Change'])
+                column.metric(
+                    row['Metric'],
+                    format_metric(row['Metric'], row['After']),
+                    f"{change} ({row['Change %']:+.1f}%)" if pd.notna(row['Change %']) else change
+                )
+
+            yearly = diff.kpis(by_year=True)
+            changed_years = yearly[yearly['Change'] != 0]
+            if not changed_years.empty:
+                st.markdown("#### Totals by Year")
+                st.dataframe(
+                    changed_years.assign(**{col: [format_metric(m, v) for m, v in zip(changed_years['Metric'],
+                                                                                      changed_years[col])]
+                                            for col in ['Before', 'After', 'Change']}),
+                    column_config={'Year': st.column_config.NumberColumn(format='%d'),
+                                   'Change %': st.column_config.NumberColumn(format='%+.1f%%')},
+                    hide_index=True,
+                    use_container_width=True
+                )
+
+            if len(diff.cells):
+                st.markdown("#### Cells")
+                shown = st.multiselect('Show', STATUSES, default=STATUSES, key='versions_statuses')
+                cells = diff.cells[diff.cells['Status'].isin(shown)]
+                money = [col for col in cells.columns if col.startswith(tuple(MONEY_COLUMNS))]
+                st.dataframe(
+                    cells.assign(**{col: to_major(cells[col]) for col in money}),
+                    column_config={
+                        'Year': st.column_config.NumberColumn(format='%d'),
+                        **{col: st.column_config.NumberColumn(format='GH₵%.2f') for col in money}
+                    },
+                    hide_index=True,
+                    use_container_width=True
+                )
+
+                st.markdown("#### Results Affected")
+                st.caption("Which results come out different for the newer version, and for which years or "
+                           "packages. Results are cached per dataset, so opening a version computes all of "
+                           "them afresh; this is an impact report, not a list of what gets recomputed.")
+                st.dataframe(diff.stale(), hide_index=True, use_container_width=True)
+            else:
+                st.success("Both versions hold identical figures.")
+
+            if after['dataset_id'] != current_id:
+                if st.button(f"Open v{after['version']} for analysis", key='versions_open'):
+                    StateManager.open_dataset(after['dataset_id'], data_type=data_type)
+                    st.rerun()
+
+    except Exception as e:
+        st.error(f"Error comparing versions: {str(e)}")
+
+else:
+    st.info("👆 Upload Solo or Firm data on its analysis page to start its version history.")
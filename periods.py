@@ -0,0 +1,92 @@
+import os
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from schema import MONTH_ORDER
+
+# First month of the fiscal year (1 = January, 7 = July). Fiscal years are
+# named after the calendar year they end in.
+FISCAL_YEAR_START = int(os.environ.get('DENNISLAW_FISCAL_YEAR_START', '1'))
+
+CALENDAR_COLUMNS = ['Period', 'Month Ordinal', 'Quarter', 'Half',
+                    'Fiscal Year', 'Fiscal Quarter', 'Fiscal Month']
+
+
+def period_key(year, month_ordinal):
+    """Months since year 0: one integer per (Year, Month), ordered in time"""
+    return np.asarray(year, dtype=np.int64) * 12 + np.asarray(month_ordinal, dtype=np.int64)
+
+
+def build_calendar(first_year: int, last_year: int,
+                   fiscal_start: int = FISCAL_YEAR_START) -> pd.DataFrame:
+    """One row per month from January of first_year to December of last_year
+
+    Rows are positioned by period key, so row i is period first_year * 12 + i
+    and joins are a single take.
+    """
+    period = np.arange(first_year * 12, (last_year + 1) * 12, dtype=np.int64)
+    ordinal = period % 12
+    fiscal_period = period - (fiscal_start - 1)
+    return pd.DataFrame({
+        'Period': period,
+        'Year': (period // 12).astype(np.int32),
+        'Month': pd.Categorical.from_codes(ordinal, categories=MONTH_ORDER, ordered=True),
+        'Month Ordinal': ordinal.astype(np.int8),
+        'Quarter': (ordinal // 3 + 1).astype(np.int8),
+        'Half': (ordinal // 6 + 1).astype(np.int8),
+        'Fiscal Year': (fiscal_period // 12 + (fiscal_start != 1)).astype(np.int32),
+        'Fiscal Quarter': (fiscal_period % 12 // 3 + 1).astype(np.int8),
+        'Fiscal Month': (fiscal_period % 12).astype(np.int8)
+    })
+
+
+def join_calendar(df: pd.DataFrame, calendar: pd.DataFrame) -> pd.DataFrame:
+    """Add the calendar columns to a frame with Year and (categorical) Month
+
+    The join key is the integer period; rows are looked up by position
+    instead of hashing month names.
+    """
+    period = period_key(df['Year'].to_numpy(), df['Month'].cat.codes.to_numpy())
+    rows = period - calendar['Period'].iat[0]
+    joined = calendar[CALENDAR_COLUMNS].take(rows).reset_index(drop=True)
+    joined.index = df.index
+    return df.join(joined)
+
+
+def comparison_windows(last_period: int,
+                       fiscal_start: int = FISCAL_YEAR_START) -> Dict[str, Tuple[int, int]]:
+    """Inclusive period ranges ending at (or containing) last_period
+
+    'quarter' is the whole calendar quarter, 'ytd' runs from January and
+    'fiscal_ytd' from the first month of the fiscal year. The same window a
+    year earlier is the range shifted by 12.
+    """
+    ordinal = last_period % 12
+    quarter_start = last_period - ordinal % 3
+    fiscal_month = (ordinal - (fiscal_start - 1)) % 12
+    return {
+        'quarter': (quarter_start, quarter_start + 2),
+        'ytd': (last_period - ordinal, last_period),
+        'fiscal_ytd': (last_period - fiscal_month, last_period)
+    }
+
+
+def window_growth(df: pd.DataFrame, window: Tuple[int, int], metric: str) -> float:
+    """Growth (%) of a metric over a period range against the year before
+
+    Returns 0 when the earlier window has nothing to compare against.
+    """
+    period = df['Period'].to_numpy()
+    values = df[metric].to_numpy()
+    start, end = window
+    current = values[(period >= start) & (period <= end)].sum()
+    previous = values[(period >= start - 12) & (period <= end - 12)].sum()
+    return float((current - previous) / previous * 100) if previous > 0 else 0
+
+
+def fiscal_label(fiscal_year: int, fiscal_start: int = FISCAL_YEAR_START) -> str:
+    """'FY2024' style label, or just the year when the fiscal year is the calendar year"""
+    return f"FY{fiscal_year}" if fiscal_start != 1 else str(fiscal_year)
+
@@ -0,0 +1,182 @@
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from anomalies import MAD_SCALE, THRESHOLD
+from kernels import encode_keys, safe_ratio
+from schema import MONTH_ORDER
+
+# Row-level consistency rules per dataset: rule -> mask over the column arrays
+CHECKS: Dict[str, Dict[str, Callable[[Dict[str, np.ndarray]], np.ndarray]]] = {
+    'solo': {
+        'Revenue with zero subscriptions':
+            lambda v: (v['Number of Subscriptions'] == 0) & (v['Amount (GHS)'] > 0),
+        'Subscriptions with zero revenue':
+            lambda v: (v['Number of Subscriptions'] > 0) & (v['Amount (GHS)'] == 0)
+    },
+    'firm': {
+        'Revenue with zero users':
+            lambda v: (v['Number of Users'] == 0) & (v['Amount (GHS)'] > 0),
+        'Fewer users than firms':
+            lambda v: v['Number of Users'] < v['Number of Firms'],
+        'Users with zero revenue':
+            lambda v: (v['Number of Users'] > 0) & (v['Amount (GHS)'] == 0)
+    }
+}
+
+# Outlying rows kept in the profile, most extreme first
+MAX_OUTLIERS = 50
+
+
+@dataclass
+class QualityProfile:
+    """Data-quality summary of one dataset, stored next to it as JSON
+
+    Table-like fields are lists of records so the profile round-trips
+    through json without pandas.
+    """
+    rows: int
+    columns: List[Dict]
+    duplicate_keys: int
+    duplicate_rows: int
+    gaps: List[Dict]
+    checks: Dict[str, int]
+    outlier_rows: int
+    outliers: List[Dict]
+
+    @property
+    def missing_months(self) -> int:
+        return sum(gap['Missing Months'] for gap in self.gaps)
+
+    @property
+    def issues(self) -> int:
+        """Duplicated rows, missing package months, rule violations and outliers"""
+        return self.duplicate_rows + self.missing_months + sum(self.checks.values()) + self.outlier_rows
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'QualityProfile':
+        return cls(**data)
+
+
+def _codes(values: pd.Series):
+    """Integer codes and labels of a categorical or plain column"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy().astype(np.int64), values.cat.categories.astype(str).to_numpy()
+    labels, codes = np.unique(values.to_numpy(dtype=str), return_inverse=True)
+    return codes.astype(np.int64), labels
+
+
+def group_medians(codes: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    """Median of `values` within each group, from a single lexsort"""
+    order = np.lexsort((values, codes))
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    ordered = values[order].astype(np.float64)
+    medians = np.full(n_groups, np.nan)
+    present = counts > 0
+    low = starts[present] + (counts[present] - 1) // 2
+    high = starts[present] + counts[present] // 2
+    medians[present] = (ordered[low] + ordered[high]) / 2
+    return medians
+
+
+def profile_dataset(df: pd.DataFrame, data_type: str, threshold: float = THRESHOLD) -> QualityProfile:
+    """Profile a normalized dataset with array operations over whole columns
+
+    - columns: nulls, zeros, distinct values and range of every column
+    - duplicates: rows sharing a (Year, Month, Package) key, which every
+      groupby would silently add together
+    - gaps: months between a package's first and last month with no row
+    - checks: rows breaking the dataset's CHECKS rules
+    - outliers: counts and amounts whose robust z-score within their
+      package exceeds `threshold` (median/MAD, as in anomalies.py)
+    """
+    rows = len(df)
+    month_codes, month_labels = _codes(df['Month'])
+    calendar = np.array([MONTH_ORDER.index(m) if m in MONTH_ORDER else 0 for m in month_labels] + [0])
+    package_codes, packages = _codes(df['Subscription Package'])
+    years = df['Year'].to_numpy().astype(np.int64)
+    metrics = [col for col in df.columns
+               if col not in ('Year', 'Month', 'Subscription Package') and pd.api.types.is_numeric_dtype(df[col])]
+    values = {col: df[col].to_numpy() for col in metrics}
+
+    columns = []
+    for col in df.columns:
+        column = df[col]
+        numeric = pd.api.types.is_numeric_dtype(column) and not isinstance(column.dtype, pd.CategoricalDtype)
+        columns.append({
+            'Column': col,
+            'Type': str(column.dtype),
+            'Nulls': int(column.isna().sum()),
+            'Zeros': int((column.to_numpy() == 0).sum()) if numeric else 0,
+            'Distinct': int(column.nunique()),
+            'Min': column.min().item() if numeric and rows else None,
+            'Max': column.max().item() if numeric and rows else None
+        })
+
+    duplicate_keys = duplicate_rows = 0
+    gaps = []
+    if rows:
+        # One (package, month) key per row drives duplicates and gaps
+        periods = years * 12 + calendar[month_codes]
+        first_period = int(periods.min())
+        n_periods = int(periods.max()) - first_period + 1
+        key = encode_keys([package_codes, periods - first_period], [len(packages), n_periods])
+        counts = np.bincount(key, minlength=len(packages) * n_periods)
+        duplicate_keys = int((counts > 1).sum())
+        duplicate_rows = int(counts[counts > 1].sum())
+
+        present = counts.reshape(len(packages), n_periods) > 0
+        first = present.argmax(axis=1)
+        last = n_periods - 1 - present[:, ::-1].argmax(axis=1)
+        span = np.arange(n_periods)
+        missing = ~present & (span >= first[:, None]) & (span <= last[:, None])
+        for package in np.flatnonzero(missing.any(axis=1)):
+            months = (np.flatnonzero(missing[package]) + first_period).tolist()
+            gaps.append({
+                'Subscription Package': str(packages[package]),
+                'Missing Months': len(months),
+                'Months': ', '.join(f"{MONTH_ORDER[p % 12][:3]} {p // 12}" for p in months)
+            })
+
+    checks = {rule: int(mask(values).sum()) for rule, mask in CHECKS.get(data_type, {}).items()}
+
+    outliers = []
+    outlier_rows = np.zeros(rows, dtype=bool)
+    for col in metrics:
+        medians = group_medians(package_codes, values[col], len(packages))
+        deviation = values[col] - medians[package_codes]
+        mad = group_medians(package_codes, np.abs(deviation), len(packages))
+        scores = MAD_SCALE * safe_ratio(deviation, mad[package_codes])
+        flagged = np.abs(np.nan_to_num(scores)) > threshold
+        outlier_rows |= flagged
+        # Only the most extreme rows of each column become records
+        flagged = np.flatnonzero(flagged)
+        strongest = flagged[np.argsort(-np.abs(scores[flagged]), kind='stable')[:MAX_OUTLIERS]]
+        for row in strongest:
+            outliers.append({
+                'Year': int(years[row]),
+                'Month': MONTH_ORDER[calendar[month_codes[row]]],
+                'Subscription Package': str(packages[package_codes[row]]),
+                'Column': col,
+                'Value': values[col][row].item(),
+                'Package Median': float(medians[package_codes[row]]),
+                'Score': round(float(scores[row]), 2)
+            })
+    outliers.sort(key=lambda o: -abs(o['Score']))
+
+    return QualityProfile(
+        rows=rows,
+        columns=columns,
+        duplicate_keys=duplicate_keys,
+        duplicate_rows=duplicate_rows,
+        gaps=gaps,
+        checks=checks,
+        outlier_rows=int(outlier_rows.sum()),
+        outliers=outliers[:MAX_OUTLIERS]
+    )
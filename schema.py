@@ -0,0 +1,30 @@
+import pyarrow as pa
+
+# Constants
+MONTH_ORDER = [
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December'
+]
+
+REQUIRED_COLUMNS = {
+    'solo': ['Month', 'Year', 'Subscription Package',
+             'Number of Subscriptions', 'Amount (GHS)'],
+    'firm': ['Month', 'Year', 'Subscription Package',
+             'Number of Users', 'Number of Firms', 'Amount (GHS)']
+}
+
+# Explicit parse types for every known column; Month and package are parsed
+# dictionary-encoded so their strings are only materialized once per value
+COLUMN_TYPES = {
+    'Month': pa.dictionary(pa.int32(), pa.string()),
+    'Year': pa.int32(),
+    'Subscription Package': pa.dictionary(pa.int32(), pa.string()),
+    'Number of Subscriptions': pa.int64(),
+    'Number of Users': pa.int64(),
+    'Number of Firms': pa.int64(),
+    'Amount (GHS)': pa.float64()
+}
+
+# Stored types that differ from the parse types: amounts are held as int64
+# minor units (see money.py)
+STORED_TYPES = {**COLUMN_TYPES, 'Amount (GHS)': pa.int64()}
@@ -0,0 +1,85 @@
+from dataclasses import dataclass
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+from kernels import safe_ratio
+
+# Upper bound on scenarios evaluated at once: (scenarios × packages) factors
+# are materialized, contracted against each (packages × months) metric
+MAX_SCENARIOS = 10_000
+
+
+@dataclass
+class Scenarios:
+    """Price change and volume elasticity of every package in every scenario
+
+    Both arrays are (n_scenarios, n_packages). A price change of 0.1 is a
+    10% rise; the volume change is elasticity × price change, so an
+    elasticity of -0.5 loses 5% of the volume on a 10% rise.
+    """
+    price_change: np.ndarray
+    elasticity: np.ndarray
+
+    def volume_change(self) -> np.ndarray:
+        """Fractional volume change per scenario and package (never below -100%)"""
+        return np.maximum(self.elasticity * self.price_change, -1.0)
+
+    def frame(self, packages: Sequence[str], scenario: int) -> pd.DataFrame:
+        """Per-package settings of one scenario, in percent"""
+        return pd.DataFrame({
+            'Subscription Package': packages,
+            'Price Change %': self.price_change[scenario] * 100,
+            'Elasticity': self.elasticity[scenario],
+            'Volume Change %': self.volume_change()[scenario] * 100
+        })
+
+
+def scenario_grid(price_ranges: np.ndarray, elasticity_ranges: np.ndarray, steps: int,
+                  count: int = MAX_SCENARIOS, seed: int = 0) -> Scenarios:
+    """Scenarios drawn from evenly spaced levels of each package's ranges
+
+    `price_ranges` and `elasticity_ranges` are (n_packages, 2) [low, high]
+    arrays. Every combination is enumerated when there are at most `count`;
+    otherwise `count` combinations are sampled, each package picking its
+    levels independently.
+    """
+    n_packages = len(price_ranges)
+    fractions = np.linspace(0, 1, steps)
+    price_levels = price_ranges[:, :1] + (price_ranges[:, 1:] - price_ranges[:, :1]) * fractions
+    elasticity_levels = elasticity_ranges[:, :1] + (elasticity_ranges[:, 1:] - elasticity_ranges[:, :1]) * fractions
+
+    dimensions = (steps,) * (2 * n_packages)
+    if steps ** (2 * n_packages) <= count:
+        picks = np.stack(np.unravel_index(np.arange(steps ** (2 * n_packages)), dimensions), axis=1)
+    else:
+        picks = np.random.default_rng(seed).integers(0, steps, (count, 2 * n_packages))
+    packages = np.arange(n_packages)
+    return Scenarios(
+        price_change=price_levels[packages, picks[:, :n_packages]],
+        elasticity=elasticity_levels[packages, picks[:, n_packages:]]
+    )
+
+
+def simulate(base: Dict[str, np.ndarray], scenarios: Scenarios, revenue: str,
+             volumes: Sequence[str]) -> Dict[str, np.ndarray]:
+    """Monthly totals of every metric under every scenario
+
+    `base` holds (n_packages, n_months) arrays. Volumes scale by the volume
+    change and revenue by both price and volume; summing over packages is a
+    (scenario × package) @ (package × month) matrix product, so each metric
+    comes back as an (n_scenarios, n_months) array without a scenario ×
+    package × month intermediate.
+    """
+    volume = 1 + scenarios.volume_change()
+    results = {metric: volume @ base[metric] for metric in volumes}
+    results[revenue] = ((1 + scenarios.price_change) * volume) @ base[revenue]
+    return results
+
+
+def scenario_kpis(monthly: Dict[str, np.ndarray], revenue: str, per: str) -> pd.DataFrame:
+    """Yearly totals and average value (revenue per `per`) of every scenario"""
+    totals = {metric: values.sum(axis=-1) for metric, values in monthly.items()}
+    totals['Average Value'] = safe_ratio(totals[revenue], totals[per])
+    return pd.DataFrame(totals)
@@ -0,0 +1,162 @@
+import os
+import json
+import hashlib
+import tempfile
+from datetime import datetime, timezone
+from typing import IO, Callable, Dict, List, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+
+from money import MINOR_UNITS
+
+# Shared directory for normalized datasets. Every Streamlit worker on the
+# host points at the same directory, so a dataset parsed by one worker is
+# memory-mapped by the others straight from the OS page cache.
+DATA_DIR = os.environ.get(
+    'DENNISLAW_DATA_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.data')
+)
+
+
+class DatasetStore:
+    """Arrow IPC files holding normalized datasets, one file per upload"""
+
+    def __init__(self, root: str = DATA_DIR):
+        self.root = root
+
+    @staticmethod
+    def dataset_id(raw: bytes) -> str:
+        """Content hash identifying an uploaded file
+
+        Stored amounts depend on the configured minor unit, so it is part
+        of the hash.
+        """
+        digest = hashlib.sha256(raw)
+        digest.update(f":minor_units={MINOR_UNITS}".encode())
+        return digest.hexdigest()[:16]
+
+    def path(self, data_type: str, dataset_id: str) -> str:
+        return os.path.join(self.root, data_type, f"{dataset_id}.arrow")
+
+    def exists(self, data_type: str, dataset_id: str) -> bool:
+        return os.path.exists(self.path(data_type, dataset_id))
+
+    @staticmethod
+    def _publish(path: str, write: Callable[[IO[bytes]], object]):
+        """Write through a temporary file and rename, so other processes never open a partial file"""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as sink:
+                write(sink)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def write(self, data: Union[pd.DataFrame, pa.Table], data_type: str, dataset_id: str,
+              name: Optional[str] = None, **metadata) -> str:
+        """Persist a normalized frame or table as a single-chunk Arrow IPC file"""
+        path = self.path(data_type, dataset_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # One contiguous chunk per column keeps the mapped columns zero-copy
+        table = data if isinstance(data, pa.Table) else pa.Table.from_pandas(data, preserve_index=False)
+        table = table.combine_chunks()
+
+        manifest = {
+            'dataset_id': dataset_id,
+            'data_type': data_type,
+            'name': name or dataset_id,
+            'rows': table.num_rows,
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'minor_units': MINOR_UNITS,
+            **metadata
+        }
+
+        def write_table(sink):
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+        # The manifest lands first and the Arrow file last: exists() checks the
+        # Arrow file, so a dataset is never seen without its manifest
+        self._publish(path[:-len('.arrow')] + '.json', lambda sink: sink.write(json.dumps(manifest).encode()))
+        self._publish(path, write_table)
+        return path
+
+    def report_path(self, data_type: str, dataset_id: str) -> str:
+        return self.path(data_type, dataset_id)[:-len('.arrow')] + '.issues.csv'
+
+    def write_report(self, report: pd.DataFrame, data_type: str, dataset_id: str) -> Optional[str]:
+        """Persist the bad-row report of an upload next to its dataset"""
+        if report.empty:
+            return None
+        path = self.report_path(data_type, dataset_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        report.to_csv(path, index=False)
+        return path
+
+    def read_report(self, data_type: str, dataset_id: str) -> Optional[bytes]:
+        """CSV bytes of the bad-row report, None when no rows were flagged"""
+        path = self.report_path(data_type, dataset_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def profile_path(self, data_type: str, dataset_id: str) -> str:
+        return self.path(data_type, dataset_id)[:-len('.arrow')] + '.profile.json'
+
+    def write_profile(self, profile: Dict, data_type: str, dataset_id: str) -> str:
+        """Persist the data-quality profile of a dataset next to it"""
+        path = self.profile_path(data_type, dataset_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(profile, f)
+        return path
+
+    def read_profile(self, data_type: str, dataset_id: str) -> Optional[Dict]:
+        """Stored data-quality profile, None for datasets written before profiling"""
+        path = self.profile_path(data_type, dataset_id)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def manifest(self, data_type: str, dataset_id: str) -> Dict:
+        """Metadata recorded when the dataset was written"""
+        with open(self.path(data_type, dataset_id)[:-len('.arrow')] + '.json') as f:
+            return json.load(f)
+
+    def read_table(self, data_type: str, dataset_id: str) -> pa.Table:
+        """Memory-map a stored dataset as an Arrow table without copying"""
+        source = pa.memory_map(self.path(data_type, dataset_id), 'r')
+        return pa.ipc.open_file(source).read_all()
+
+    def read(self, data_type: str, dataset_id: str) -> pd.DataFrame:
+        """Memory-map a stored dataset; numeric columns share the mapped pages"""
+        return self.read_table(data_type, dataset_id).to_pandas(split_blocks=True)
+
+    def list(self, data_type: str) -> List[Dict]:
+        """Manifests of stored datasets, newest first"""
+        directory = os.path.join(self.root, data_type)
+        if not os.path.isdir(directory):
+            return []
+
+        manifests = []
+        for filename in os.listdir(directory):
+            if not filename.endswith('.json'):
+                continue
+            dataset_id = filename[:-len('.json')]
+            if not self.exists(data_type, dataset_id):
+                continue
+            manifest = self.manifest(data_type, dataset_id)
+            # Datasets written with other money units are not comparable
+            if manifest.get('minor_units') == MINOR_UNITS:
+                manifests.append(manifest)
+        return sorted(manifests, key=lambda m: m['created'], reverse=True)
+
+    def versions(self, data_type: str) -> List[Dict]:
+        """Stored datasets as numbered versions, oldest (version 1) first"""
+        history = sorted(self.list(data_type), key=lambda m: m['created'])
+        return [{**manifest, 'version': number} for number, manifest in enumerate(history, start=1)]
@@ -0,0 +1,202 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from kernels import safe_ratio
+from periods import period_key
+from schema import MONTH_ORDER
+
+# Trailing windows (months) for rolling sums
+WINDOWS = (3, 6, 12)
+
+# Series columns in the metric's own units (the rest are percentages)
+SUM_COLUMNS = ['Value'] + [f'Rolling {window}M' for window in WINDOWS] + ['YTD']
+
+
+@dataclass
+class MonthlyPanel:
+    """Dense Package × month arrays over a continuous monthly timeline
+
+    Every metric is a (n_packages, n_periods) array; months without sales
+    are zero, so windows and lags are plain offsets along the time axis.
+    """
+    periods: np.ndarray
+    packages: np.ndarray
+    values: Dict[str, np.ndarray]
+
+    def select(self, packages: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """One summed series per metric over the chosen packages (all when None)"""
+        rows = np.ones(len(self.packages), dtype=bool) if packages is None \
+            else np.isin(self.packages, list(packages))
+        return {metric: values[rows].sum(axis=0) for metric, values in self.values.items()}
+
+
+def build_panel(monthly: pd.DataFrame, metrics: List[str]) -> MonthlyPanel:
+    """Scatter (Year, Month, Package) sums into dense per-package arrays"""
+    period = period_key(monthly['Year'].to_numpy(), monthly['Month'].cat.codes.to_numpy())
+    periods = np.arange(period.min(), period.max() + 1) if len(period) else np.array([], dtype=np.int64)
+    packages, rows = np.unique(monthly['Subscription Package'].to_numpy(dtype=str), return_inverse=True)
+    columns = period - (periods[0] if len(periods) else 0)
+
+    values = {}
+    for metric in metrics:
+        source = monthly[metric].to_numpy()
+        dense = np.zeros((len(packages), len(periods)), dtype=source.dtype)
+        dense[rows, columns] = source
+        values[metric] = dense
+    return MonthlyPanel(periods, packages, values)
+
+
+def rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing sums along the last axis, NaN until a full window is available"""
+    # Differences of the running total; integer metrics stay exact
+    cumulative = np.cumsum(values, axis=-1)
+    result = np.full(values.shape, np.nan)
+    if values.shape[-1] >= window:
+        sums = cumulative[..., window - 1:].copy()
+        sums[..., 1:] -= cumulative[..., :-window]
+        result[..., window - 1:] = sums
+    return result
+
+
+def lag_growth(values: np.ndarray, lag: int) -> np.ndarray:
+    """Change (%) against the value `lag` months earlier, NaN without a base"""
+    result = np.full(values.shape, np.nan)
+    if values.shape[-1] > lag:
+        current, base = values[..., lag:], values[..., :-lag]
+        result[..., lag:] = safe_ratio(current - base, base) * 100
+    return result
+
+
+def year_to_date(values: np.ndarray, periods: np.ndarray) -> np.ndarray:
+    """Cumulative sums that restart every January"""
+    cumulative = np.cumsum(values, axis=-1)
+    if not len(periods):
+        return cumulative
+    # Position of the month before each month's January (-1 when off the timeline)
+    before = periods - periods % 12 - periods[0] - 1
+    offset = np.where(before >= 0, cumulative[..., np.maximum(before, 0)], 0)
+    return cumulative - offset
+
+
+def series_frame(periods: np.ndarray, values: np.ndarray,
+                 windows: Sequence[int] = WINDOWS) -> pd.DataFrame:
+    """Long frame of one monthly series with its windows and growth rates"""
+    frame = pd.DataFrame({
+        'Period': periods,
+        'Date': pd.to_datetime(pd.DataFrame({'year': periods // 12, 'month': periods % 12 + 1, 'day': 1})),
+        'Value': values
+    })
+    for window in windows:
+        frame[f'Rolling {window}M'] = rolling_sum(values, window)
+    frame['MoM %'] = lag_growth(values, 1)
+    frame['YoY %'] = lag_growth(values, 12)
+    frame['YTD'] = year_to_date(values, periods)
+    return frame
+
+
+def package_summary(panel: MonthlyPanel, metric: str) -> pd.DataFrame:
+    """Latest-month windows and growth for every package in one pass"""
+    values = panel.values[metric]
+    last = np.s_[:, -1]
+    summary = {'Subscription Package': panel.packages}
+    for window in WINDOWS:
+        summary[f'Rolling {window}M'] = rolling_sum(values, window)[last]
+    summary['MoM %'] = lag_growth(values, 1)[last]
+    summary['YoY %'] = lag_growth(values, 12)[last]
+    summary['YTD'] = year_to_date(values, panel.periods)[last]
+    return pd.DataFrame(summary)
+
+
+@dataclass
+class YearPivot:
+    """Year × Month arrays of every metric for a set of compared years
+
+    Built from one (Year, Month) aggregate; yearly totals, deltas against a
+    baseline year and chart rows are all reductions of the same arrays.
+    """
+    years: np.ndarray
+    values: Dict[str, np.ndarray]
+    observed: np.ndarray
+
+    def totals(self, months: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Per-year sums over the chosen months (all when None), indexed by Year"""
+        columns = slice(None) if months is None else [MONTH_ORDER.index(m) for m in months]
+        return pd.DataFrame(
+            {metric: values[:, columns].sum(axis=1) for metric, values in self.values.items()},
+            index=pd.Index(self.years, name='Year')
+        )
+
+    def deltas(self, baseline: int, months: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Change (%) of every year's totals against the baseline year"""
+        totals = self.totals(months)
+        base = totals.loc[baseline].to_numpy()
+        current = totals.to_numpy()
+        return pd.DataFrame(safe_ratio(current - base, base) * 100,
+                            index=totals.index, columns=totals.columns)
+
+    def frame(self) -> pd.DataFrame:
+        """(Year, Month, metrics) rows for the months with data, in calendar order"""
+        rows, months = np.nonzero(self.observed)
+        return pd.DataFrame({
+            'Year': self.years[rows],
+            'Month': pd.Categorical.from_codes(months, categories=MONTH_ORDER, ordered=True),
+            **{metric: values[rows, months] for metric, values in self.values.items()}
+        })
+
+
+def build_year_pivot(monthly: pd.DataFrame, metrics: List[str], years: Sequence[int]) -> YearPivot:
+    """Scatter a (Year, Month) aggregate into Year × Month arrays"""
+    years = np.asarray(sorted(years))
+    rows = np.searchsorted(years, monthly['Year'].to_numpy())
+    months = monthly['Month'].cat.codes.to_numpy()
+
+    observed = np.zeros((len(years), len(MONTH_ORDER)), dtype=bool)
+    observed[rows, months] = True
+    values = {}
+    for metric in metrics:
+        source = monthly[metric].to_numpy()
+        grid = np.zeros((len(years), len(MONTH_ORDER)), dtype=source.dtype)
+        grid[rows, months] = source
+        values[metric] = grid
+    return YearPivot(years, values, observed)
+
+
+def seasonal_shares(panel: MonthlyPanel, metrics: Sequence[str],
+                    total_label: str = 'All Packages') -> pd.DataFrame:
+    """Average share of each year's total falling in each calendar month
+
+    The panel is folded into Package × Year × Month arrays and every year is
+    normalized by its own total, so growth between years does not weigh on
+    the shape. Only complete calendar years are averaged when the timeline
+    has any; years without sales are left out. A `total_label` row gives the
+    shape of all packages together.
+
+    Returns long (Metric, Subscription Package, Month, Share) rows.
+    """
+    first_year = int(panel.periods[0]) // 12
+    n_years = int(panel.periods[-1]) // 12 - first_year + 1
+    columns = panel.periods - first_year * 12
+    starts = (first_year + np.arange(n_years)) * 12
+    complete = (starts >= panel.periods[0]) & (starts + 11 <= panel.periods[-1])
+    years = complete if complete.any() else np.ones(n_years, dtype=bool)
+    labels = np.concatenate([[total_label], panel.packages])
+
+    frames = []
+    for metric in metrics:
+        values = panel.values[metric]
+        grid = np.zeros((len(labels), n_years * 12))
+        grid[:, columns] = np.vstack([values.sum(axis=0, keepdims=True), values])
+        grid = grid.reshape(len(labels), n_years, 12)[:, years]
+        shares = safe_ratio(grid, grid.sum(axis=-1, keepdims=True))
+        counted = (~np.isnan(shares[..., 0])).sum(axis=1)
+        average = safe_ratio(np.nansum(shares, axis=1), counted[:, None])
+        frames.append(pd.DataFrame({
+            'Metric': metric,
+            'Subscription Package': np.repeat(labels, 12),
+            'Month': pd.Categorical(np.tile(MONTH_ORDER, len(labels)), categories=MONTH_ORDER, ordered=True),
+            'Share': average.ravel()
+        }))
+    return pd.concat(frames, ignore_index=True)
@@ -1,14 +1,184 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 from typing import Optional, Dict, List, Any
 from dataclasses import dataclass, field
 from functools import wraps
+from schema import MONTH_ORDER
+from store import DatasetStore
+from engines import ENGINE, create_engine
+from ingest import UploadError, store_upload
+from periods import build_calendar
+from timeseries import MonthlyPanel, build_panel, seasonal_shares
+from forecast import Forecast, fit_panel
+from anomalies import find_anomalies
+from money import in_major, to_major
+from quality import QualityProfile, profile_dataset
+from versions import KEY_COLUMNS, VersionDiff, diff_cubes
+from watch import WATCH_DIR, BackgroundWatcher, DirectoryWatcher
+from grid import PAGE_SIZES, GridIndex, build_index, combine_masks, page_rows
 
-# Constants
-MONTH_ORDER = [
-    'January', 'February', 'March', 'April', 'May', 'June',
-    'July', 'August', 'September', 'October', 'November', 'December'
-]
+
+@st.cache_resource
+def get_store() -> DatasetStore:
+    """Dataset store shared by every session in this process"""
+    return DatasetStore()
+
+@st.cache_resource
+def get_watcher() -> Optional[BackgroundWatcher]:
+    """Background ingestion of DENNISLAW_WATCH_DIR, started once per process"""
+    if not WATCH_DIR:
+        return None
+    watcher = BackgroundWatcher(DirectoryWatcher(WATCH_DIR, get_store()))
+    watcher.start()
+    return watcher
+
+@st.cache_resource(max_entries=16)
+def get_dataset(data_type: str, dataset_id: str) -> pd.DataFrame:
+    """Memory-mapped dataset, mapped once per process and shared by sessions"""
+    return get_store().read(data_type, dataset_id)
+
+@st.cache_resource
+def get_engine():
+    """Query engine behind both analysis pages (see DENNISLAW_ENGINE)"""
+    return create_engine(ENGINE, get_store(), get_dataset, MONTH_ORDER)
+
+@st.cache_resource(max_entries=16)
+def get_calendar(data_type: str, dataset_id: str) -> pd.DataFrame:
+    """Calendar dimension covering a dataset's years, built once per dataset"""
+    years = get_engine().aggregate(data_type, dataset_id, by=['Year'])['Year']
+    return build_calendar(int(years.min()), int(years.max()))
+
+@st.cache_resource(max_entries=16)
+def get_panel(data_type: str, dataset_id: str, metrics: tuple) -> MonthlyPanel:
+    """Package × month arrays over the dataset's whole timeline"""
+    monthly = get_engine().aggregate(data_type, dataset_id,
+                                     by=['Year', 'Month', 'Subscription Package'],
+                                     metrics=list(metrics))
+    return build_panel(monthly, list(metrics))
+
+@st.cache_resource(max_entries=16)
+def get_seasonality(data_type: str, dataset_id: str, metrics: tuple) -> pd.DataFrame:
+    """Average share of each year falling in each month, per package"""
+    return seasonal_shares(get_panel(data_type, dataset_id, metrics), list(metrics))
+
+@st.cache_resource(max_entries=16)
+def get_forecast(data_type: str, dataset_id: str, metrics: tuple) -> Forecast:
+    """Next-quarter forecasts for every package, fitted once per dataset"""
+    return fit_panel(get_panel(data_type, dataset_id, metrics))
+
+@st.cache_resource(max_entries=16)
+def get_anomalies(data_type: str, dataset_id: str, metrics: tuple) -> pd.DataFrame:
+    """Unusual (package, month) cells of every metric, scored once per dataset"""
+    return find_anomalies(get_panel(data_type, dataset_id, metrics),
+                          get_forecast(data_type, dataset_id, metrics))
+
+@st.cache_resource(max_entries=16)
+def get_grid_index(data_type: str, dataset_id: str) -> GridIndex:
+    """Sort orders and search codes of a dataset's raw rows"""
+    return build_index(get_dataset(data_type, dataset_id))
+
+def raw_data_grid(df: pd.DataFrame, data_type: str, dataset_id: str, mask: Optional[np.ndarray],
+                  column_config: Dict[str, Any], derive=None) -> np.ndarray:
+    """Paginated raw rows passing `mask`, searched and sorted on the server
+
+    Only the page on screen is copied out of the dataset and sent to the
+    browser. Returns the positions of every matching row in sort order, for
+    downloads.
+    """
+    index = get_grid_index(data_type, dataset_id)
+    search_col, sort_col, order_col = st.columns([2, 2, 1])
+    with search_col:
+        term = st.text_input("Search", placeholder="Package, month or year", key=f'{data_type}_grid_search')
+    with sort_col:
+        sort_by = st.selectbox("Sort by", options=list(df.columns), key=f'{data_type}_grid_sort')
+    with order_col:
+        descending = st.toggle("Descending", key=f'{data_type}_grid_descending')
+    rows = page_rows(index, combine_masks([mask, index.search(term)]), sort_by, descending)
+
+    size_col, page_col = st.columns(2)
+    with size_col:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, key=f'{data_type}_grid_page_size')
+    pages = max(-(-len(rows) // page_size), 1)
+    # Narrower filters can leave the remembered page past the end
+    if st.session_state.get(f'{data_type}_grid_page', 1) > pages:
+        st.session_state[f'{data_type}_grid_page'] = pages
+    with page_col:
+        page = st.number_input("Page", min_value=1, max_value=pages, step=1, key=f'{data_type}_grid_page')
+
+    start = (page - 1) * page_size
+    view = in_major(df.iloc[rows[start:start + page_size]])
+    if derive is not None:
+        view = derive(view)
+    st.dataframe(view, column_config=column_config, hide_index=True, use_container_width=True)
+    st.caption(f"Rows {start + 1:,}–{start + len(view):,} of {len(rows):,}" if len(rows) else "No matching rows")
+    return rows
+
+@st.cache_resource(max_entries=16)
+def get_profile(data_type: str, dataset_id: str) -> QualityProfile:
+    """Data-quality profile stored with the dataset, computed on first use"""
+    store = get_store()
+    stored = store.read_profile(data_type, dataset_id)
+    if stored is not None:
+        return QualityProfile.from_dict(stored)
+    profile = profile_dataset(get_dataset(data_type, dataset_id), data_type)
+    store.write_profile(profile.to_dict(), data_type, dataset_id)
+    return profile
+
+@st.cache_resource(max_entries=16)
+def get_version_diff(data_type: str, before_id: str, after_id: str, metrics: tuple) -> VersionDiff:
+    """Cell-level diff of two stored versions over their aggregate cubes"""
+    engine = get_engine()
+    before, after = (engine.aggregate(data_type, dataset_id, by=KEY_COLUMNS, metrics=list(metrics))
+                     for dataset_id in (before_id, after_id))
+    return diff_cubes(before, after, list(metrics))
+
+def data_quality_panel(data_type: str, dataset_id: str):
+    """Collapsible summary of the dataset's quality profile"""
+    profile = get_profile(data_type, dataset_id)
+    label = f"🩺 Data Quality · {profile.issues:,} issue{'s' if profile.issues != 1 else ''}" \
+        if profile.issues else "🩺 Data Quality · no issues found"
+    with st.expander(label):
+        for column, (title, value) in zip(st.columns(5), [
+            ('Rows', profile.rows),
+            ('Duplicated keys', profile.duplicate_keys),
+            ('Missing package months', profile.missing_months),
+            ('Rule violations', sum(profile.checks.values())),
+            ('Outlying rows', profile.outlier_rows)
+        ]):
+            column.metric(title, f"{value:,}")
+
+        if profile.duplicate_keys:
+            st.warning(f"{profile.duplicate_rows:,} rows share {profile.duplicate_keys:,} "
+                       f"(Year, Month, Package) keys; their values are added together in every total.")
+
+        st.markdown("**Consistency checks**")
+        st.dataframe(pd.DataFrame({'Check': list(profile.checks), 'Rows': list(profile.checks.values())}),
+                     hide_index=True, use_container_width=True)
+
+        if profile.gaps:
+            st.markdown("**Months missing between a package's first and last month**")
+            st.dataframe(pd.DataFrame(profile.gaps), hide_index=True, use_container_width=True)
+
+        if profile.outliers:
+            st.markdown("**Most extreme rows within their package**")
+            outliers = pd.DataFrame(profile.outliers)
+            money = outliers['Column'] == 'Amount (GHS)'
+            for col in ['Value', 'Package Median']:
+                outliers[col] = outliers[col].astype(float).where(~money, to_major(outliers[col]))
+            st.dataframe(outliers, hide_index=True, use_container_width=True,
+                         column_config={'Value': st.column_config.NumberColumn(format='localized'),
+                                        'Package Median': st.column_config.NumberColumn(format='localized'),
+                                        'Year': st.column_config.NumberColumn(format='%d')})
+
+        st.markdown("**Columns**")
+        columns = pd.DataFrame(profile.columns)
+        money = columns['Column'] == 'Amount (GHS)'
+        for col in ['Min', 'Max']:
+            columns[col] = columns[col].astype(float).where(~money, to_major(columns[col].astype(float)))
+        st.dataframe(columns, hide_index=True, use_container_width=True,
+                     column_config={'Min': st.column_config.NumberColumn(format='localized'),
+                                    'Max': st.column_config.NumberColumn(format='localized')})
 
 def with_state_management(func):
     """Decorator to ensure session state is initialized"""
@@ -36,6 +206,8 @@ class StateManager:
             'firm_data': None,
             'solo_data_loaded': False,
             'firm_data_loaded': False,
+            'solo_dataset_id': None,
+            'firm_dataset_id': None,
             'month_filter': ['All'],
             'package_filter': ['All'],
             'prev_month_selection': ['All'],
@@ -49,40 +221,69 @@ class StateManager:
             if key not in st.session_state:
                 st.session_state[key] = default_value
 
+        # Watched files keep arriving in the store whichever page is open
+        get_watcher()
+
     @staticmethod
     def load_data(uploaded_file, data_type='solo'):
         """Load data from uploaded file"""
         try:
-            if uploaded_file.name.endswith('.csv'):
-                df = pd.read_csv(uploaded_file)
-            else:
-                df = pd.read_excel(uploaded_file)
-            
-            required_columns = ['Month', 'Year', 'Subscription Package', 
-                              'Number of Subscriptions', 'Amount (GHS)']
-            
-            if all(col in df.columns for col in required_columns):
-                if data_type == 'solo':
-                    st.session_state.solo_data = df
-                    st.session_state.solo_data_loaded = True
-                else:
-                    st.session_state.firm_data = df
-                    st.session_state.firm_data_loaded = True
-                return True
-            else:
-                st.error("Upload failed: Missing required columns")
-                return False
-                
+            # Another worker may already have parsed this exact file
+            dataset_id = store_upload(get_store(), uploaded_file.getvalue(), uploaded_file.name, data_type)
+            return StateManager.open_dataset(dataset_id, data_type)
+
+        except UploadError as e:
+            st.error(f"Upload failed: {str(e)}")
+            return False
         except Exception as e:
             st.error(f"Error processing file: {str(e)}")
             return False
 
+    @staticmethod
+    def open_dataset(dataset_id, data_type='solo'):
+        """Attach a stored dataset to the current session"""
+        df = get_dataset(data_type, dataset_id)
+        get_engine().ingest(data_type, dataset_id)
+        if data_type == 'solo':
+            st.session_state.solo_data = df
+            st.session_state.solo_data_loaded = True
+            st.session_state.solo_dataset_id = dataset_id
+        else:
+            st.session_state.firm_data = df
+            st.session_state.firm_data_loaded = True
+            st.session_state.firm_dataset_id = dataset_id
+        return True
+
+    @staticmethod
+    def dataset_info(data_type='solo'):
+        """Manifest of the dataset attached to this session"""
+        dataset_id = st.session_state[f'{data_type}_dataset_id']
+        return get_store().manifest(data_type, dataset_id) if dataset_id else None
+
+    @staticmethod
+    def validation_report(data_type='solo'):
+        """CSV bytes of the bad-row report for the attached dataset, if any"""
+        dataset_id = st.session_state[f'{data_type}_dataset_id']
+        return get_store().read_report(data_type, dataset_id) if dataset_id else None
+
+    @staticmethod
+    def stored_datasets(data_type='solo'):
+        """Datasets already persisted by any worker"""
+        return get_store().list(data_type)
+
+    @staticmethod
+    def dataset_versions(data_type='solo'):
+        """Every stored upload as a numbered version, oldest first"""
+        return get_store().versions(data_type)
+
     @staticmethod
     def clear_data(data_type='solo'):
         """Clear data from session state"""
         if data_type == 'solo':
             st.session_state.solo_data = None
             st.session_state.solo_data_loaded = False
+            st.session_state.solo_dataset_id = None
         else:
             st.session_state.firm_data = None
             st.session_state.firm_data_loaded = False
+            st.session_state.firm_dataset_id = None
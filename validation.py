@@ -0,0 +1,159 @@
+from dataclasses import dataclass
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from kernels import encode_keys
+from money import MONEY_COLUMNS, to_minor
+from schema import MONTH_ORDER, REQUIRED_COLUMNS, COLUMN_TYPES, STORED_TYPES
+
+# Accepted spellings per month: full name, three-letter abbreviation and
+# 'sept', compared case-insensitively with surrounding spaces and dots removed
+MONTH_ALIASES: Dict[str, int] = {}
+for _code, _name in enumerate(MONTH_ORDER):
+    MONTH_ALIASES[_name.lower()] = _code
+    MONTH_ALIASES[_name[:3].lower()] = _code
+MONTH_ALIASES['sept'] = MONTH_ORDER.index('September')
+
+# Thousands separators, spaces and currency markers stripped before parsing
+NUMBER_NOISE = r'[,\s]|GH₵|GHS|₵'
+NUMBER_PATTERN = r'^-?(\d+(\.\d*)?|\.\d+)$'
+
+
+@dataclass
+class ValidationResult:
+    """Rows that passed validation and a report of every flagged row"""
+    table: pa.Table
+    report: pd.DataFrame
+    rejected_rows: int
+    flagged_rows: int
+
+
+def month_codes(column: pa.ChunkedArray) -> pa.Array:
+    """Month ordinal (0-11) per row, null where the name is not recognised
+
+    Only the distinct names are cleaned and looked up; rows are mapped with
+    one take over the dictionary indices.
+    """
+    column = column.combine_chunks()
+    if not pa.types.is_dictionary(column.type):
+        column = column.cast(pa.string()).dictionary_encode()
+
+    names = pc.utf8_lower(pc.utf8_trim(column.dictionary.cast(pa.string()), characters=' .\t'))
+    aliases = pa.array(list(MONTH_ALIASES))
+    codes = pc.take(pa.array(list(MONTH_ALIASES.values()), pa.int8()),
+                    pc.index_in(names, value_set=aliases))
+    return pc.take(codes, column.indices)
+
+
+def to_numbers(column: pa.ChunkedArray) -> pa.Array:
+    """Float64 per row, null where the value is missing or not a number"""
+    column = column.combine_chunks()
+    if pa.types.is_dictionary(column.type):
+        column = column.cast(column.type.value_type)
+    if pa.types.is_integer(column.type) or pa.types.is_floating(column.type):
+        return column.cast(pa.float64())
+    if pa.types.is_null(column.type):
+        return pa.nulls(len(column), pa.float64())
+
+    text = pc.replace_substring_regex(column.cast(pa.string()), pattern=NUMBER_NOISE, replacement='')
+    valid = pc.match_substring_regex(text, pattern=NUMBER_PATTERN)
+    return pc.if_else(valid, text, pa.scalar(None, pa.string())).cast(pa.float64())
+
+
+def validate(table: pa.Table, data_type: str) -> ValidationResult:
+    """Coerce the known columns and flag bad rows without per-row loops
+
+    Rows with an unrecognised month, a missing package or a missing or
+    non-numeric year/count/amount are rejected. Negative values and
+    duplicate (Year, Month, Package) keys are kept but flagged.
+    """
+    n_rows = table.num_rows
+    errors: Dict[str, np.ndarray] = {}
+    warnings: Dict[str, np.ndarray] = {}
+
+    months = month_codes(table['Month'])
+    errors['Unrecognised month'] = pc.is_null(months).to_numpy(zero_copy_only=False)
+
+    packages = table['Subscription Package'].combine_chunks()
+    if pa.types.is_dictionary(packages.type):
+        packages = packages.cast(packages.type.value_type)
+    packages = pc.fill_null(pc.utf8_trim_whitespace(packages.cast(pa.string())), '')
+    errors['Missing package'] = pc.equal(packages, '').to_numpy(zero_copy_only=False)
+
+    numbers = {}
+    for col in REQUIRED_COLUMNS[data_type]:
+        if col in ('Month', 'Subscription Package'):
+            continue
+        values = to_numbers(table[col]).to_numpy(zero_copy_only=False)
+        invalid = ~np.isfinite(values)
+        if pa.types.is_integer(COLUMN_TYPES[col]):
+            invalid |= ~invalid & (values != np.round(values))
+        errors[f'Missing or invalid {col}'] = invalid
+        if col != 'Year':
+            warnings[f'Negative {col}'] = ~invalid & (values < 0)
+        numbers[col] = values
+
+    rejected = np.zeros(n_rows, dtype=bool)
+    for mask in errors.values():
+        rejected |= mask
+
+    # Duplicate keys among the rows that will be kept
+    month_array = months.to_numpy(zero_copy_only=False)
+    package_codes = packages.dictionary_encode().indices.to_numpy(zero_copy_only=False)
+    keep = np.flatnonzero(~rejected)
+    duplicated = np.zeros(n_rows, dtype=bool)
+    if len(keep):
+        years = numbers['Year'][keep].astype(np.int64)
+        first_year = years.min()
+        key = encode_keys(
+            [years - first_year, month_array[keep].astype(np.int64), package_codes[keep].astype(np.int64)],
+            [int(years.max() - first_year + 1), len(MONTH_ORDER), int(package_codes.max()) + 1]
+        )
+        _, inverse, counts = np.unique(key, return_inverse=True, return_counts=True)
+        duplicated[keep] = counts[inverse] > 1
+    warnings['Duplicate (Year, Month, Package)'] = duplicated
+
+    flagged = rejected.copy()
+    for mask in warnings.values():
+        flagged |= mask
+
+    report = _report(table, data_type, flagged, {**errors, **warnings}, rejected)
+
+    # Replace the known columns with their coerced values (amounts in minor
+    # units) and drop rejected rows
+    clean = table
+    for col, values in numbers.items():
+        values = np.where(rejected, 0, values)
+        if col in MONEY_COLUMNS:
+            values = to_minor(values)
+        values = pa.array(values).cast(STORED_TYPES[col])
+        clean = clean.set_column(clean.schema.get_field_index(col), col, values)
+    clean = clean.set_column(clean.schema.get_field_index('Month'), 'Month', pc.fill_null(months, 0))
+    clean = clean.set_column(clean.schema.get_field_index('Subscription Package'),
+                             'Subscription Package', packages)
+    clean = clean.filter(pa.array(~rejected))
+
+    return ValidationResult(clean, report, int(rejected.sum()), int(flagged.sum()))
+
+
+def _report(table: pa.Table, data_type: str, flagged: np.ndarray,
+            checks: Dict[str, np.ndarray], rejected: np.ndarray) -> pd.DataFrame:
+    """Flagged rows with their original values and the issues found"""
+    rows = np.flatnonzero(flagged)
+    columns = [col for col in REQUIRED_COLUMNS[data_type] if col in table.column_names]
+    report = table.select(columns).take(pa.array(rows))
+
+    # One label-or-null column per check, joined element-wise over the
+    # flagged rows only
+    labels = [pc.if_else(pa.array(mask[rows]), label, pa.scalar(None, pa.string()))
+              for label, mask in checks.items()]
+    issues = pc.binary_join_element_wise(*labels, '; ', null_handling='skip')
+
+    report = report.add_column(0, 'Row', pa.array(rows + 1))
+    report = report.add_column(1, 'Status', pc.if_else(pa.array(rejected[rows]), 'Rejected', 'Kept'))
+    report = report.append_column('Issues', issues)
+    return report.to_pandas()
@@ -0,0 +1,155 @@
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from kernels import decode_keys, encode_keys, safe_ratio
+from schema import MONTH_ORDER
+
+KEY_COLUMNS = ['Year', 'Month', 'Subscription Package']
+
+STATUSES = ['Added', 'Removed', 'Changed']
+
+# Cached results (see utils) and the slice of the data each one depends on,
+# for reporting the impact of a new version: 'rows' results differ on any
+# change, 'years' ones in the changed years and 'packages' ones over the
+# changed packages' whole timelines. Every cache is keyed by dataset id, so
+# a new version recomputes all of them regardless.
+CACHED_RESULTS = {
+    'Stored dataset, raw-data index and quality profile': 'rows',
+    'Year totals, KPIs and comparisons': 'years',
+    'Calendar': 'span',
+    'Monthly panel, forecasts, unusual months and seasonality': 'packages'
+}
+
+
+@dataclass
+class VersionDiff:
+    """Cell-level differences between two versions of a dataset
+
+    `cells` holds one row per added, removed or changed (Year, Month,
+    Package) cell with every metric before and after. Unchanged cells are
+    only counted.
+    """
+    metrics: List[str]
+    cells: pd.DataFrame
+    counts: Dict[str, int]
+    before: pd.DataFrame
+    after: pd.DataFrame
+
+    def kpis(self, by_year: bool = False) -> pd.DataFrame:
+        """Metric totals in both versions and their change, overall or per year"""
+        by = ['Year'] if by_year else []
+        before = self.before.groupby(by)[self.metrics].sum() if by else self.before[self.metrics].sum().to_frame().T
+        after = self.after.groupby(by)[self.metrics].sum() if by else self.after[self.metrics].sum().to_frame().T
+        before, after = before.align(after, fill_value=0)
+        rows = []
+        for metric in self.metrics:
+            frame = pd.DataFrame({'Metric': metric, 'Before': before[metric], 'After': after[metric]})
+            frame['Change'] = frame['After'] - frame['Before']
+            frame['Change %'] = safe_ratio(frame['Change'], frame['Before']) * 100
+            rows.append(frame.reset_index() if by else frame)
+        return pd.concat(rows, ignore_index=True)
+
+    def stale(self) -> pd.DataFrame:
+        """Which results differ between the versions, and for which years or packages"""
+        changed = self.cells
+        years = sorted(changed['Year'].unique().tolist())
+        packages = sorted(changed['Subscription Package'].unique().tolist())
+        span_changed = (self.before['Year'].min(), self.before['Year'].max()) != \
+            (self.after['Year'].min(), self.after['Year'].max())
+        scopes = {
+            'rows': 'all rows' if len(changed) else '',
+            'years': ', '.join(map(str, years)),
+            'span': f"{self.after['Year'].min()}–{self.after['Year'].max()}" if span_changed else '',
+            'packages': ', '.join(packages)
+        }
+        return pd.DataFrame({
+            'Result': list(CACHED_RESULTS),
+            'Differs': [bool(scopes[depends]) for depends in CACHED_RESULTS.values()],
+            'Affected': [scopes[depends] or '—' for depends in CACHED_RESULTS.values()]
+        })
+
+
+def _codes(values: pd.Series, labels: np.ndarray) -> np.ndarray:
+    """Position of every value in the sorted `labels`, looking up distinct values only"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values)
+    return np.searchsorted(labels, np.asarray(uniques, dtype=str))[codes].astype(np.int64)
+
+
+def _keys(cube: pd.DataFrame, first_year: int, n_years: int, packages: np.ndarray) -> np.ndarray:
+    """One int64 key per (Year, Month, Package) cell, ordered like the cube"""
+    months = np.argsort(MONTH_ORDER)[_codes(cube['Month'], np.sort(MONTH_ORDER))]
+    return encode_keys(
+        [cube['Year'].to_numpy().astype(np.int64) - first_year, months,
+         _codes(cube['Subscription Package'], packages)],
+        [n_years, len(MONTH_ORDER), len(packages)]
+    )
+
+
+def diff_cubes(before: pd.DataFrame, after: pd.DataFrame, metrics: List[str]) -> VersionDiff:
+    """Compare two (Year, Month, Package) aggregates with a sorted-key merge
+
+    Both cubes get integer keys over a shared package dictionary; the keys
+    of `before` are located in the sorted keys of `after` with one
+    searchsorted, so matching is O(n log n) array work rather than a
+    row-by-row comparison.
+    """
+    packages = np.union1d(before['Subscription Package'].unique().astype(str),
+                          after['Subscription Package'].unique().astype(str))
+    years = np.concatenate([before['Year'].to_numpy(), after['Year'].to_numpy()]).astype(np.int64)
+    first_year = int(years.min()) if len(years) else 0
+    n_years = int(years.max()) - first_year + 1 if len(years) else 1
+
+    old_keys, new_keys = (_keys(cube, first_year, n_years, packages) for cube in (before, after))
+    old_order, new_order = np.argsort(old_keys, kind='stable'), np.argsort(new_keys, kind='stable')
+    old_keys, new_keys = old_keys[old_order], new_keys[new_order]
+
+    position = np.minimum(np.searchsorted(new_keys, old_keys), max(len(new_keys) - 1, 0))
+    matched = (new_keys[position] == old_keys) if len(new_keys) else np.zeros(len(old_keys), dtype=bool)
+    added = np.ones(len(new_keys), dtype=bool)
+    added[position[matched]] = False
+
+    old_values = {m: before[m].to_numpy()[old_order] for m in metrics}
+    new_values = {m: after[m].to_numpy()[new_order] for m in metrics}
+    differs = np.zeros(int(matched.sum()), dtype=bool)
+    for m in metrics:
+        differs |= old_values[m][matched] != new_values[m][position[matched]]
+
+    # Removed, changed and added cells as positions into the sorted keys
+    removed_rows = np.flatnonzero(~matched)
+    changed_old = np.flatnonzero(matched)[differs]
+    changed_new = position[changed_old]
+    added_rows = np.flatnonzero(added)
+
+    keys = np.concatenate([old_keys[removed_rows], old_keys[changed_old], new_keys[added_rows]])
+    year_codes, month_codes, package_codes = decode_keys(keys, [n_years, len(MONTH_ORDER), len(packages)])
+    cells = pd.DataFrame({
+        'Year': (year_codes + first_year).astype(np.int32),
+        'Month': pd.Categorical.from_codes(month_codes, categories=MONTH_ORDER, ordered=True),
+        'Subscription Package': packages[package_codes],
+        'Status': np.repeat(['Removed', 'Changed', 'Added'], [len(removed_rows), len(changed_old), len(added_rows)])
+    })
+    for m in metrics:
+        dtype = np.result_type(old_values[m].dtype, new_values[m].dtype)
+        before_values = np.concatenate([old_values[m][removed_rows], old_values[m][changed_old],
+                                        np.zeros(len(added_rows), dtype=dtype)])
+        after_values = np.concatenate([np.zeros(len(removed_rows), dtype=dtype), new_values[m][changed_new],
+                                       new_values[m][added_rows]])
+        cells[f'{m} Before'] = before_values
+        cells[f'{m} After'] = after_values
+        cells[f'{m} Change'] = after_values - before_values
+    cells = cells.iloc[np.argsort(keys, kind='stable')].reset_index(drop=True)
+
+    counts = {
+        'Added': len(added_rows),
+        'Removed': len(removed_rows),
+        'Changed': len(changed_old),
+        'Unchanged': int(matched.sum()) - len(changed_old)
+    }
+    return VersionDiff(metrics, cells, counts, before, after)
+
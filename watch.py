@@ -0,0 +1,171 @@
+"""Ingest Solo and Firm exports dropped into a watched directory
+
+Files under `<watch dir>/solo/` and `<watch dir>/firm/` are ingested into the
+dataset store as they appear or change, so they are parsed, profiled and
+listed under "Or open a stored dataset" before anyone opens the dashboard.
+A file is re-read only when its modification time or size differs from the
+last scan. Run from the repository root, or set DENNISLAW_WATCH_DIR to have
+the Streamlit app poll it in the background:
+
+    python watch.py /srv/exports --once
+    python watch.py /srv/exports --interval 30
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: scans are then not serialized across processes
+    fcntl = None
+
+from engines import ENGINE, create_engine
+from ingest import UPLOAD_TYPES, store_upload
+from schema import MONTH_ORDER, REQUIRED_COLUMNS
+from store import DatasetStore
+
+# Directory polled by the Streamlit app (watching is off when unset)
+WATCH_DIR = os.environ.get('DENNISLAW_WATCH_DIR')
+
+# Seconds between scans of the watched directory
+WATCH_INTERVAL = float(os.environ.get('DENNISLAW_WATCH_INTERVAL', '30'))
+
+# Files modified more recently than this may still be being copied in
+SETTLE_SECONDS = 2.0
+
+logger = logging.getLogger(__name__)
+
+
+def _watched(name: str) -> bool:
+    return not name.startswith('.') and name.lower().rsplit('.', 1)[-1] in UPLOAD_TYPES
+
+
+class DirectoryWatcher:
+    """Incremental ingestion of a watched directory into a dataset store
+
+    The (mtime, size) of every file seen is kept in `watch.json` in the
+    store, so only new or changed files are read, across restarts too.
+    Content is still hashed on ingest: a file touched without changing is
+    not parsed again.
+    """
+
+    def __init__(self, root: str, store: Optional[DatasetStore] = None, engine_name: str = ENGINE):
+        self.root = root
+        self.store = store or DatasetStore()
+        self.engine = create_engine(engine_name, self.store, self.store.read, MONTH_ORDER)
+        self.state_path = os.path.join(self.store.root, 'watch.json')
+
+    def _load_state(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def _save_state(self, state: Dict[str, Dict]):
+        os.makedirs(self.store.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.store.root, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def scan(self) -> List[Dict]:
+        """Ingest every new or changed file once; returns what was done with each"""
+        os.makedirs(self.store.root, exist_ok=True)
+        with open(os.path.join(self.store.root, 'watch.lock'), 'w') as lock:
+            # Every app worker may run a watcher; one scan at a time does the work
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            state = self._load_state()
+            seen, results = set(), []
+            now = time.time()
+            for data_type in REQUIRED_COLUMNS:
+                directory = os.path.join(self.root, data_type)
+                if not os.path.isdir(directory):
+                    continue
+                for entry in sorted(os.scandir(directory), key=lambda e: e.name):
+                    if not entry.is_file() or not _watched(entry.name):
+                        continue
+                    stat = entry.stat()
+                    seen.add(entry.path)
+                    previous = state.get(entry.path)
+                    if previous and previous['mtime_ns'] == stat.st_mtime_ns and previous['size'] == stat.st_size:
+                        continue
+                    if now - stat.st_mtime < SETTLE_SECONDS:
+                        continue
+                    results.append(self._ingest(entry.path, data_type, stat, state))
+            # Datasets of deleted files stay in the store as earlier versions
+            for path in set(state) - seen:
+                del state[path]
+            self._save_state(state)
+        return results
+
+    def _ingest(self, path: str, data_type: str, stat: os.stat_result, state: Dict[str, Dict]) -> Dict:
+        record = {'data_type': data_type, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+        start = time.perf_counter()
+        try:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            dataset_id = DatasetStore.dataset_id(raw)
+            new = not self.store.exists(data_type, dataset_id)
+            if new:
+                store_upload(self.store, raw, os.path.basename(path), data_type, source='watch', path=path)
+            # Query-ready (e.g. loaded into DuckDB) before the first page view
+            self.engine.ingest(data_type, dataset_id)
+            record.update(dataset_id=dataset_id, status='ingested' if new else 'unchanged')
+        except Exception as e:
+            # Kept with the file's stat so it is retried only once the file changes
+            record.update(status='failed', error=str(e))
+            logger.warning("Could not ingest %s: %s", path, e)
+        state[path] = record
+        return {'path': path, 'seconds': round(time.perf_counter() - start, 3), **record}
+
+
+class BackgroundWatcher(threading.Thread):
+    """Daemon thread scanning a directory every `interval` seconds"""
+
+    def __init__(self, watcher: DirectoryWatcher, interval: float = WATCH_INTERVAL):
+        super().__init__(name='dataset-watcher', daemon=True)
+        self.watcher = watcher
+        self.interval = interval
+        self.last_scan: List[Dict] = []
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.is_set():
+            try:
+                self.last_scan = self.watcher.scan()
+            except Exception:
+                logger.exception("Scan of %s failed", self.watcher.root)
+            self._stopped.wait(self.interval)
+
+    def stop(self):
+        self._stopped.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('directory', nargs='?', default=WATCH_DIR,
+                        help='directory with solo/ and firm/ subdirectories (default: DENNISLAW_WATCH_DIR)')
+    parser.add_argument('--once', action='store_true', help='scan once and exit')
+    parser.add_argument('--interval', type=float, default=WATCH_INTERVAL, help='seconds between scans')
+    args = parser.parse_args()
+    if not args.directory:
+        parser.error('pass a directory or set DENNISLAW_WATCH_DIR')
+
+    watcher = DirectoryWatcher(args.directory)
+    while True:
+        for result in watcher.scan():
+            print(f"{result['status']:9} {result['data_type']:4} {result['path']}  "
+                  f"{result.get('dataset_id', result.get('error', ''))}  {result['seconds']:.2f}s")
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    main()